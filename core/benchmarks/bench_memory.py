@@ -0,0 +1,66 @@
+"""Measure, with tracemalloc, the memory allocated per plan for the nested dict form the adapters
+used to traverse against the node tree, on plans of 10, 100 and 1000 nodes.
+
+"peak" is the high-water mark while building one tree, "retained" what each of 100 trees keeps
+alive. Trees are built from HTTP client responses, and from raw JSON where every decode creates
+fresh strings, which interning the attribute paths deduplicates.
+
+Run with `python benchmarks/bench_memory.py` from the `core` directory.
+"""
+
+import gc
+import json
+import tracemalloc
+
+from bench_parse import build_response
+from cerbos.sdk.model import PlanResourcesResponse
+
+from cerbos_query_core import parse_condition, parse_plan_json
+from cerbos_query_core.parser import _loads
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        build()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def _retained(build, n: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        kept = [build(i) for i in range(n)]
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return (current - start) // n
+
+
+def main():
+    print(f"{'nodes':>6} {'input':>6} {'form':>6} {'peak':>12} {'retained':>12}")
+    for nodes in (10, 100, 1000):
+        raw = json.dumps(build_response(nodes))
+        conditions = [
+            PlanResourcesResponse.from_json(raw).filter.condition for _ in range(100)
+        ]
+
+        for name, form, build in (
+            ("http", "dict", lambda i=0: conditions[i].to_dict()),
+            ("http", "nodes", lambda i=0: parse_condition(conditions[i])),
+            ("json", "dict", lambda i=0: _loads(raw)["filter"]["condition"]),
+            ("json", "nodes", lambda i=0: parse_plan_json(raw).condition),
+        ):
+            peak = _measure(build)
+            retained = _retained(build, len(conditions))
+            print(f"{nodes:>6} {name:>6} {form:>6} {peak:>11,}B {retained:>11,}B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare parsing plans of 10, 100 and 1000 nodes directly against the indirect routes:
+`to_dict()` for HTTP client plans, `MessageToDict` for gRPC ones and the SDK models for raw JSON.
+
+Run with `python benchmarks/bench_parse.py` from the `core` directory.
+"""
+
+import json
+import timeit
+
+from cerbos.response.v1 import response_pb2
+from cerbos.sdk.model import PlanResourcesResponse
+from google.protobuf.json_format import MessageToDict, ParseDict
+
+from cerbos_query_core import parse_condition, parse_plan_json
+
+
+def build_response(nodes: int) -> dict:
+    # an `or` of `eq` leaves, each leaf being 3 nodes (operator, variable, value)
+    condition = {
+        "expression": {
+            "operator": "or",
+            "operands": [
+                {
+                    "expression": {
+                        "operator": "eq",
+                        "operands": [
+                            {"variable": f"request.resource.attr.a{i}"},
+                            {"value": i},
+                        ],
+                    }
+                }
+                for i in range((nodes - 1) // 3)
+            ],
+        }
+    }
+    return {
+        "requestId": "1",
+        "action": "action",
+        "resourceKind": "resource",
+        "policyVersion": "default",
+        "filter": {"kind": "KIND_CONDITIONAL", "condition": condition},
+    }
+
+
+def _time(fn, nodes: int) -> float:
+    number = max(10, 10_000 // nodes)
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    print(f"{'nodes':>6} {'input':>6} {'indirect':>12} {'direct':>12} {'speedup':>8}")
+    for nodes in (10, 100, 1000):
+        response = build_response(nodes)
+        http = PlanResourcesResponse.from_dict(response).filter.condition
+        grpc = ParseDict(
+            response, response_pb2.PlanResourcesResponse()
+        ).filter.condition
+        raw = json.dumps(response).encode()
+
+        for name, via_dict, direct in (
+            (
+                "http",
+                lambda: parse_condition(http.to_dict()),
+                lambda: parse_condition(http),
+            ),
+            (
+                "grpc",
+                lambda: parse_condition(MessageToDict(grpc)),
+                lambda: parse_condition(grpc),
+            ),
+            (
+                "json",
+                lambda: parse_condition(
+                    PlanResourcesResponse.from_json(raw).filter.condition
+                ),
+                lambda: parse_plan_json(raw),
+            ),
+        ):
+            slow, fast = _time(via_dict, nodes), _time(direct, nodes)
+            print(
+                f"{nodes:>6} {name:>6} {slow * 1e6:>10.1f}us {fast * 1e6:>10.1f}us {slow / fast:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
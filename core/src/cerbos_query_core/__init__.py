@@ -0,0 +1,64 @@
+from cerbos_query_core.canonical import (
+    PlanCardinality,
+    canonical_form,
+    canonicalize,
+    plan_hash,
+)
+from cerbos_query_core.nodes import And, Compare, Exists, Node, Not, Or
+from cerbos_query_core.parser import (
+    ALWAYS_ALLOWED,
+    ALWAYS_DENIED,
+    CONDITIONAL,
+    UNSPECIFIED,
+    Plan,
+    QueryPlan,
+    parse_condition,
+    parse_plan,
+    parse_plan_json,
+    plan_size,
+)
+from cerbos_query_core.partial import KnownAttributes, partial_evaluate
+from cerbos_query_core.routing import select_shards, shard_key_values
+from cerbos_query_core.visitor import Emitter, Visitor
+from cerbos_query_core.warmup import PlanRequest, afetch_plan, fetch_plans
+
+__all__ = [
+    "ALWAYS_ALLOWED",
+    "ALWAYS_DENIED",
+    "And",
+    "CONDITIONAL",
+    "Compare",
+    "Emitter",
+    "Exists",
+    "KnownAttributes",
+    "Node",
+    "Not",
+    "Or",
+    "Plan",
+    "PlanCardinality",
+    "PlanRequest",
+    "QueryPlan",
+    "UNSPECIFIED",
+    "Visitor",
+    "afetch_plan",
+    "canonical_form",
+    "canonicalize",
+    "fetch_plans",
+    "parse_condition",
+    "parse_plan",
+    "parse_plan_json",
+    "partial_evaluate",
+    "plan_hash",
+    "plan_size",
+    "select_shards",
+    "shard_key_values",
+]
+
+
+def __getattr__(name: str):
+    # `importlib.metadata` is slow to import, so the version is only looked up when asked for
+    if name == "__version__":
+        import importlib.metadata
+
+        return importlib.metadata.version(__package__ or __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
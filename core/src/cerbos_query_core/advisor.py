@@ -0,0 +1,112 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from cerbos_query_core.parser import QueryPlan, parse_plan
+from cerbos_query_core.passes import conjunctions
+
+# Operators which can be served by an index seek on a single value (or set of values). These lead
+# suggested composite indexes, with range operators trailing.
+_EQUALITY_OPERATORS = frozenset(["eq", "in", "exists"])
+
+
+@dataclass
+class ColumnUsage:
+    table: str
+    column: str
+    # `None` for columns which only appear in joins
+    attribute: Optional[str]
+    operators: Set[str] = field(default_factory=set)
+    occurrences: int = 0
+    indexed: bool = False
+
+
+@dataclass
+class ColumnCombination:
+    table: str
+    columns: Tuple[str, ...]
+    occurrences: int = 0
+    indexed: bool = False
+
+
+@dataclass
+class IndexSuggestion:
+    table: str
+    columns: Tuple[str, ...]
+    reason: str
+
+
+@dataclass
+class IndexReport:
+    columns: List[ColumnUsage]
+    combinations: List[ColumnCombination]
+    suggestions: List[IndexSuggestion]
+
+
+def get_conjunctions(query_plan: QueryPlan) -> List[List[Tuple[str, str]]]:
+    """Return the groups of `(attribute, operator)` leaf predicates that are ANDed together."""
+    plan = parse_plan(query_plan)
+    if plan.condition is None:
+        return []
+    return conjunctions(plan.condition)
+
+
+def _is_covered(prefixes: List[Tuple[str, ...]], columns: Iterable[str]) -> bool:
+    columns = set(columns)
+    return any(set(p[: len(columns)]) == columns for p in prefixes)
+
+
+def build_index_report(
+    usages: Dict[Tuple[str, str], ColumnUsage],
+    combinations: Dict[Tuple[str, Tuple[str, ...]], ColumnCombination],
+    alone: Set[Tuple[str, str]],
+    prefixes: Dict[str, List[Tuple[str, ...]]],
+    join_reason: str = "column is used in a join",
+) -> IndexReport:
+    """Mark the `usages` and `combinations` collected from plans which an index prefix of their
+    table covers, and suggest indexes for the rest: a composite index per uncovered combination
+    (equality columns first, range columns last), then one per uncovered column those don't serve.
+    `alone` holds the columns filtered on without any other column of their table. Columns only
+    used in joins (with no attribute) are suggested with `join_reason`.
+    """
+    for u in usages.values():
+        u.indexed = _is_covered(prefixes[u.table], [u.column])
+    for c in combinations.values():
+        c.indexed = _is_covered(prefixes[c.table], c.columns)
+
+    suggestions: List[IndexSuggestion] = []
+    for c in sorted(combinations.values(), key=lambda c: -c.occurrences):
+        if c.indexed:
+            continue
+
+        def rank(name: str):
+            u = usages[(c.table, name)]
+            return (not (u.operators & _EQUALITY_OPERATORS), -u.occurrences, name)
+
+        suggestions.append(
+            IndexSuggestion(
+                c.table,
+                tuple(sorted(c.columns, key=rank)),
+                f"columns are filtered together in {c.occurrences} conjunction(s)",
+            )
+        )
+
+    # A composite suggestion also serves lookups on its leading column, and conjunctions on
+    # its other columns
+    leading = {(s.table, s.columns[0]) for s in suggestions}
+    composite = {(s.table, c) for s in suggestions for c in s.columns}
+    for u in sorted(usages.values(), key=lambda u: -u.occurrences):
+        key = (u.table, u.column)
+        if u.indexed or key in leading or (key in composite and key not in alone):
+            continue
+        reason = (
+            join_reason
+            if u.attribute is None
+            else f"column is filtered with {', '.join(sorted(u.operators))}"
+        )
+        suggestions.append(IndexSuggestion(u.table, (u.column,), reason))
+
+    return IndexReport(
+        columns=list(usages.values()),
+        combinations=list(combinations.values()),
+        suggestions=suggestions,
+    )
@@ -0,0 +1,148 @@
+import json
+from collections import Counter
+from hashlib import blake2b
+from threading import Lock
+from typing import Any, Dict, List, Tuple, Union
+
+from cerbos_query_core.nodes import And, Compare, Exists, Node, Not, Or
+from cerbos_query_core.parser import CONDITIONAL, QueryPlan, parse_plan
+
+# Bumped whenever the canonical form changes, so that keys computed by different versions never
+# collide in a shared cache
+CANONICAL_VERSION = 1
+
+# `and`/`or` are commutative and idempotent, so their children are sorted and deduplicated. So
+# are the values of `in`.
+_COMMUTATIVE = (And, Or)
+
+
+def _normalize_value(value: Any) -> Any:
+    # gRPC plans carry every number as a float, HTTP/JSON ones as ints where possible
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, list):
+        return [_normalize_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize_value(v) for k, v in value.items()}
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def _rename(variable: str, renames: Dict[str, str]) -> str:
+    # Lambda variables (and field accesses on them, `x.name`) get positional names, so that
+    # `tags.exists(t, ...)` and `tags.exists(x, ...)` are the same plan
+    head, dot, rest = variable.partition(".")
+    if head in renames:
+        return renames[head] + dot + rest
+    return variable
+
+
+def _canonical(node: Node, renames: Dict[str, str]) -> Tuple[Node, str]:
+    if isinstance(node, _COMMUTATIVE):
+        cls = type(node)
+        children: Dict[str, Node] = {}
+        stack = list(node.children)
+        while stack:
+            c = stack.pop()
+            if type(c) is cls:
+                stack.extend(c.children)
+                continue
+            c, form = _canonical(c, renames)
+            children[form] = c
+        if len(children) == 1:
+            return next(iter(children.values())), next(iter(children))
+        forms = sorted(children)
+        name = "and" if cls is And else "or"
+        return cls([children[f] for f in forms]), f'["{name}",[{",".join(forms)}]]'
+
+    if isinstance(node, Not):
+        child = node.child
+        if isinstance(child, Not):
+            return _canonical(child.child, renames)
+        child, form = _canonical(child, renames)
+        return Not(child), f'["not",{form}]'
+
+    if isinstance(node, Exists):
+        variable = _rename(node.variable, renames)
+        lambda_variable = f"${len(renames)}"
+        body, form = _canonical(
+            node.body, {**renames, node.lambda_variable: lambda_variable}
+        )
+        return (
+            Exists(variable, lambda_variable, body),
+            f'["exists",{_dumps(variable)},{_dumps(lambda_variable)},{form}]',
+        )
+
+    variable = _rename(node.variable, renames) if node.variable is not None else None
+    value = _normalize_value(node.value)
+    if node.operator == "in":
+        values = value if isinstance(value, list) else [value]
+        unique = {_dumps(v): v for v in values}
+        value = [unique[k] for k in sorted(unique)]
+    return (
+        Compare(node.operator, variable, value),
+        f"[{_dumps(node.operator)},{_dumps(variable)},{_dumps(value)}]",
+    )
+
+
+def canonicalize(node: Node) -> Node:
+    """Return the canonical form of a condition: nested `and`/`or` flattened, their children
+    (and `in` values) sorted and deduplicated, double negations dropped, integral floats as ints
+    and lambda variables renamed by position."""
+    return _canonical(node, {})[0]
+
+
+def canonical_form(query_plan: Union[QueryPlan, Node]) -> str:
+    """Serialize a plan (or condition) canonically, so that equivalent plans serialize the same
+    regardless of the client, process, principal or the order Cerbos emitted operands in.
+    """
+    if isinstance(query_plan, (And, Or, Not, Compare, Exists)):
+        return _canonical(query_plan, {})[1]
+    plan = parse_plan(query_plan)
+    if plan.kind != CONDITIONAL or plan.condition is None:
+        return _dumps(plan.kind)
+    return _canonical(plan.condition, {})[1]
+
+
+def plan_hash(query_plan: Union[QueryPlan, Node]) -> str:
+    """A stable (cross-process, cross-version of Python) hex digest of the canonical form,
+    for use as a key in external caches."""
+    data = f"{CANONICAL_VERSION}:{canonical_form(query_plan)}".encode()
+    return blake2b(data, digest_size=16).hexdigest()
+
+
+class PlanCardinality:
+    """Counts the distinct plans seen, e.g. to size a shared cache of translated filters.
+
+    `hit_ratio` is the fraction of plans a cache keyed by `plan_hash` would have served.
+    """
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = Lock()
+
+    def observe(self, query_plan: Union[QueryPlan, Node]) -> str:
+        key = plan_hash(query_plan)
+        with self._lock:
+            self._counts[key] += 1
+        return key
+
+    @property
+    def total(self) -> int:
+        return sum(self._counts.values())
+
+    @property
+    def distinct(self) -> int:
+        return len(self._counts)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.total
+        return 1 - self.distinct / total if total else 0.0
+
+    def most_common(self, n: int) -> List[Tuple[str, int]]:
+        with self._lock:
+            return self._counts.most_common(n)
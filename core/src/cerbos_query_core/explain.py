@@ -0,0 +1,57 @@
+import json
+from typing import Any, Iterable, List, Tuple
+
+
+def _sqlite_table(detail: str) -> str:
+    # "SCAN resource", "SEARCH user USING INTEGER PRIMARY KEY (rowid=?)", "SCAN TABLE resource" (< 3.36)
+    words = detail.split()
+    return words[2] if len(words) > 2 and words[1] == "TABLE" else words[1]
+
+
+def analyse_sqlite_plan(rows: Iterable[Tuple[Any, ...]]) -> Tuple[List[str], List[str]]:
+    """Return the (full scan, unindexed nested loop) tables from `EXPLAIN QUERY PLAN` rows."""
+    full_scans: List[str] = []
+    nested_loops: List[str] = []
+    outer = True
+    for *_, detail in rows:
+        if not detail.startswith(("SCAN", "SEARCH")):
+            continue
+        table = _sqlite_table(detail)
+        scan = detail.startswith("SCAN")
+        if scan and table not in full_scans:
+            full_scans.append(table)
+        # SQLite only has nested loop joins, listed outermost first. A table in an inner loop is
+        # a problem if it's scanned for each outer row, or SQLite had to build a transient index
+        # to avoid that.
+        if not outer and (scan or "AUTOMATIC" in detail) and table not in nested_loops:
+            nested_loops.append(table)
+        outer = False
+    return full_scans, nested_loops
+
+
+def analyse_postgres_plan(document: Any) -> Tuple[List[str], List[str]]:
+    """Return the (full scan, nested loop) tables from an `EXPLAIN (FORMAT JSON)` document."""
+    full_scans: List[str] = []
+    nested_loops: List[str] = []
+
+    def walk(node: dict, inner: bool):
+        relation = node.get("Relation Name")
+        if node.get("Node Type") == "Seq Scan":
+            if relation not in full_scans:
+                full_scans.append(relation)
+            if inner and relation not in nested_loops:
+                nested_loops.append(relation)
+        children = node.get("Plans", [])
+        if node.get("Node Type") == "Nested Loop":
+            # the inner (second) side is re-evaluated for every outer row
+            for i, child in enumerate(children):
+                walk(child, inner or i > 0)
+        else:
+            for child in children:
+                walk(child, inner)
+
+    if isinstance(document, str):
+        document = json.loads(document)
+    for entry in document:
+        walk(entry["Plan"], False)
+    return full_scans, nested_loops
@@ -0,0 +1,97 @@
+import heapq
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cmp_to_key
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+S = TypeVar("S")
+
+# A sort key of merged rows: a function extracting a value from a row, and whether it's descending
+SortKey = Tuple[Callable[[Any], Any], bool]
+
+
+class ShardResult(NamedTuple):
+    """The rows a query returned on one shard (database alias, engine...), and the seconds it took."""
+
+    shard: Any
+    rows: List[Any]
+    duration: float
+
+
+class FanOutResult(NamedTuple):
+    """The merged rows of a query run on several shards, and the result of each shard."""
+
+    rows: List[Any]
+    shards: List[ShardResult]
+
+
+def _timed(fn: Callable[[S], List[Any]], shard: S) -> ShardResult:
+    start = time.perf_counter()
+    rows = fn(shard)
+    return ShardResult(shard, rows, time.perf_counter() - start)
+
+
+def run_on_shards(
+    fn: Callable[[S], List[Any]], shards: Sequence[S], max_workers: int = 8
+) -> List[ShardResult]:
+    """Run `fn` on every shard with a pool of at most `max_workers` threads, and return the
+    results in the order of `shards`. The first exception raised by `fn` is raised."""
+    if len(shards) <= 1:
+        return [_timed(fn, s) for s in shards]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(shards))) as executor:
+        return list(executor.map(lambda s: _timed(fn, s), shards))
+
+
+async def run_on_shards_async(
+    fn: Callable[[S], Awaitable[List[Any]]], shards: Sequence[S]
+) -> List[ShardResult]:
+    """Like `run_on_shards`, running the coroutines returned by `fn` concurrently."""
+    import asyncio
+
+    async def timed(shard: S) -> ShardResult:
+        start = time.perf_counter()
+        rows = await fn(shard)
+        return ShardResult(shard, rows, time.perf_counter() - start)
+
+    return list(await asyncio.gather(*(timed(s) for s in shards)))
+
+
+def _compare(keys: Sequence[SortKey]) -> Callable[[Any, Any], int]:
+    def compare(a: Any, b: Any) -> int:
+        for key, descending in keys:
+            # nulls sort last (first when descending), as in PostgreSQL
+            x, y = key(a), key(b)
+            x, y = (x is None, x), (y is None, y)
+            if x != y:
+                return (1 if x < y else -1) if descending else (-1 if x < y else 1)
+        return 0
+
+    return compare
+
+
+def merge_rows(
+    results: Iterable[ShardResult],
+    keys: Sequence[SortKey] = (),
+    limit: Optional[int] = None,
+) -> List[Any]:
+    """Merge the rows of each shard, which are sorted by `keys` if given, keeping the first
+    `limit`. Without `keys`, rows are concatenated in the order of the shards."""
+    rows = [r.rows for r in results]
+    if keys:
+        merged = heapq.merge(*rows, key=cmp_to_key(_compare(keys)))
+    else:
+        merged = (row for shard_rows in rows for row in shard_rows)
+    if limit is None:
+        return list(merged)
+    return [row for _, row in zip(range(limit), merged)]
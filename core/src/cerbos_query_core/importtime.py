@@ -0,0 +1,25 @@
+import subprocess
+import sys
+from typing import Dict, Mapping, Optional
+
+
+def import_times(code: str, env: Optional[Mapping[str, str]] = None) -> Dict[str, int]:
+    """Run `code` under `python -X importtime`, returning the cumulative import time (us) of each
+    module imported.
+
+    The adapters' test suites use this to check that importing them stays cheap.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        env=env,
+        text=True,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
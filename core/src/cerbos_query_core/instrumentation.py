@@ -0,0 +1,47 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict
+
+
+@dataclass
+class TranslationMetrics:
+    filter_kind: str
+    # wall clock start of the translation, in ns since the epoch (for span exporters)
+    start_time_ns: int
+    # seconds spent parsing the response into a condition tree
+    conversion_time: float = 0.0
+    # seconds spent traversing the condition and building the expression
+    traversal_time: float = 0.0
+    node_count: int = 0
+    max_depth: int = 0
+    # joins and subqueries the filter adds, as counted by the adapter (e.g. `table_mapping`
+    # joins, or relation paths)
+    joins: int = 0
+    subqueries: int = 0
+
+    @property
+    def duration(self) -> float:
+        return self.conversion_time + self.traversal_time
+
+    def as_attributes(self, prefix: str = "cerbos.") -> Dict[str, Any]:
+        return {prefix + k: v for k, v in asdict(self).items() if k != "start_time_ns"}
+
+
+MetricsCallback = Callable[[TranslationMetrics], None]
+
+
+def span_hook(tracer: Any, name: str = "cerbos.get_query") -> MetricsCallback:
+    """Build a `get_query` metrics callback which records each translation as a span.
+
+    `tracer` needs an OpenTelemetry compatible `start_span(name, start_time=, attributes=)`
+    returning a span with `end(end_time=)`, e.g. `opentelemetry.trace.get_tracer(__name__)`.
+    """
+
+    def hook(metrics: TranslationMetrics):
+        span = tracer.start_span(
+            name,
+            start_time=metrics.start_time_ns,
+            attributes=metrics.as_attributes(),
+        )
+        span.end(end_time=metrics.start_time_ns + int(metrics.duration * 1e9))
+
+    return hook
@@ -0,0 +1,132 @@
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Collection, Dict, Hashable, Iterable, Iterator, Union
+
+from cerbos_query_core.results import LRUStore
+
+# Ids per bitmap chunk: chunks of 8KiB, only allocated where there are ids
+CHUNK_BITS = 1 << 16
+_SHIFT = CHUNK_BITS.bit_length() - 1
+_MASK = CHUNK_BITS - 1
+
+
+class SortedIds:
+    """Integer ids in a sorted `array('q')` (8 bytes each), checked with a binary search."""
+
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids: Iterable[int]):
+        self._ids = array("q", sorted(set(ids)))
+
+    def __contains__(self, id: Any) -> bool:
+        if not isinstance(id, int):
+            return False
+        i = bisect_left(self._ids, id)
+        return i < len(self._ids) and self._ids[i] == id
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class IdBitmap:
+    """Integer ids as a bit each in `CHUNK_BITS` chunks, for dense ids (e.g. auto-increment keys),
+    checked in constant time."""
+
+    __slots__ = ("_chunks", "_len")
+
+    def __init__(self, ids: Iterable[int]):
+        self._chunks: Dict[int, bytearray] = {}
+        self._len = 0
+        for id in ids:
+            chunk = self._chunks.get(id >> _SHIFT)
+            if chunk is None:
+                chunk = self._chunks[id >> _SHIFT] = bytearray(CHUNK_BITS // 8)
+            byte, bit = (id & _MASK) >> 3, 1 << (id & 7)
+            if not chunk[byte] & bit:
+                chunk[byte] |= bit
+                self._len += 1
+
+    def __contains__(self, id: Any) -> bool:
+        if not isinstance(id, int):
+            return False
+        chunk = self._chunks.get(id >> _SHIFT)
+        return chunk is not None and bool(chunk[(id & _MASK) >> 3] >> (id & 7) & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        for key in sorted(self._chunks):
+            base = key << _SHIFT
+            for i, byte in enumerate(self._chunks[key]):
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        yield base + (i << 3) + bit
+
+    def __len__(self) -> int:
+        return self._len
+
+
+IdSet = Union[SortedIds, IdBitmap, frozenset]
+
+
+def id_set(ids: Iterable[Any]) -> IdSet:
+    """The most compact membership structure for `ids`: an `IdBitmap` for integers dense enough
+    that its chunks take less memory than a `SortedIds`, a `SortedIds` for other 64-bit integers,
+    and a `frozenset` otherwise (e.g. for string or UUID keys)."""
+    ids = list(ids)
+    if not all(type(id) is int for id in ids):
+        return frozenset(ids)
+    chunks = len({id >> _SHIFT for id in ids})
+    if chunks * CHUNK_BITS // 8 <= 8 * len(ids):
+        return IdBitmap(ids)
+    try:
+        return SortedIds(ids)
+    except OverflowError:
+        return frozenset(ids)
+
+
+class MembershipCache:
+    """Authorized id sets cached per `(principal, action)`, for at most `ttl` seconds. Use one
+    cache per resource kind.
+
+    Writes don't invalidate entries: a resource created or shared within `ttl` may be missing, and
+    one deleted or unshared may still be reported, so keep `ttl` as short as the UI tolerates. At
+    most `maxsize` entries are kept, evicting the least recently used.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        maxsize: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._store = LRUStore(maxsize)
+        self._clock = clock
+
+    def get(
+        self, principal: Hashable, action: str, build: Callable[[], Collection[Any]]
+    ) -> Any:
+        """Return the cached id set of `principal` and `action`, or cache and return `build()` if
+        there's none or it's expired. Concurrent misses may each call `build`."""
+        key = (principal, action)
+        now = self._clock()
+        try:
+            expires, ids = self._store.get(key)
+        except KeyError:
+            pass
+        else:
+            if now < expires:
+                self.hits += 1
+                return ids
+        self.misses += 1
+        ids = build()
+        self._store.set(key, (now + self.ttl, ids))
+        return ids
+
+    def clear(self):
+        self._store.clear()
@@ -0,0 +1,185 @@
+from sys import intern
+from typing import TYPE_CHECKING, Any, Iterable, Union
+
+if TYPE_CHECKING:
+    from cerbos_query_core.visitor import Visitor
+
+# Nodes are immutable, so they are safe to share between threads and translations, and their
+# hash can be cached. Slots are written once in `__init__` through `object.__setattr__`.
+_set = object.__setattr__
+
+
+def _freeze(value: Any) -> Any:
+    # A hashable stand-in for a (JSON) value, values themselves are kept as decoded so that
+    # operator functions still see lists. Booleans are tagged, as `True == 1` and
+    # `hash(True) == hash(1)`.
+    if isinstance(value, bool):
+        return (bool, value)
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return frozenset((k, _freeze(v)) for k, v in value.items())
+    return value
+
+
+def _same(a: Any, b: Any) -> bool:
+    # `_freeze(a) == _freeze(b)`, without building the frozen values
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, list):
+        return isinstance(b, list) and len(a) == len(b) and all(map(_same, a, b))
+    if isinstance(a, dict):
+        return (
+            isinstance(b, dict)
+            and a.keys() == b.keys()
+            and all(_same(v, b[k]) for k, v in a.items())
+        )
+    return a == b
+
+
+class _Node:
+    __slots__ = ("_hash",)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} nodes are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} nodes are immutable")
+
+    def _key(self) -> tuple:
+        raise NotImplementedError
+
+    def __hash__(self):
+        h = getattr(self, "_hash", None)
+        if h is None:
+            h = hash((type(self).__name__, self._key()))
+            _set(self, "_hash", h)
+        return h
+
+    def __eq__(self, other):
+        return self is other or (
+            type(other) is type(self) and self._key() == other._key()
+        )
+
+    def __reduce__(self):
+        return type(self), self._args()
+
+    def __repr__(self):
+        return f"{type(self).__name__}{self._args()!r}"
+
+
+class And(_Node):
+    __slots__ = ("children",)
+
+    def __init__(self, children: Iterable["Node"]):
+        _set(self, "children", tuple(children))
+
+    def accept(self, visitor: "Visitor"):
+        return visitor.visit_and(self)
+
+    def _key(self):
+        return self.children
+
+    def _args(self):
+        return (self.children,)
+
+
+class Or(_Node):
+    __slots__ = ("children",)
+
+    def __init__(self, children: Iterable["Node"]):
+        _set(self, "children", tuple(children))
+
+    def accept(self, visitor: "Visitor"):
+        return visitor.visit_or(self)
+
+    def _key(self):
+        return self.children
+
+    def _args(self):
+        return (self.children,)
+
+
+class Not(_Node):
+    __slots__ = ("child",)
+
+    def __init__(self, child: "Node"):
+        _set(self, "child", child)
+
+    def accept(self, visitor: "Visitor"):
+        return visitor.visit_not(self)
+
+    def _key(self):
+        return (self.child,)
+
+    def _args(self):
+        return (self.child,)
+
+
+class Compare(_Node):
+    """A leaf predicate, e.g. `eq(request.resource.attr.aBool, true)`."""
+
+    __slots__ = ("operator", "variable", "value")
+
+    def __init__(self, operator: str, variable: str, value: Any):
+        # Operators and attribute paths repeat across plans, interning shares one copy of each
+        # and makes `attr_map` lookups identity comparisons
+        _set(self, "operator", intern(operator))
+        _set(self, "variable", intern(variable) if variable is not None else None)
+        _set(self, "value", value)
+
+    def accept(self, visitor: "Visitor"):
+        return visitor.visit_compare(self)
+
+    def _key(self):
+        return (self.operator, self.variable, _freeze(self.value))
+
+    def __eq__(self, other):
+        # compare values as decoded, `_freeze` is only needed for hashing
+        return self is other or (
+            type(other) is Compare
+            and self.operator is other.operator
+            and self.variable is other.variable
+            and _same(self.value, other.value)
+        )
+
+    __hash__ = _Node.__hash__
+
+    def _args(self):
+        return (self.operator, self.variable, self.value)
+
+
+class Exists(_Node):
+    """`variable.exists(lambda_variable, body)` over a collection attribute."""
+
+    __slots__ = ("variable", "lambda_variable", "body")
+
+    def __init__(self, variable: str, lambda_variable: str, body: "Node"):
+        _set(self, "variable", intern(variable))
+        _set(self, "lambda_variable", intern(lambda_variable))
+        _set(self, "body", body)
+
+    def accept(self, visitor: "Visitor"):
+        return visitor.visit_exists(self)
+
+    def inline(self) -> Compare:
+        """Rewrite `coll.exists(x, x op value)` as `coll op value`, i.e. a join on the collection."""
+        body = self.body
+        if isinstance(body, Not):
+            # `all` parses to `!exists(x, !cond)`, which no join expresses
+            raise ValueError(
+                "'all' (or 'exists' with a negated body) requires exists_subqueries: it "
+                "can't be inlined as a join."
+            )
+        if not isinstance(body, Compare) or body.variable != self.lambda_variable:
+            raise ValueError("'lambda' expression requires variable names to match.")
+        return Compare(body.operator, self.variable, body.value)
+
+    def _key(self):
+        return (self.variable, self.lambda_variable, self.body)
+
+    def _args(self):
+        return (self.variable, self.lambda_variable, self.body)
+
+
+Node = Union[And, Or, Not, Compare, Exists]
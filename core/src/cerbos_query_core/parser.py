@@ -0,0 +1,280 @@
+import sys
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
+
+from cerbos_query_core.nodes import And, Compare, Exists, Node, Not, Or
+
+if TYPE_CHECKING:
+    from cerbos.response.v1 import response_pb2
+    from cerbos.sdk.model import PlanResourcesResponse
+    from google.protobuf.struct_pb2 import Value
+
+# The HTTP SDK models and protobuf modules are slow to import, and only ever needed to read plans
+# built with them. So they're never imported here: a plan can only be an instance of one of their
+# types if its module is already loaded, and we look it up in `sys.modules` when we first see it.
+_SDK_MODEL = "cerbos.sdk.model"
+_ENGINE_PB2 = "cerbos.engine.v1.engine_pb2"
+_RESPONSE_PB2 = "cerbos.response.v1.response_pb2"
+
+ALWAYS_ALLOWED = "KIND_ALWAYS_ALLOWED"
+ALWAYS_DENIED = "KIND_ALWAYS_DENIED"
+CONDITIONAL = "KIND_CONDITIONAL"
+UNSPECIFIED = "KIND_UNSPECIFIED"
+
+
+class Plan:
+    """A parsed `PlanResources` filter: the kind name, and the condition if it's conditional."""
+
+    __slots__ = ("kind", "condition")
+
+    def __init__(self, kind: str, condition: Optional[Node] = None):
+        self.kind = kind
+        self.condition = condition
+
+    def __repr__(self):
+        return f"Plan({self.kind!r}, {self.condition!r})"
+
+
+# We support both the legacy HTTP and gRPC clients, raw HTTP API responses and already parsed plans
+QueryPlan = Union[
+    "PlanResourcesResponse",
+    "response_pb2.PlanResourcesResponse",  # type: ignore (https://github.com/microsoft/pyright/issues/1035)
+    Plan,
+    bytes,
+    str,
+]
+
+
+def _proto_value(value: "Value") -> Any:
+    # Same result as `MessageToDict(value)`, without the generic message machinery
+    kind = value.WhichOneof("kind")
+    if kind == "struct_value":
+        return {k: _proto_value(v) for k, v in value.struct_value.fields.items()}
+    if kind == "list_value":
+        return [_proto_value(v) for v in value.list_value.values]
+    if kind == "null_value" or kind is None:
+        return None
+    return getattr(value, kind)
+
+
+# `(expression, variable, value)` of an operand, only one of which is set. Expressions are
+# returned as `(operator, operands)`.
+_Read = Tuple[Optional[Tuple[str, List[Any]]], Optional[str], Any]
+
+
+def _read_dict(operand: dict) -> _Read:
+    if (exp := operand.get("expression")) is not None:
+        return (exp["operator"], exp["operands"]), None, None
+    if "variable" in operand:
+        return None, operand["variable"], None
+    return None, None, operand.get("value")
+
+
+def _read_proto(operand: Any) -> _Read:
+    node = operand.WhichOneof("node")
+    if node == "expression":
+        return (operand.expression.operator, operand.expression.operands), None, None
+    if node == "variable":
+        return None, operand.variable, None
+    return None, None, _proto_value(operand.value)
+
+
+def _read_sdk_expression(operand: Any) -> _Read:
+    exp = operand.expression
+    return (exp.operator, exp.operands), None, None
+
+
+def _read_sdk_variable(operand: Any) -> _Read:
+    return None, operand.variable, None
+
+
+def _read_sdk_value(operand: Any) -> _Read:
+    return None, None, operand.value
+
+
+def _reader(cls: type) -> Callable[[Any], _Read]:
+    if issubclass(cls, dict):
+        return _read_dict
+    if (model := sys.modules.get(_SDK_MODEL)) is not None:
+        if issubclass(cls, model.PlanResourcesExpression):
+            return _read_sdk_expression
+        if issubclass(cls, model.PlanResourcesVariable):
+            return _read_sdk_variable
+        if issubclass(cls, model.PlanResourcesValue):
+            return _read_sdk_value
+    if (engine_pb2 := sys.modules.get(_ENGINE_PB2)) is not None:
+        if issubclass(cls, engine_pb2.PlanResourcesFilter.Expression.Operand):
+            return _read_proto
+    raise TypeError
+
+
+# operand type -> reader, filled in as each type is first seen
+_READERS: Dict[type, Callable[[Any], _Read]] = {dict: _read_dict}
+
+
+def _read(operand: Any) -> _Read:
+    cls = type(operand)
+    try:
+        reader = _READERS[cls]
+    except KeyError:
+        try:
+            reader = _READERS[cls] = _reader(cls)
+        except TypeError:
+            raise TypeError(f"Unrecognised plan operand: {operand!r}") from None
+    return reader(operand)
+
+
+def _parse_lambda(operands: List[Any]) -> Exists:
+    # `[{variable: coll}, {expression: lambda(body, {variable: x})}]`, in either order
+    variable, lambda_expression = None, None
+    for o in operands:
+        exp, var, _ = _read(o)
+        if exp is not None:
+            lambda_expression = exp
+        else:
+            variable = var
+
+    operator, lambda_operands = lambda_expression
+    if operator != "lambda":
+        raise NotImplementedError
+    lambda_variable, body = None, None
+    for o in lambda_operands:
+        exp, var, _ = _read(o)
+        if exp is not None:
+            body = _parse_expression(*exp)
+        else:
+            lambda_variable = var
+    return Exists(variable, lambda_variable, body)
+
+
+def _parse_expression(operator: str, operands: List[Any]) -> Node:
+    if operator == "and":
+        return And([parse_condition(o) for o in operands])
+    if operator == "or":
+        return Or([parse_condition(o) for o in operands])
+    if operator == "not":
+        # Several operands are ANDed together before being negated
+        children = [parse_condition(o) for o in operands]
+        return Not(children[0] if len(children) == 1 else And(children))
+    if operator == "exists":
+        return _parse_lambda(operands)
+    if operator == "all":
+        # `coll.all(x, cond)` is `!coll.exists(x, !cond)`
+        exists = _parse_lambda(operands)
+        return Not(Exists(exists.variable, exists.lambda_variable, Not(exists.body)))
+
+    # otherwise, the operands are a variable and a value, in the form:
+    # `[{'variable': 'foo'}, {'value': 'bar'}]`. The order is not guaranteed.
+    variable, value = None, None
+    for o in operands:
+        _, var, val = _read(o)
+        if var is not None:
+            variable = var
+        else:
+            value = val
+    return Compare(operator, variable, value)
+
+
+def parse_condition(operand: Any) -> Node:
+    """Parse a plan condition operand - a dict (JSON/`to_dict()` form), `cerbos.sdk.model`
+    dataclass or protobuf `Operand` - into a node tree."""
+    exp, _, _ = _read(operand)
+    if exp is None:
+        raise ValueError(f"Plan condition is not an expression: {operand!r}")
+    return _parse_expression(*exp)
+
+
+def _filter(response: Any) -> Tuple[str, Any]:
+    # The kind name and, if it's conditional, the condition operand of a decoded response
+    if isinstance(response, dict):
+        f = response.get("filter")
+        if f is None:
+            return UNSPECIFIED, None
+        kind = f.get("kind", UNSPECIFIED)
+        return kind, f["condition"] if kind == CONDITIONAL else None
+
+    f = response.filter
+    response_pb2 = sys.modules.get(_RESPONSE_PB2)
+    if response_pb2 is not None and isinstance(
+        response, response_pb2.PlanResourcesResponse
+    ):
+        if not response.HasField("filter"):
+            return UNSPECIFIED, None
+        kind = sys.modules[_ENGINE_PB2].PlanResourcesFilter.Kind.Name(f.kind)
+    elif f is None:
+        return UNSPECIFIED, None
+    else:
+        # `PlanResourcesFilterKind` is a `str` enum
+        kind = getattr(f.kind, "value", f.kind)
+    return kind, f.condition if kind == CONDITIONAL else None
+
+
+def _from_response(response: Any) -> Plan:
+    kind, condition = _filter(response)
+    if condition is None:
+        return Plan(kind)
+    return Plan(kind, parse_condition(condition))
+
+
+def _loads(data: Union[bytes, str]) -> Any:
+    # Picks the JSON decoder on first use, replacing itself with it
+    global _loads
+    try:
+        from orjson import loads
+    except ImportError:
+        from json import loads
+    _loads = loads
+    return loads(data)
+
+
+def parse_plan_json(data: Union[bytes, str]) -> Plan:
+    """Parse a raw Cerbos HTTP API `PlanResources` response, using `orjson` if installed.
+
+    The condition is built straight from the decoded JSON, without any SDK models.
+    """
+    return _from_response(_loads(data))
+
+
+def parse_plan(query_plan: QueryPlan) -> Plan:
+    if isinstance(query_plan, Plan):
+        return query_plan
+    if isinstance(query_plan, (bytes, str)):
+        return parse_plan_json(query_plan)
+    return _from_response(query_plan)
+
+
+# Raw JSON is only sized by its length, at roughly this many bytes per node
+_JSON_BYTES_PER_NODE = 32
+
+
+def plan_size(query_plan: QueryPlan, limit: int) -> int:
+    """Count the nodes of a plan's condition as `passes.measure` does, without parsing it (e.g. to
+    decide whether parsing is worth a thread hop), stopping once past `limit`. Raw JSON is sized
+    from its length instead."""
+    if isinstance(query_plan, (bytes, str)):
+        return len(query_plan) // _JSON_BYTES_PER_NODE
+    size = 0
+    if isinstance(query_plan, Plan):
+        nodes = [query_plan.condition] if query_plan.condition is not None else []
+        while nodes and size <= limit:
+            node = nodes.pop()
+            if isinstance(node, Compare):
+                size += 3
+            elif isinstance(node, Exists):
+                size += 4
+                nodes.append(node.body)
+            else:
+                size += 1
+                nodes.extend(
+                    node.children if isinstance(node, (And, Or)) else [node.child]
+                )
+        return size
+
+    # every expression, variable and value operand is a node
+    _, condition = _filter(query_plan)
+    operands = [condition] if condition is not None else []
+    while operands and size <= limit:
+        exp, _, _ = _read(operands.pop())
+        size += 1
+        if exp is not None:
+            operands.extend(exp[1])
+    return size
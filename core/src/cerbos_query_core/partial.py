@@ -0,0 +1,102 @@
+import operator
+from numbers import Number
+from typing import Any, Callable, Dict, List, Union
+
+from cerbos_query_core.nodes import And, Compare, Exists, Node, Not, Or
+from cerbos_query_core.parser import (
+    ALWAYS_ALLOWED,
+    ALWAYS_DENIED,
+    CONDITIONAL,
+    Plan,
+    QueryPlan,
+    parse_plan,
+)
+
+# Attribute values known to the caller, e.g. `{"request.resource.attr.tenantId": "acme"}`
+KnownAttributes = Dict[str, Any]
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "gt": operator.gt,
+    "le": operator.le,
+    "ge": operator.ge,
+}
+
+
+def _comparable(a: Any, b: Any) -> bool:
+    # Only fold what compares the same way in Python and SQL: numbers with numbers (but not
+    # booleans), strings with strings, booleans with booleans, and equality with `null`
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool)
+    if isinstance(a, Number) and isinstance(b, Number):
+        return True
+    return isinstance(a, str) and isinstance(b, str)
+
+
+def _evaluate(node: Compare, known: Any) -> Union[Compare, bool]:
+    op, value = node.operator, node.value
+    if value is None and op in ("eq", "ne"):
+        # `IS NULL` / `IS NOT NULL`
+        return (known is None) == (op == "eq")
+    if known is None:
+        # other comparisons with `null` are unknown in SQL, which a negation doesn't flip
+        return node
+    if op == "in":
+        # as translated: `in` with a scalar value is an equality
+        values = value if isinstance(value, list) else [value]
+        if all(_comparable(known, v) for v in values):
+            return known in values
+        return node
+    if op in _COMPARISONS and _comparable(known, value):
+        return _COMPARISONS[op](known, value)
+    # e.g. operator overrides, whose semantics we don't know
+    return node
+
+
+def fold(node: Node, known: KnownAttributes) -> Union[Node, bool]:
+    """Substitute known attribute values into a condition, and simplify it.
+
+    Returns `True` or `False` if the condition no longer depends on the rows. Leaves which can't be
+    evaluated with certainty (unknown operators, values of different types) are kept as they are.
+    """
+    if isinstance(node, (And, Or)):
+        # the value that decides the node on its own, e.g. `false` for `and`
+        absorbing = isinstance(node, Or)
+        children: List[Node] = []
+        for c in node.children:
+            c = fold(c, known)
+            if c is absorbing:
+                return absorbing
+            if c is not (not absorbing):
+                children.append(c)
+        if not children:
+            return not absorbing
+        return children[0] if len(children) == 1 else type(node)(children)
+    if isinstance(node, Not):
+        child = fold(node.child, known)
+        return not child if isinstance(child, bool) else Not(child)
+    if isinstance(node, Exists):
+        # the lambda body refers to the elements of the collection, which aren't known
+        return node
+    if node.variable in known:
+        return _evaluate(node, known[node.variable])
+    return node
+
+
+def partial_evaluate(query_plan: QueryPlan, known: KnownAttributes) -> Plan:
+    """Specialise a plan for known resource attribute values (e.g. the tenant being listed).
+
+    Conditional plans whose condition folds to `true` or `false` become always allowed or always
+    denied, so no filter (or no query at all) is needed.
+    """
+    plan = parse_plan(query_plan)
+    if plan.kind != CONDITIONAL or plan.condition is None:
+        return plan
+    condition = fold(plan.condition, known)
+    if condition is True:
+        return Plan(ALWAYS_ALLOWED)
+    if condition is False:
+        return Plan(ALWAYS_DENIED)
+    return Plan(CONDITIONAL, condition)
@@ -0,0 +1,127 @@
+from math import prod
+from typing import Dict, List, Tuple
+
+from cerbos_query_core.nodes import And, Compare, Exists, Node, Not, Or
+
+# Fraction of rows assumed to match an equality predicate on an attribute we have no hint for.
+DEFAULT_SELECTIVITY = 0.1
+# Classic System R estimate for open ranges (`lt`, `gt`, ...), independent of the attribute.
+RANGE_SELECTIVITY = 1 / 3
+# `exists` lambdas are opaque to us - assume a coin toss.
+EXISTS_SELECTIVITY = 0.5
+
+SelectivityMap = Dict[str, float]
+
+
+def flatten(node: Node) -> Node:
+    """Merge nested `and`/`or` nodes into their parent, and drop double negations."""
+    if isinstance(node, (And, Or)):
+        cls = type(node)
+        children: List[Node] = []
+        for c in node.children:
+            c = flatten(c)
+            if type(c) is cls:
+                children.extend(c.children)
+            else:
+                children.append(c)
+        return cls(children)
+    if isinstance(node, Not):
+        child = flatten(node.child)
+        return child.child if isinstance(child, Not) else Not(child)
+    if isinstance(node, Exists):
+        return Exists(node.variable, node.lambda_variable, flatten(node.body))
+    return node
+
+
+def measure(node: Node, depth: int = 1) -> Tuple[int, int]:
+    """Return the node count and maximum depth of a condition, counted as in the plan itself
+    (a leaf predicate is its operator, variable and value)."""
+    if isinstance(node, Compare):
+        return 3, depth + 1
+    if isinstance(node, Exists):
+        # the `lambda` expression, its variable and the collection variable
+        nodes, max_depth = measure(node.body, depth + 2)
+        return nodes + 4, max_depth
+    children = node.children if isinstance(node, (And, Or)) else [node.child]
+    nodes, max_depth = 1, depth
+    for c in children:
+        n, d = measure(c, depth + 1)
+        nodes += n
+        max_depth = max(max_depth, d)
+    return nodes, max_depth
+
+
+def estimate_selectivity(node: Node, selectivity: SelectivityMap) -> float:
+    """Estimate the fraction of rows matched by a condition.
+
+    `selectivity` maps Cerbos attribute names to the fraction of rows matched by an
+    equality predicate on that attribute (typically `1 / n_distinct`).
+    """
+    if isinstance(node, And):
+        return prod(estimate_selectivity(c, selectivity) for c in node.children)
+    if isinstance(node, Or):
+        return 1 - prod(1 - estimate_selectivity(c, selectivity) for c in node.children)
+    if isinstance(node, Not):
+        return 1 - estimate_selectivity(node.child, selectivity)
+    if isinstance(node, Exists):
+        return EXISTS_SELECTIVITY
+
+    s = selectivity.get(node.variable, DEFAULT_SELECTIVITY)
+    if node.operator == "eq":
+        return s
+    if node.operator == "ne":
+        return 1 - s
+    if node.operator == "in":
+        return min(1.0, s * (len(node.value) if isinstance(node.value, list) else 1))
+    return RANGE_SELECTIVITY
+
+
+def reorder_condition(node: Node, selectivity: SelectivityMap) -> Node:
+    """Return a copy of a condition with nested `and`/`or` nodes flattened and their children
+    reordered so that evaluation can short-circuit as early as possible.
+
+    Conjuncts are ordered most selective first (the first `false` wins), disjuncts least
+    selective first (the first `true` wins). Ties are broken by cost (node count), then by
+    original position, so the pass is deterministic.
+    """
+    node = flatten(node)
+
+    def reorder(node: Node) -> Node:
+        if isinstance(node, Not):
+            return Not(reorder(node.child))
+        if not isinstance(node, (And, Or)):
+            return node
+
+        sign = 1 if isinstance(node, And) else -1
+        children = [reorder(c) for c in node.children]
+        children.sort(
+            key=lambda c: (sign * estimate_selectivity(c, selectivity), measure(c)[0])
+        )
+        return type(node)(children)
+
+    return reorder(node)
+
+
+def conjunctions(node: Node) -> List[List[Tuple[str, str]]]:
+    """Return the groups of `(attribute, operator)` leaf predicates that are ANDed together.
+
+    `or` branches and negated subtrees can't share an index seek with their siblings, so they
+    start new groups. `exists` is reported against its collection attribute.
+    """
+    groups: List[List[Tuple[str, str]]] = []
+
+    def walk(node: Node) -> List[Tuple[str, str]]:
+        if isinstance(node, And):
+            return [leaf for c in node.children for leaf in walk(c)]
+        if isinstance(node, (Or, Not)):
+            for c in node.children if isinstance(node, Or) else [node.child]:
+                if branch := walk(c):
+                    groups.append(branch)
+            return []
+        if isinstance(node, Exists):
+            return [(node.variable, "exists")]
+        return [(node.variable, node.operator)]
+
+    if root := walk(node):
+        groups.append(root)
+    return groups
@@ -0,0 +1,135 @@
+import gzip
+import json
+import math
+import threading
+from dataclasses import dataclass
+from typing import IO, Any, Dict, Iterable, List, Tuple, Union
+
+from cerbos.response.v1 import response_pb2
+from cerbos.sdk.model import PlanResourcesResponse
+from google.protobuf.json_format import MessageToDict, ParseDict
+
+PlanResponse = Union[PlanResourcesResponse, response_pb2.PlanResourcesResponse]  # type: ignore (https://github.com/microsoft/pyright/issues/1035)
+
+# Record types, kept short as they're repeated on every line
+_HTTP = "h"
+_GRPC = "g"
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class PlanRecorder:
+    """Appends `PlanResourcesResponse`s (HTTP or gRPC) to a JSON lines file, gzipped if the
+    path ends in `.gz`.
+
+    ```python
+    with PlanRecorder("plans.jsonl.gz") as recorder:
+        client = recorder.wrap(client)
+        plan = client.plan_resources("view", principal, resource_desc)  # recorded
+    ```
+    """
+
+    def __init__(self, path: str):
+        self._file = _open(path, "a")
+        self._lock = threading.Lock()
+
+    def record(self, query_plan: PlanResponse) -> PlanResponse:
+        if isinstance(query_plan, response_pb2.PlanResourcesResponse):
+            record = {"t": _GRPC, "p": MessageToDict(query_plan)}
+        else:
+            record = {"t": _HTTP, "p": query_plan.to_dict()}
+        line = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+        return query_plan
+
+    def wrap(self, client: Any) -> "_RecordingClient":
+        """Proxy a (HTTP or gRPC) Cerbos client, recording the result of every `plan_resources` call."""
+        return _RecordingClient(client, self)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "PlanRecorder":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class _RecordingClient:
+    def __init__(self, client: Any, recorder: PlanRecorder):
+        self._client = client
+        self._recorder = recorder
+
+    def plan_resources(self, *args, **kwargs):
+        return self._recorder.record(self._client.plan_resources(*args, **kwargs))
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+
+def load_plans(path: str) -> List[PlanResponse]:
+    """Load plans written by `PlanRecorder`, as the client type they were recorded from."""
+    plans: List[PlanResponse] = []
+    with _open(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record["t"] == _GRPC:
+                plans.append(
+                    ParseDict(record["p"], response_pb2.PlanResourcesResponse())
+                )
+            else:
+                plans.append(PlanResourcesResponse.from_dict(record["p"]))
+    return plans
+
+
+@dataclass
+class ReplayReport:
+    requests: int
+    rows: int
+    # wall clock time of the whole run, in seconds
+    duration: float
+    # per request (translation + execution) latencies in seconds, sorted ascending
+    latencies: List[float]
+
+    @classmethod
+    def from_results(
+        cls, results: Iterable[Tuple[float, int]], duration: float
+    ) -> "ReplayReport":
+        """Build a report from the `(latency, rows)` of each request."""
+        results = list(results)
+        return cls(
+            requests=len(results),
+            rows=sum(rows for _, rows in results),
+            duration=duration,
+            latencies=sorted(latency for latency, _ in results),
+        )
+
+    @property
+    def throughput(self) -> float:
+        """Requests per second."""
+        return self.requests / self.duration if self.duration else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile of the request latencies, `p` in [0, 100]."""
+        if not self.latencies:
+            return 0.0
+        rank = max(math.ceil(p / 100 * len(self.latencies)), 1)
+        return self.latencies[rank - 1]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "throughput": self.throughput,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.percentile(100),
+        }
@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Tuple
+
+# Versioned keys: the caller's key and the generation of each table the results depend on
+ResultKey = Tuple[Hashable, Tuple[Tuple[str, int], ...]]
+
+
+class LRUStore:
+    """A thread safe, in-process mapping of at most `maxsize` entries, evicting the least recently
+    used. Any object with the same `get` (raising `KeyError` on a miss), `set` and `clear` methods
+    can stand in for it as a `ResultCache` store."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            value = self._entries[key]
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResultCache:
+    """Query results, invalidated by writes to the tables they were read from.
+
+    Each table has a generation, which `invalidate` bumps. Keys made with `key` include the
+    generations of their tables, so results cached before a write are never returned after it
+    (and age out of the store). Make the key before running the query: results of a query which
+    raced with a write are stored under the generation it started with.
+    """
+
+    def __init__(self, store: Any = None):
+        self.store = LRUStore() if store is None else store
+        self.hits = 0
+        self.misses = 0
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def key(self, key: Hashable, tables: Iterable[str]) -> ResultKey:
+        generations = self._generations
+        return key, tuple((t, generations.get(t, 0)) for t in sorted(set(tables)))
+
+    def get(self, key: ResultKey) -> Any:
+        try:
+            value = self.store.get(key)
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        return value
+
+    def set(self, key: ResultKey, value: Any):
+        self.store.set(key, value)
+
+    def invalidate(self, *tables: str):
+        with self._lock:
+            for t in tables:
+                self._generations[t] = self._generations.get(t, 0) + 1
+
+    def clear(self):
+        self.store.clear()
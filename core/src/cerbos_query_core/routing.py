@@ -0,0 +1,79 @@
+from typing import Any, Callable, FrozenSet, Hashable, Iterable, List, Optional, TypeVar
+
+from cerbos_query_core.nodes import And, Exists, Node, Not, Or
+from cerbos_query_core.parser import ALWAYS_ALLOWED, QueryPlan, parse_plan
+
+T = TypeVar("T")
+
+# The values of an attribute a condition can match, `None` if there's no finite set of them
+ValueSet = Optional[FrozenSet[Hashable]]
+
+
+def _values(value: Any) -> ValueSet:
+    values = value if isinstance(value, list) else [value]
+    try:
+        return frozenset(values)
+    except TypeError:
+        # e.g. maps
+        return None
+
+
+def _intersection(sets: Iterable[ValueSet]) -> ValueSet:
+    result: ValueSet = None
+    for s in sets:
+        if s is not None:
+            result = s if result is None else result & s
+    return result
+
+
+def _union(sets: Iterable[ValueSet]) -> ValueSet:
+    result: FrozenSet[Hashable] = frozenset()
+    for s in sets:
+        if s is None:
+            return None
+        result |= s
+    return result
+
+
+def key_values(node: Node, attribute: str, negated: bool = False) -> ValueSet:
+    """Return the values of `attribute` that rows matched by a condition can have, or `None` if
+    they aren't limited to a finite set. Negations are pushed down to the leaves."""
+    if isinstance(node, Not):
+        return key_values(node.child, attribute, not negated)
+    if isinstance(node, (And, Or)):
+        sets = (key_values(c, attribute, negated) for c in node.children)
+        # De Morgan: a negated `and` is an `or` of negations
+        return _intersection(sets) if isinstance(node, And) != negated else _union(sets)
+    if isinstance(node, Exists) or node.variable != attribute:
+        return None
+    if (node.operator, negated) in (("eq", False), ("in", False), ("ne", True)):
+        return _values(node.value)
+    return None
+
+
+def shard_key_values(query_plan: QueryPlan, attribute: str) -> ValueSet:
+    """Return the values of the shard key `attribute` the rows a plan allows can have, or `None`
+    if they're unbounded. Always denied plans allow no values."""
+    plan = parse_plan(query_plan)
+    if plan.kind == ALWAYS_ALLOWED:
+        return None
+    if plan.condition is None:
+        return frozenset()
+    return key_values(plan.condition, attribute)
+
+
+def select_shards(
+    query_plan: QueryPlan,
+    attribute: str,
+    shard_for: Callable[[Any], T],
+    shards: Iterable[T],
+) -> List[T]:
+    """Return the shards (e.g. database aliases or engines) holding rows a plan can match, in the
+    order of `shards`, where `shard_for` maps a value of the shard key `attribute` to its shard.
+    """
+    shards = list(shards)
+    values = shard_key_values(query_plan, attribute)
+    if values is None:
+        return shards
+    selected = [shard_for(v) for v in values]
+    return [s for s in shards if s in selected]
@@ -0,0 +1,56 @@
+from typing import Any, Optional
+
+
+def pg_selectivity(
+    cursor: Any, table_name: str, column_name: str, schema: Optional[str] = None
+) -> Optional[float]:
+    """Return the equality selectivity of a column from `pg_stats`, or None without statistics.
+
+    `cursor` is a DB-API cursor using the `format` paramstyle (psycopg, Django). The table is
+    looked up in `schema`, defaulting to the connection's `current_schema()`.
+    """
+    cursor.execute(
+        "SELECT s.n_distinct, c.reltuples FROM pg_stats s "
+        "JOIN pg_namespace n ON n.nspname = s.schemaname "
+        "JOIN pg_class c ON c.relnamespace = n.oid AND c.relname = s.tablename "
+        "WHERE s.schemaname = COALESCE(%s, current_schema()) "
+        "AND s.tablename = %s AND s.attname = %s",
+        [schema, table_name, column_name],
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    n_distinct, reltuples = row
+    # Negative values are a fraction of the row count
+    if n_distinct < 0:
+        n_distinct = -n_distinct * reltuples
+    return 1 / n_distinct if n_distinct > 0 else None
+
+
+def sqlite_selectivity(
+    cursor: Any, table_name: str, column_name: str
+) -> Optional[float]:
+    """Return the equality selectivity of a column from `sqlite_stat1`, or None without statistics.
+
+    `cursor` is a DB-API cursor using the `qmark` paramstyle. Only indexes led by the column are
+    considered, as SQLite only records statistics for index prefixes.
+    """
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+    )
+    if cursor.fetchone() is None:
+        return None
+
+    cursor.execute(
+        "SELECT idx, stat FROM sqlite_stat1 WHERE tbl = ? AND idx IS NOT NULL",
+        [table_name],
+    )
+    for idx, stat in cursor.fetchall():
+        cursor.execute(f'PRAGMA index_info("{idx}")')
+        leading = cursor.fetchone()
+        if leading is None or leading[2] != column_name:
+            continue
+        # `stat` is "<rows> <avg rows per distinct value of 1st column> ..."
+        total, per_value = (int(n) for n in stat.split()[:2])
+        return per_value / total if total else None
+    return None
@@ -0,0 +1,71 @@
+from typing import Any, Callable, Generic, Mapping, Optional, TypeVar
+
+from cerbos_query_core.nodes import And, Compare, Exists, Node, Not, Or
+
+T = TypeVar("T")
+
+
+class Visitor(Generic[T]):
+    """Base class for plan condition visitors, dispatched via `node.accept(visitor)`.
+
+    `exists` defaults to its inlined form (`coll.exists(x, x op v)` -> `coll op v`), so emitters
+    only need to handle it if they can do better than a join on the collection.
+    """
+
+    def visit(self, node: Node) -> T:
+        return node.accept(self)
+
+    def visit_and(self, node: And) -> T:
+        raise NotImplementedError
+
+    def visit_or(self, node: Or) -> T:
+        raise NotImplementedError
+
+    def visit_not(self, node: Not) -> T:
+        raise NotImplementedError
+
+    def visit_compare(self, node: Compare) -> T:
+        raise NotImplementedError
+
+    def visit_exists(self, node: Exists) -> T:
+        return node.inline().accept(self)
+
+
+class Emitter(Visitor[T]):
+    """A visitor which maps leaf predicates through an attribute map and an operator table.
+
+    `operator_fns` is the backend's (immutable) default table; `operator_override_fns` take
+    precedence for a single translation.
+    """
+
+    def __init__(
+        self,
+        attr_map: Mapping[str, Any],
+        operator_fns: Mapping[str, Callable[[Any, Any], T]],
+        operator_override_fns: Optional[Mapping[str, Callable[[Any, Any], T]]] = None,
+    ):
+        self.attr_map = attr_map
+        self.operator_fns = operator_fns
+        self.operator_override_fns = operator_override_fns
+
+    def attribute(self, variable: str) -> Any:
+        try:
+            return self.attr_map[variable]
+        except KeyError:
+            raise KeyError(
+                f"Attribute does not exist in the attribute column map: {variable}"
+            )
+
+    def operator_fn(self, operator: str) -> Callable[[Any, Any], T]:
+        # Check to see if the client has overridden the function
+        if (
+            self.operator_override_fns
+            and (override_fn := self.operator_override_fns.get(operator)) is not None
+        ):
+            return override_fn
+
+        # Otherwise, fall back to default handlers
+        if (default_fn := self.operator_fns.get(operator)) is not None:
+            return default_fn
+
+        raise ValueError(f"Unrecognised operator: {operator}")
@@ -0,0 +1,53 @@
+import sys
+import time
+from typing import Any, Iterable, Iterator, NamedTuple, Tuple, Union
+
+from cerbos_query_core.parser import _ENGINE_PB2, QueryPlan
+
+
+class PlanRequest(NamedTuple):
+    """A plan to fetch from Cerbos: a resource kind, an action and a representative principal
+    (`cerbos.sdk.model.Principal` for the HTTP client, `engine_pb2.Principal` for gRPC).
+    """
+
+    resource_kind: str
+    action: str
+    principal: Any
+
+
+def fetch_plans(
+    items: Iterable[Union[PlanRequest, QueryPlan]], client: Any = None
+) -> Iterator[Tuple[QueryPlan, float]]:
+    """Yield each plan with the seconds spent fetching it: `PlanRequest`s are planned with
+    `client` (HTTP or gRPC), anything else is taken to be a plan already."""
+    for item in items:
+        if not isinstance(item, PlanRequest):
+            yield item, 0.0
+            continue
+        resource = _resource(item, client)
+        start = time.perf_counter()
+        query_plan = client.plan_resources(item.action, item.principal, resource)
+        yield query_plan, time.perf_counter() - start
+
+
+async def afetch_plan(
+    item: Union[PlanRequest, QueryPlan], client: Any = None
+) -> QueryPlan:
+    """Plan a `PlanRequest` with an async HTTP or gRPC `client`, or return any other item as the
+    plan it's taken to be."""
+    if not isinstance(item, PlanRequest):
+        return item
+    resource = _resource(item, client)
+    return await client.plan_resources(item.action, item.principal, resource)
+
+
+def _resource(item: PlanRequest, client: Any) -> Any:
+    if client is None:
+        raise TypeError("a Cerbos 'client' is required to fetch plans for PlanRequests")
+    # a gRPC principal means the protobuf modules are loaded already
+    engine_pb2 = sys.modules.get(_ENGINE_PB2)
+    if engine_pb2 is not None and isinstance(item.principal, engine_pb2.Principal):
+        return engine_pb2.PlanResourcesInput.Resource(kind=item.resource_kind)
+    from cerbos.sdk.model import ResourceDesc
+
+    return ResourceDesc(item.resource_kind)
@@ -0,0 +1,32 @@
+from cerbos_query_core import Compare
+
+# Plan builders shared by the tests, e.g. `conditional(expr("or", leaf("eq", "aBool", True), ...))`
+
+
+def response(filter: dict) -> dict:
+    return {
+        "requestId": "1",
+        "action": "action",
+        "resourceKind": "resource",
+        "policyVersion": "default",
+        "filter": filter,
+    }
+
+
+def expr(operator: str, *operands: dict) -> dict:
+    return {"expression": {"operator": operator, "operands": list(operands)}}
+
+
+def leaf(operator: str, attr: str, value) -> dict:
+    return expr(
+        operator, {"variable": f"request.resource.attr.{attr}"}, {"value": value}
+    )
+
+
+def conditional(condition: dict) -> dict:
+    return response({"kind": "KIND_CONDITIONAL", "condition": condition})
+
+
+def compare(operator: str, attr: str, value) -> Compare:
+    """The parsed node of `leaf(operator, attr, value)`."""
+    return Compare(operator, f"request.resource.attr.{attr}", value)
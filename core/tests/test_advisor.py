@@ -0,0 +1,70 @@
+from helpers import compare
+
+from cerbos_query_core import ALWAYS_ALLOWED, CONDITIONAL, And, Or, Plan
+from cerbos_query_core.advisor import (
+    ColumnCombination,
+    ColumnUsage,
+    build_index_report,
+    get_conjunctions,
+)
+
+
+def _usage(
+    column: str, *operators: str, occurrences=1, attribute="attr"
+) -> ColumnUsage:
+    return ColumnUsage(
+        "resource", column, attribute, set(operators), occurrences=occurrences
+    )
+
+
+class TestGetConjunctions:
+    def test_groups(self):
+        plan = Plan(
+            CONDITIONAL,
+            Or(
+                [
+                    And([compare("eq", "aString", "s"), compare("lt", "aNumber", 5)]),
+                    compare("eq", "name", "resource1"),
+                ]
+            ),
+        )
+        assert get_conjunctions(plan) == [
+            [
+                ("request.resource.attr.aString", "eq"),
+                ("request.resource.attr.aNumber", "lt"),
+            ],
+            [("request.resource.attr.name", "eq")],
+        ]
+        assert get_conjunctions(Plan(ALWAYS_ALLOWED)) == []
+
+
+class TestBuildIndexReport:
+    def test_suggestions(self):
+        usages = {
+            ("resource", "aNumber"): _usage("aNumber", "gt", "lt", occurrences=2),
+            ("resource", "aString"): _usage("aString", "eq", occurrences=2),
+            ("resource", "name"): _usage("name", "eq"),
+            ("resource", "ownedBy"): _usage("ownedBy", "join", attribute=None),
+            ("resource", "id"): _usage("id", "eq"),
+        }
+        combinations = {
+            ("resource", ("aNumber", "aString")): ColumnCombination(
+                "resource", ("aNumber", "aString"), occurrences=2
+            )
+        }
+        alone = {("resource", "name"), ("resource", "ownedBy"), ("resource", "id")}
+        report = build_index_report(
+            usages, combinations, alone, {"resource": [("id",)]}, join_reason="join"
+        )
+
+        assert usages[("resource", "id")].indexed
+        assert not combinations[("resource", ("aNumber", "aString"))].indexed
+        assert [(s.columns, s.reason) for s in report.suggestions] == [
+            # equality columns lead
+            (
+                ("aString", "aNumber"),
+                "columns are filtered together in 2 conjunction(s)",
+            ),
+            (("name",), "column is filtered with eq"),
+            (("ownedBy",), "join"),
+        ]
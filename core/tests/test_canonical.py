@@ -0,0 +1,117 @@
+import json
+import os
+import subprocess
+import sys
+
+from cerbos.response.v1 import response_pb2
+from google.protobuf.json_format import ParseDict
+from helpers import conditional, expr, leaf, response
+
+from cerbos_query_core import (
+    And,
+    Compare,
+    Exists,
+    Not,
+    Or,
+    PlanCardinality,
+    canonical_form,
+    canonicalize,
+    plan_hash,
+)
+
+_PLAN = conditional(
+    expr(
+        "and",
+        leaf("eq", "aNumber", 1),
+        expr("or", leaf("eq", "aBool", True), leaf("eq", "aString", "s")),
+    )
+)
+_REORDERED = conditional(
+    expr(
+        "and",
+        expr("or", leaf("eq", "aString", "s"), leaf("eq", "aBool", True)),
+        expr("and", leaf("eq", "aNumber", 1), leaf("eq", "aNumber", 1)),
+    )
+)
+
+
+class TestCanonical:
+    def test_order_and_duplicates(self):
+        assert canonical_form(_PLAN) == canonical_form(_REORDERED)
+        assert plan_hash(_PLAN) == plan_hash(_REORDERED)
+        assert canonical_form(_PLAN) == (
+            '["and",[["eq","request.resource.attr.aNumber",1],'
+            '["or",[["eq","request.resource.attr.aBool",true],'
+            '["eq","request.resource.attr.aString","s"]]]]]'
+        )
+
+    def test_grpc_and_json_plans(self):
+        # gRPC plans carry numbers as floats
+        grpc = ParseDict(_PLAN, response_pb2.PlanResourcesResponse())
+        assert plan_hash(grpc) == plan_hash(json.dumps(_PLAN))
+
+    def test_values(self):
+        assert plan_hash(conditional(leaf("eq", "a", 1))) != plan_hash(
+            conditional(leaf("eq", "a", True))
+        )
+        assert plan_hash(conditional(leaf("eq", "a", 1))) != plan_hash(
+            conditional(leaf("eq", "a", "1"))
+        )
+        assert plan_hash(conditional(leaf("eq", "a", 1.5))) != plan_hash(
+            conditional(leaf("eq", "a", 1))
+        )
+        # only `in` values are a set
+        assert canonicalize(Compare("in", "a", [2, 1, 2.0])) == Compare(
+            "in", "a", [1, 2]
+        )
+        assert canonicalize(Compare("in", "a", 1)) == Compare("in", "a", [1])
+        assert canonicalize(Compare("eq", "a", [2, 1])) == Compare("eq", "a", [2, 1])
+
+    def test_constant_plans(self):
+        allowed = response({"kind": "KIND_ALWAYS_ALLOWED"})
+        denied = response({"kind": "KIND_ALWAYS_DENIED"})
+        assert canonical_form(allowed) == '"KIND_ALWAYS_ALLOWED"'
+        assert plan_hash(allowed) != plan_hash(denied)
+
+    def test_nodes(self):
+        node = Not(Not(Or([Compare("eq", "b", 1), And([Compare("eq", "a", 1)])])))
+        assert canonicalize(node) == Or([Compare("eq", "a", 1), Compare("eq", "b", 1)])
+        assert canonical_form(node) == canonical_form(canonicalize(node))
+
+    def test_lambda_variables(self):
+        a = Exists("tags", "t", Compare("eq", "t.name", "public"))
+        b = Exists("tags", "x", Compare("eq", "x.name", "public"))
+        assert canonicalize(a) == canonicalize(b)
+        assert canonicalize(a).body.variable == "$0.name"
+        assert plan_hash(a) != plan_hash(
+            Exists("tags", "t", Compare("eq", "t.id", "public"))
+        )
+
+    def test_stable_across_processes(self):
+        # `hash()` of strings is salted per process, the plan hash must not be
+        code = (
+            "import json, sys; from cerbos_query_core import plan_hash; "
+            "print(plan_hash(json.loads(sys.argv[1])))"
+        )
+        keys = {
+            subprocess.run(
+                [sys.executable, "-c", code, json.dumps(plan)],
+                env={**os.environ, "PYTHONHASHSEED": seed},
+                capture_output=True,
+                check=True,
+                text=True,
+            ).stdout.strip()
+            for plan, seed in ((_PLAN, "1"), (_REORDERED, "2"))
+        }
+        assert keys == {plan_hash(_PLAN)}
+
+
+class TestPlanCardinality:
+    def test_observe(self):
+        cardinality = PlanCardinality()
+        for plan in (_PLAN, _REORDERED, _PLAN, conditional(leaf("eq", "a", 1))):
+            cardinality.observe(plan)
+        assert (cardinality.total, cardinality.distinct) == (4, 2)
+        assert cardinality.hit_ratio == 0.5
+        assert cardinality.most_common(1) == [(plan_hash(_PLAN), 3)]
+        assert PlanCardinality().hit_ratio == 0.0
@@ -0,0 +1,59 @@
+from cerbos_query_core.explain import analyse_postgres_plan, analyse_sqlite_plan
+
+
+class TestAnalyseSqlitePlan:
+    def test_unindexed_join(self):
+        rows = [
+            (2, 0, 0, "SCAN TABLE doc"),
+            (4, 0, 0, "SEARCH team USING AUTOMATIC COVERING INDEX (code=?)"),
+        ]
+        assert analyse_sqlite_plan(rows) == (["doc"], ["team"])
+
+
+class TestAnalysePostgresPlan:
+    def test_seq_scan_and_nested_loop(self):
+        document = [
+            {
+                "Plan": {
+                    "Node Type": "Nested Loop",
+                    "Plans": [
+                        {"Node Type": "Seq Scan", "Relation Name": "resource"},
+                        {
+                            "Node Type": "Index Scan",
+                            "Relation Name": "user",
+                            "Index Name": "user_pkey",
+                        },
+                    ],
+                }
+            }
+        ]
+        full_scans, nested_loops = analyse_postgres_plan(document)
+        assert full_scans == ["resource"]
+        # the inner loop uses an index
+        assert nested_loops == []
+
+    def test_nested_loop_inner_seq_scan(self):
+        document = [
+            {
+                "Plan": {
+                    "Node Type": "Nested Loop",
+                    "Plans": [
+                        {"Node Type": "Index Scan", "Relation Name": "resource"},
+                        {
+                            "Node Type": "Materialize",
+                            "Plans": [
+                                {"Node Type": "Seq Scan", "Relation Name": "user"}
+                            ],
+                        },
+                    ],
+                }
+            }
+        ]
+        assert analyse_postgres_plan(document) == (["user"], ["user"])
+
+    def test_hash_join(self):
+        document = """[{"Plan": {"Node Type": "Hash Join", "Plans": [
+            {"Node Type": "Index Scan", "Relation Name": "resource"},
+            {"Node Type": "Hash", "Plans": [{"Node Type": "Seq Scan", "Relation Name": "user"}]}
+        ]}}]"""
+        assert analyse_postgres_plan(document) == (["user"], [])
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+
+import pytest
+
+from cerbos_query_core.fanout import (
+    ShardResult,
+    merge_rows,
+    run_on_shards,
+    run_on_shards_async,
+)
+
+_SHARDS = {"a": [1, 4, None], "b": [2, 3], "c": []}
+
+
+def _result(shard: str) -> ShardResult:
+    return ShardResult(shard, _SHARDS[shard], 0.0)
+
+
+class TestRunOnShards:
+    def test_threads(self):
+        # every shard waits for the others, so they must run at once
+        barrier = threading.Barrier(3, timeout=5)
+
+        def run(shard: str) -> list:
+            barrier.wait()
+            return _SHARDS[shard]
+
+        results = run_on_shards(run, list(_SHARDS))
+        assert [(r.shard, r.rows) for r in results] == list(_SHARDS.items())
+        assert all(r.duration >= 0 for r in results)
+
+    def test_error(self):
+        def run(shard: str) -> list:
+            if shard == "b":
+                raise ConnectionError(shard)
+            return _SHARDS[shard]
+
+        with pytest.raises(ConnectionError):
+            run_on_shards(run, list(_SHARDS))
+
+    def test_async(self):
+        async def run(shard: str) -> list:
+            await asyncio.sleep(0)
+            return _SHARDS[shard]
+
+        results = asyncio.run(run_on_shards_async(run, list(_SHARDS)))
+        assert [(r.shard, r.rows) for r in results] == list(_SHARDS.items())
+
+
+class TestMergeRows:
+    def test_sorted(self):
+        results = [_result(s) for s in _SHARDS]
+        ascending = [(lambda row: row, False)]
+        # nulls last
+        assert merge_rows(results, ascending) == [1, 2, 3, 4, None]
+        assert merge_rows(results, ascending, limit=2) == [1, 2]
+
+        descending = [
+            ShardResult(s, list(reversed(r.rows)), 0.0)
+            for s, r in zip(_SHARDS, results)
+        ]
+        assert merge_rows(descending, [(lambda row: row, True)]) == [None, 4, 3, 2, 1]
+
+    def test_concatenated(self):
+        results = [_result(s) for s in _SHARDS]
+        assert merge_rows(results) == [1, 4, None, 2, 3]
+        assert merge_rows(results, limit=4) == [1, 4, None, 2]
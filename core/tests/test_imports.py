@@ -0,0 +1,48 @@
+from cerbos_query_core.importtime import import_times
+
+# Modules which only plans built with the HTTP or gRPC clients need
+_CLIENT_MODULES = (
+    "google.protobuf",
+    "cerbos.engine.v1.engine_pb2",
+    "cerbos.response.v1.response_pb2",
+    "cerbos.sdk.model",
+    "dataclasses_json",
+)
+
+
+class TestImports:
+    def test_client_modules_not_imported(self):
+        times = import_times("import cerbos_query_core")
+        assert "cerbos_query_core" in times
+        imported = [m for m in _CLIENT_MODULES if m in times]
+        took = times["cerbos_query_core"]
+        assert imported == [], f"cerbos_query_core ({took}us) imports {imported}"
+
+    def test_client_plans(self):
+        code = """
+from cerbos_query_core import parse_plan
+from cerbos.response.v1 import response_pb2
+from cerbos.sdk.model import PlanResourcesResponse
+from google.protobuf.json_format import ParseDict
+
+response = {
+    "requestId": "1",
+    "action": "action",
+    "resourceKind": "resource",
+    "policyVersion": "default",
+    "filter": {
+        "kind": "KIND_CONDITIONAL",
+        "condition": {
+            "expression": {
+                "operator": "eq",
+                "operands": [{"variable": "request.resource.attr.a"}, {"value": 1}],
+            }
+        },
+    },
+}
+http = parse_plan(PlanResourcesResponse.from_dict(response))
+grpc = parse_plan(ParseDict(response, response_pb2.PlanResourcesResponse()))
+assert http.kind == grpc.kind == "KIND_CONDITIONAL", (http, grpc)
+assert http.condition.variable == grpc.condition.variable, (http, grpc)
+"""
+        import_times(code)
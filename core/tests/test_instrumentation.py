@@ -0,0 +1,55 @@
+from cerbos_query_core.instrumentation import TranslationMetrics, span_hook
+
+
+class _Span:
+    def __init__(self, name, start_time, attributes):
+        self.name = name
+        self.start_time = start_time
+        self.attributes = attributes
+        self.end_time = None
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+
+class _Tracer:
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, start_time=None, attributes=None):
+        span = _Span(name, start_time, attributes)
+        self.spans.append(span)
+        return span
+
+
+class TestSpanHook:
+    def test_span_hook(self):
+        tracer = _Tracer()
+        hook = span_hook(tracer)
+        hook(
+            TranslationMetrics(
+                "KIND_CONDITIONAL",
+                start_time_ns=1_000,
+                conversion_time=1e-6,
+                traversal_time=2e-6,
+                node_count=3,
+            )
+        )
+        (span,) = tracer.spans
+        assert span.name == "cerbos.get_query"
+        assert (span.start_time, span.end_time) == (1_000, 4_000)
+        assert span.attributes["cerbos.filter_kind"] == "KIND_CONDITIONAL"
+        assert span.attributes["cerbos.node_count"] == 3
+        assert "cerbos.start_time_ns" not in span.attributes
+
+    def test_attributes(self):
+        metrics = TranslationMetrics("KIND_ALWAYS_ALLOWED", start_time_ns=0)
+        assert metrics.as_attributes("q.") == {
+            "q.filter_kind": "KIND_ALWAYS_ALLOWED",
+            "q.conversion_time": 0.0,
+            "q.traversal_time": 0.0,
+            "q.node_count": 0,
+            "q.max_depth": 0,
+            "q.joins": 0,
+            "q.subqueries": 0,
+        }
@@ -0,0 +1,64 @@
+import pytest
+
+from cerbos_query_core.membership import (
+    CHUNK_BITS,
+    IdBitmap,
+    MembershipCache,
+    SortedIds,
+    id_set,
+)
+
+
+class TestIdSets:
+    @pytest.mark.parametrize("cls", [SortedIds, IdBitmap])
+    def test_membership(self, cls):
+        ids = cls([5, 1, 3, 3, CHUNK_BITS + 2, -4])
+        assert all(i in ids for i in (1, 3, 5, CHUNK_BITS + 2, -4))
+        assert not any(i in ids for i in (2, -3, CHUNK_BITS + 1, "1", None))
+        assert len(ids) == 5
+        assert list(ids) == [-4, 1, 3, 5, CHUNK_BITS + 2]
+
+    def test_dense_ids(self):
+        assert isinstance(id_set(range(10_000)), IdBitmap)
+
+    def test_sparse_ids(self):
+        ids = id_set(i * CHUNK_BITS for i in range(100))
+        assert isinstance(ids, SortedIds)
+        assert CHUNK_BITS * 99 in ids
+
+    def test_other_ids(self):
+        assert id_set(["a", "b"]) == frozenset({"a", "b"})
+        assert id_set([1 << 70, 1]) == frozenset({1 << 70, 1})
+
+    def test_empty(self):
+        ids = id_set([])
+        assert len(ids) == 0
+        assert 1 not in ids
+
+
+class TestMembershipCache:
+    def test_ttl(self):
+        now = [0.0]
+        cache = MembershipCache(ttl=10, clock=lambda: now[0])
+        builds = []
+
+        def build():
+            builds.append(now[0])
+            return id_set([len(builds)])
+
+        assert 1 in cache.get("alice", "view", build)
+        now[0] = 5
+        assert 1 in cache.get("alice", "view", build)
+        assert 2 in cache.get("bob", "view", build)
+        assert 3 in cache.get("alice", "edit", build)
+        now[0] = 10
+        assert 4 in cache.get("alice", "view", build)
+
+        assert builds == [0, 5, 5, 10]
+        assert (cache.hits, cache.misses) == (1, 4)
+
+    def test_maxsize(self):
+        cache = MembershipCache(maxsize=1)
+        cache.get("alice", "view", lambda: id_set([1]))
+        cache.get("bob", "view", lambda: id_set([2]))
+        assert 3 in cache.get("alice", "view", lambda: id_set([3]))
@@ -0,0 +1,67 @@
+import pickle
+
+import pytest
+
+from cerbos_query_core import And, Compare, Exists, Not, Or, parse_plan_json
+
+
+def _leaf(value) -> Compare:
+    return Compare("in", "request.resource.attr.tags", value)
+
+
+class TestNodes:
+    def test_immutable(self):
+        node = And([_leaf(["a"])])
+        assert isinstance(node.children, tuple)
+        with pytest.raises(AttributeError):
+            node.children = ()
+        with pytest.raises(AttributeError):
+            node.children[0].value = ["b"]
+        with pytest.raises(AttributeError):
+            del node.children
+
+    def test_no_instance_dict(self):
+        for node in (
+            And([]),
+            Or([]),
+            Not(_leaf(1)),
+            _leaf(1),
+            Exists("coll", "x", _leaf(1)),
+        ):
+            assert not hasattr(node, "__dict__")
+
+    def test_hash_and_equality(self):
+        a = Or([_leaf(["a", {"b": [1]}]), Not(Exists("coll", "x", _leaf(1)))])
+        b = Or([_leaf(["a", {"b": [1]}]), Not(Exists("coll", "x", _leaf(1)))])
+        assert a == b and hash(a) == hash(b)
+        assert {a: 1}[b] == 1
+
+        assert And(a.children) != a
+        assert _leaf(["a"]) != _leaf(["b"])
+        assert _leaf(["a"]) != Compare("eq", "request.resource.attr.tags", ["a"])
+
+    def test_booleans_distinct_from_numbers(self):
+        # `True == 1` and `hash(True) == hash(1)` in Python, but not in plans
+        for true, one in ((True, 1), ([True], [1]), ({"b": True}, {"b": 1.0})):
+            assert _leaf(true) != _leaf(one)
+            assert hash(_leaf(true)) != hash(_leaf(one))
+            assert {_leaf(true): "true"}.get(_leaf(one)) is None
+        assert _leaf(1) == _leaf(1.0) and hash(_leaf(1)) == hash(_leaf(1.0))
+
+    def test_values_kept_as_decoded(self):
+        # operator functions rely on `in` values being lists
+        assert _leaf(["a", "b"]).value == ["a", "b"]
+
+    def test_interned_variables(self):
+        data = (
+            '{"filter": {"kind": "KIND_CONDITIONAL", "condition": {"expression": '
+            '{"operator": "eq", "operands": [{"variable": "request.resource.attr.owner"}, '
+            '{"value": "1"}]}}}}'
+        )
+        a, b = parse_plan_json(data).condition, parse_plan_json(data.encode()).condition
+        assert a.variable is b.variable
+        assert a.operator is b.operator
+
+    def test_pickle(self):
+        node = And([_leaf(["a"]), Not(Exists("coll", "x", _leaf(1)))])
+        assert pickle.loads(pickle.dumps(node)) == node
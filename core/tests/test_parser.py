@@ -0,0 +1,231 @@
+import json
+
+import pytest
+from cerbos.response.v1 import response_pb2
+from cerbos.sdk.model import PlanResourcesFilterKind, PlanResourcesResponse
+from google.protobuf.json_format import MessageToDict, ParseDict
+from helpers import response
+
+from cerbos_query_core import (
+    ALWAYS_ALLOWED,
+    ALWAYS_DENIED,
+    CONDITIONAL,
+    UNSPECIFIED,
+    And,
+    Compare,
+    Exists,
+    Not,
+    Or,
+    Plan,
+    parse_condition,
+    parse_plan,
+    parse_plan_json,
+    parser,
+    plan_size,
+)
+from cerbos_query_core.passes import measure
+
+_CONDITION = {
+    "expression": {
+        "operator": "and",
+        "operands": [
+            {
+                "expression": {
+                    "operator": "in",
+                    "operands": [
+                        {"value": ["string", "anotherString"]},
+                        {"variable": "request.resource.attr.aString"},
+                    ],
+                }
+            },
+            {
+                "expression": {
+                    "operator": "not",
+                    "operands": [
+                        {
+                            "expression": {
+                                "operator": "eq",
+                                "operands": [
+                                    {"variable": "request.resource.attr.aNumber"},
+                                    {"value": 1},
+                                ],
+                            }
+                        }
+                    ],
+                }
+            },
+            {
+                "expression": {
+                    "operator": "exists",
+                    "operands": [
+                        {"variable": "request.resource.attr.tags"},
+                        {
+                            "expression": {
+                                "operator": "lambda",
+                                "operands": [
+                                    {
+                                        "expression": {
+                                            "operator": "eq",
+                                            "operands": [
+                                                {"variable": "tag"},
+                                                {"value": {"a": [1, None, True]}},
+                                            ],
+                                        }
+                                    },
+                                    {"variable": "tag"},
+                                ],
+                            }
+                        },
+                    ],
+                }
+            },
+        ],
+    }
+}
+_TREE = And(
+    [
+        Compare("in", "request.resource.attr.aString", ["string", "anotherString"]),
+        Not(Compare("eq", "request.resource.attr.aNumber", 1)),
+        Exists(
+            "request.resource.attr.tags",
+            "tag",
+            Compare("eq", "tag", {"a": [1, None, True]}),
+        ),
+    ]
+)
+_CONDITIONAL = response({"kind": "KIND_CONDITIONAL", "condition": _CONDITION})
+
+
+class TestParsePlan:
+    def test_dict(self):
+        assert parse_condition(_CONDITION) == _TREE
+
+    def test_all_inputs(self):
+        for query_plan in (
+            _CONDITIONAL,
+            json.dumps(_CONDITIONAL),
+            json.dumps(_CONDITIONAL).encode(),
+            PlanResourcesResponse.from_dict(_CONDITIONAL),
+            ParseDict(_CONDITIONAL, response_pb2.PlanResourcesResponse()),
+        ):
+            plan = parse_plan(query_plan)
+            assert plan.kind == CONDITIONAL
+            assert plan.condition == _TREE
+
+    def test_plan_size(self):
+        nodes, _ = measure(_TREE)
+        for query_plan in (
+            _CONDITIONAL,
+            PlanResourcesResponse.from_dict(_CONDITIONAL),
+            ParseDict(_CONDITIONAL, response_pb2.PlanResourcesResponse()),
+            parse_plan(_CONDITIONAL),
+        ):
+            assert plan_size(query_plan, 1000) == nodes
+            # stops counting past the limit
+            assert 2 < plan_size(query_plan, 2) < nodes
+
+        assert plan_size(json.dumps(_CONDITIONAL), 1000) > 0
+        assert plan_size(response({"kind": ALWAYS_ALLOWED}), 1000) == 0
+        assert plan_size(Plan(ALWAYS_DENIED), 1000) == 0
+
+    def test_plan_passthrough(self):
+        plan = Plan(ALWAYS_ALLOWED)
+        assert parse_plan(plan) is plan
+
+    def test_kinds(self):
+        for kind in (ALWAYS_ALLOWED, ALWAYS_DENIED):
+            as_dict = response({"kind": kind})
+            for query_plan in (
+                as_dict,
+                PlanResourcesResponse.from_dict(as_dict),
+                ParseDict(as_dict, response_pb2.PlanResourcesResponse()),
+            ):
+                plan = parse_plan(query_plan)
+                assert (plan.kind, plan.condition) == (kind, None)
+
+        assert parse_plan({"requestId": "1"}).kind == UNSPECIFIED
+        assert parse_plan(response_pb2.PlanResourcesResponse()).kind == UNSPECIFIED
+
+    def test_sdk_enum_kind(self):
+        plan = PlanResourcesResponse.from_dict(response({"kind": "KIND_ALWAYS_DENIED"}))
+        assert plan.filter.kind is PlanResourcesFilterKind.ALWAYS_DENIED
+        assert parse_plan(plan).kind == ALWAYS_DENIED
+
+    def test_not_several_operands(self):
+        leaf = {
+            "expression": {
+                "operator": "eq",
+                "operands": [{"variable": "a"}, {"value": 1}],
+            }
+        }
+        node = parse_condition(
+            {"expression": {"operator": "not", "operands": [leaf, leaf]}}
+        )
+        assert node == Not(And([Compare("eq", "a", 1), Compare("eq", "a", 1)]))
+
+    def test_or(self):
+        leaf = {
+            "expression": {
+                "operator": "eq",
+                "operands": [{"variable": "a"}, {"value": 1}],
+            }
+        }
+        node = parse_condition({"expression": {"operator": "or", "operands": [leaf]}})
+        assert node == Or([Compare("eq", "a", 1)])
+
+    def test_all(self):
+        # request.resource.attr.tags.all(t, t.public == true)
+        condition = {
+            "expression": {
+                "operator": "all",
+                "operands": [
+                    {"variable": "request.resource.attr.tags"},
+                    {
+                        "expression": {
+                            "operator": "lambda",
+                            "operands": [
+                                {
+                                    "expression": {
+                                        "operator": "eq",
+                                        "operands": [
+                                            {"variable": "t.public"},
+                                            {"value": True},
+                                        ],
+                                    }
+                                },
+                                {"variable": "t"},
+                            ],
+                        }
+                    },
+                ],
+            }
+        }
+        body = Compare("eq", "t.public", True)
+        assert parse_condition(condition) == Not(
+            Exists("request.resource.attr.tags", "t", Not(body))
+        )
+
+    def test_exists_requires_lambda(self):
+        condition = {
+            "expression": {
+                "operator": "exists",
+                "operands": [
+                    {"variable": "request.resource.attr.tags"},
+                    {"expression": {"operator": "eq", "operands": []}},
+                ],
+            }
+        }
+        with pytest.raises(NotImplementedError):
+            parse_condition(condition)
+
+    def test_proto_values(self):
+        message = ParseDict(_CONDITIONAL, response_pb2.PlanResourcesResponse())
+        exists = message.filter.condition.expression.operands[2].expression
+        body = exists.operands[1].expression.operands[0].expression
+        value = body.operands[1].value
+        assert parser._proto_value(value) == MessageToDict(value)
+
+    def test_stdlib_json_fallback(self, monkeypatch):
+        monkeypatch.setattr(parser, "_loads", json.loads)
+        plan = parse_plan_json(json.dumps(_CONDITIONAL))
+        assert plan.condition == _TREE
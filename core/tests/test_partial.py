@@ -0,0 +1,111 @@
+from helpers import compare
+
+from cerbos_query_core import (
+    ALWAYS_ALLOWED,
+    ALWAYS_DENIED,
+    CONDITIONAL,
+    And,
+    Compare,
+    Exists,
+    Not,
+    Or,
+    Plan,
+    partial_evaluate,
+)
+from cerbos_query_core.partial import fold
+
+_TENANT = {"request.resource.attr.tenant": "acme"}
+_OWNER = compare("eq", "owner", "alice")
+
+
+class TestFold:
+    def test_comparisons(self):
+        known = {"request.resource.attr.level": 3}
+        for operator, value, expected in (
+            ("eq", 3, True),
+            ("ne", 3, False),
+            ("lt", 4, True),
+            ("gt", 4, False),
+            ("le", 3, True),
+            ("ge", 3.5, False),
+            ("in", [1, 3], True),
+            ("in", 4, False),
+        ):
+            assert fold(compare(operator, "level", value), known) is expected
+
+    def test_prunes_branches(self):
+        cond = Or(
+            [
+                And([compare("eq", "tenant", "acme"), _OWNER]),
+                compare("eq", "tenant", "other"),
+            ]
+        )
+        assert fold(cond, _TENANT) == _OWNER
+        assert fold(
+            Not(And([compare("eq", "tenant", "acme"), _OWNER])), _TENANT
+        ) == Not(_OWNER)
+        assert (
+            fold(Or([compare("in", "tenant", ["acme", "x"]), _OWNER]), _TENANT) is True
+        )
+        assert fold(Not(compare("eq", "tenant", "acme")), _TENANT) is False
+
+    def test_nulls(self):
+        known = {"request.resource.attr.manager": None}
+        assert fold(compare("eq", "manager", None), known) is True
+        assert fold(compare("ne", "manager", None), known) is False
+        assert fold(compare("eq", "tenant", None), _TENANT) is False
+        # unknown in SQL, negations included
+        for node in (
+            compare("eq", "manager", "bob"),
+            Not(compare("in", "manager", ["bob"])),
+        ):
+            assert fold(node, known) == node
+
+    def test_kept(self):
+        for node in (
+            # a type SQL may compare differently, a list containing `null`
+            compare("eq", "tenant", 1),
+            compare("in", "tenant", ["acme", None]),
+            compare("eq", "tenant", True),
+            # an operator override
+            compare("contains", "tenant", "ac"),
+            Exists("request.resource.attr.tenant", "x", Compare("eq", "x", "acme")),
+        ):
+            assert fold(node, _TENANT) == node
+
+
+class TestPartialEvaluate:
+    def test_kinds(self):
+        allowed = partial_evaluate(
+            Plan(CONDITIONAL, compare("eq", "tenant", "acme")), _TENANT
+        )
+        denied = partial_evaluate(
+            Plan(CONDITIONAL, compare("ne", "tenant", "acme")), _TENANT
+        )
+        assert (allowed.kind, allowed.condition) == (ALWAYS_ALLOWED, None)
+        assert (denied.kind, denied.condition) == (ALWAYS_DENIED, None)
+
+        cond = And([compare("eq", "tenant", "acme"), _OWNER])
+        plan = partial_evaluate(Plan(CONDITIONAL, cond), {})
+        assert (plan.kind, plan.condition) == (CONDITIONAL, cond)
+
+    def test_passthrough(self):
+        plan = Plan(ALWAYS_DENIED)
+        assert partial_evaluate(plan, _TENANT) is plan
+
+    def test_raw_plan(self):
+        response = {
+            "filter": {
+                "kind": "KIND_CONDITIONAL",
+                "condition": {
+                    "expression": {
+                        "operator": "eq",
+                        "operands": [
+                            {"variable": "request.resource.attr.tenant"},
+                            {"value": "other"},
+                        ],
+                    }
+                },
+            }
+        }
+        assert partial_evaluate(response, _TENANT).kind == ALWAYS_DENIED
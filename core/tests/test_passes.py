@@ -0,0 +1,132 @@
+import pytest
+from helpers import compare
+
+from cerbos_query_core import And, Compare, Exists, Not, Or, parse_condition
+from cerbos_query_core.passes import (
+    conjunctions,
+    estimate_selectivity,
+    flatten,
+    measure,
+    reorder_condition,
+)
+
+_COND = And(
+    [
+        compare("eq", "aBool", True),
+        compare("eq", "name", "resource1"),
+        compare("gt", "aNumber", 0),
+    ]
+)
+_HINTS = {
+    "request.resource.attr.aBool": 0.5,
+    "request.resource.attr.name": 0.01,
+}
+
+
+class TestReorderCondition:
+    def test_and_most_selective_first(self):
+        reordered = reorder_condition(_COND, _HINTS)
+        assert [c.variable for c in reordered.children] == [
+            "request.resource.attr.name",
+            "request.resource.attr.aNumber",
+            "request.resource.attr.aBool",
+        ]
+
+    def test_or_least_selective_first(self):
+        reordered = reorder_condition(Or(_COND.children), _HINTS)
+        assert [c.operator for c in reordered.children] == ["eq", "gt", "eq"]
+        assert reordered.children[0].variable == "request.resource.attr.aBool"
+
+    def test_nested_and_flattened(self):
+        cond = And([_COND.children[0], And(_COND.children[1:])])
+        assert reorder_condition(cond, _HINTS) == reorder_condition(_COND, _HINTS)
+
+    def test_input_not_mutated(self):
+        before = repr(_COND)
+        reorder_condition(_COND, _HINTS)
+        assert repr(_COND) == before
+
+    def test_estimates(self):
+        assert estimate_selectivity(compare("ne", "aBool", True), _HINTS) == 0.5
+        assert estimate_selectivity(
+            compare("in", "name", ["a", "b"]), _HINTS
+        ) == pytest.approx(0.02)
+        assert estimate_selectivity(_COND, _HINTS) == pytest.approx(0.5 * 0.01 / 3)
+
+
+class TestFlatten:
+    def test_flatten(self):
+        a, b, c = (compare("eq", x, 1) for x in "abc")
+        assert flatten(Or([a, Or([b, And([c, And([a])])])])) == Or([a, b, And([c, a])])
+        assert flatten(Not(Not(a))) == a
+        assert flatten(Exists("coll", "x", And([And([a])]))) == Exists(
+            "coll", "x", And([a])
+        )
+
+
+class TestMeasure:
+    def test_measure(self):
+        # or -> (eq -> var, val), (not -> eq -> var, val)
+        cond = Or([compare("eq", "aBool", True), Not(compare("eq", "ownedBy", "1"))])
+        assert measure(cond) == (8, 4)
+
+    def test_exists(self):
+        # exists -> var, (lambda -> (eq -> var, val), var)
+        cond = parse_condition(
+            {
+                "expression": {
+                    "operator": "exists",
+                    "operands": [
+                        {"variable": "request.resource.attr.tags"},
+                        {
+                            "expression": {
+                                "operator": "lambda",
+                                "operands": [
+                                    {
+                                        "expression": {
+                                            "operator": "eq",
+                                            "operands": [
+                                                {"variable": "tag"},
+                                                {"value": "public"},
+                                            ],
+                                        }
+                                    },
+                                    {"variable": "tag"},
+                                ],
+                            }
+                        },
+                    ],
+                }
+            }
+        )
+        assert measure(cond) == (7, 4)
+
+
+class TestConjunctions:
+    def test_groups(self):
+        cond = Or(
+            [
+                And([compare("eq", "aString", "s"), compare("lt", "aNumber", 5)]),
+                Not(compare("eq", "name", "resource1")),
+            ]
+        )
+        assert conjunctions(cond) == [
+            [
+                ("request.resource.attr.aString", "eq"),
+                ("request.resource.attr.aNumber", "lt"),
+            ],
+            [("request.resource.attr.name", "eq")],
+        ]
+
+    def test_exists_and_root_group_last(self):
+        cond = And(
+            [
+                Exists("request.resource.attr.tags", "t", Compare("eq", "t", "a")),
+                Or([compare("eq", "a", 1), compare("eq", "b", 2)]),
+            ]
+        )
+        assert conjunctions(cond) == [
+            [("request.resource.attr.a", "eq")],
+            [("request.resource.attr.b", "eq")],
+            [("request.resource.attr.tags", "exists")],
+        ]
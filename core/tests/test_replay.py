@@ -0,0 +1,81 @@
+from cerbos.response.v1 import response_pb2
+from cerbos.sdk.model import PlanResourcesResponse
+from google.protobuf.json_format import ParseDict
+
+from cerbos_query_core.replay import PlanRecorder, ReplayReport, load_plans
+
+_RESPONSE = {
+    "requestId": "1",
+    "action": "action",
+    "resourceKind": "resource",
+    "policyVersion": "default",
+    "filter": {
+        "kind": "KIND_CONDITIONAL",
+        "condition": {
+            "expression": {
+                "operator": "eq",
+                "operands": [
+                    {"variable": "request.resource.attr.aBool"},
+                    {"value": True},
+                ],
+            }
+        },
+    },
+}
+
+
+def _http_plan() -> PlanResourcesResponse:
+    return PlanResourcesResponse.from_dict(_RESPONSE)
+
+
+def _grpc_plan() -> response_pb2.PlanResourcesResponse:
+    return ParseDict(_RESPONSE, response_pb2.PlanResourcesResponse())
+
+
+class _StubClient:
+    def __init__(self):
+        self.closed = False
+
+    def plan_resources(self, action, principal, resource):
+        return _http_plan()
+
+    def close(self):
+        self.closed = True
+
+
+class TestPlanRecorder:
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / "plans.jsonl.gz")
+        with PlanRecorder(path) as recorder:
+            recorder.record(_http_plan())
+            recorder.record(_grpc_plan())
+
+        http_plan, grpc_plan = load_plans(path)
+        assert http_plan == _http_plan()
+        assert grpc_plan == _grpc_plan()
+
+    def test_wrap_client(self, tmp_path):
+        path = str(tmp_path / "plans.jsonl")
+        client = _StubClient()
+        with PlanRecorder(path) as recorder:
+            wrapped = recorder.wrap(client)
+            plan = wrapped.plan_resources("action", None, None)
+            wrapped.close()
+
+        assert client.closed
+        assert load_plans(path) == [plan]
+
+
+class TestReplayReport:
+    def test_from_results(self):
+        report = ReplayReport.from_results([(0.3, 1), (0.1, 2), (0.2, 0)], duration=0.5)
+        assert (report.requests, report.rows) == (3, 3)
+        assert report.latencies == [0.1, 0.2, 0.3]
+        assert report.throughput == 6
+        assert report.percentile(50) == 0.2
+        assert report.percentile(100) == 0.3
+
+    def test_empty(self):
+        report = ReplayReport.from_results([], duration=0)
+        assert report.throughput == 0
+        assert report.percentile(99) == 0
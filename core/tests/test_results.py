@@ -0,0 +1,65 @@
+import pytest
+
+from cerbos_query_core.results import LRUStore, ResultCache
+
+
+class TestLRUStore:
+    def test_evicts_least_recently_used(self):
+        store = LRUStore(maxsize=2)
+        store.set("a", 1)
+        store.set("b", 2)
+        assert store.get("a") == 1
+        store.set("c", 3)
+
+        assert len(store) == 2
+        assert store.get("a") == 1
+        assert store.get("c") == 3
+        with pytest.raises(KeyError):
+            store.get("b")
+
+    def test_clear(self):
+        store = LRUStore()
+        store.set("a", 1)
+        store.clear()
+        assert len(store) == 0
+
+
+class TestResultCache:
+    def test_hits_and_misses(self):
+        cache = ResultCache()
+        key = cache.key("q", ["resource", "user"])
+        with pytest.raises(KeyError):
+            cache.get(key)
+        cache.set(key, [1])
+
+        assert cache.get(cache.key("q", ["user", "resource"])) == [1]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_invalidate(self):
+        cache = ResultCache()
+        cache.set(cache.key("q", ["resource", "user"]), [1])
+        cache.set(cache.key("r", ["other"]), [2])
+        cache.invalidate("user")
+
+        with pytest.raises(KeyError):
+            cache.get(cache.key("q", ["resource", "user"]))
+        assert cache.get(cache.key("r", ["other"])) == [2]
+
+    def test_key_made_before_write(self):
+        # results of a query racing with a write aren't served after it
+        cache = ResultCache()
+        key = cache.key("q", ["resource"])
+        cache.invalidate("resource")
+        cache.set(key, [1])
+
+        with pytest.raises(KeyError):
+            cache.get(cache.key("q", ["resource"]))
+
+    def test_store(self):
+        store = LRUStore(maxsize=1)
+        cache = ResultCache(store)
+        cache.set(cache.key("q", []), [1])
+        cache.set(cache.key("r", []), [2])
+        assert len(store) == 1
+        cache.clear()
+        assert len(store) == 0
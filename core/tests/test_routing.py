@@ -0,0 +1,82 @@
+from cerbos_query_core import (
+    ALWAYS_ALLOWED,
+    ALWAYS_DENIED,
+    CONDITIONAL,
+    And,
+    Compare,
+    Exists,
+    Not,
+    Or,
+    Plan,
+    select_shards,
+    shard_key_values,
+)
+from cerbos_query_core.routing import key_values
+
+_REGION = "request.resource.attr.region"
+_OWNER = Compare("eq", "request.resource.attr.owner", "alice")
+
+
+def _region(operator: str, value) -> Compare:
+    return Compare(operator, _REGION, value)
+
+
+class TestKeyValues:
+    def test_leaves(self):
+        assert key_values(_region("eq", "eu"), _REGION) == {"eu"}
+        assert key_values(_region("in", ["eu", "us"]), _REGION) == {"eu", "us"}
+        assert key_values(_region("eq", None), _REGION) == {None}
+        for node in (
+            _region("ne", "eu"),
+            _region("gt", "eu"),
+            _region("eq", {"a": 1}),
+            _OWNER,
+            Exists(_REGION, "x", Compare("eq", "x", "eu")),
+        ):
+            assert key_values(node, _REGION) is None
+
+    def test_and_or(self):
+        both = Or([_region("eq", "eu"), _region("in", ["us", "ap"])])
+        assert key_values(both, _REGION) == {"eu", "us", "ap"}
+        # an unbounded branch may match any region
+        assert key_values(Or([_region("eq", "eu"), _OWNER]), _REGION) is None
+        assert key_values(
+            And([_OWNER, both, _region("in", ["eu", "ap", "sa"])]), _REGION
+        ) == {
+            "eu",
+            "ap",
+        }
+        assert (
+            key_values(And([_region("eq", "eu"), _region("eq", "us")]), _REGION)
+            == set()
+        )
+
+    def test_negations(self):
+        assert key_values(Not(_region("ne", "eu")), _REGION) == {"eu"}
+        assert key_values(Not(_region("eq", "eu")), _REGION) is None
+        # !(region != "eu" || owner == "alice") == region == "eu" && owner != "alice"
+        node = Not(Or([_region("ne", "eu"), _OWNER]))
+        assert key_values(node, _REGION) == {"eu"}
+        assert key_values(Not(And([_region("ne", "eu"), _OWNER])), _REGION) is None
+        assert key_values(Not(Not(_region("eq", "eu"))), _REGION) == {"eu"}
+
+
+class TestSelectShards:
+    def test_plans(self):
+        assert shard_key_values(Plan(ALWAYS_ALLOWED), _REGION) is None
+        assert shard_key_values(Plan(ALWAYS_DENIED), _REGION) == set()
+
+        shards = ["db-eu", "db-us", "db-ap"]
+        shard_for = {
+            "eu": "db-eu",
+            "uk": "db-eu",
+            "us": "db-us",
+            "ap": "db-ap",
+        }.__getitem__
+        plan = Plan(CONDITIONAL, _region("in", ["uk", "us", "eu"]))
+        assert select_shards(plan, _REGION, shard_for, shards) == ["db-eu", "db-us"]
+        assert (
+            select_shards(Plan(CONDITIONAL, _OWNER), _REGION, shard_for, shards)
+            == shards
+        )
+        assert select_shards(Plan(ALWAYS_DENIED), _REGION, shard_for, shards) == []
@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+
+from cerbos_query_core.statistics import pg_selectivity, sqlite_selectivity
+
+
+class _Cursor:
+    def __init__(self, row):
+        self.row = row
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchone(self):
+        return self.row
+
+
+class TestPgSelectivity:
+    def test_schema(self):
+        cursor = _Cursor((4, 100.0))
+        assert pg_selectivity(cursor, "resource", "tenant", "app") == 0.25
+        sql, params = cursor.executed[0]
+        assert "s.schemaname = COALESCE(%s, current_schema())" in sql
+        assert params == ["app", "resource", "tenant"]
+
+    def test_fraction_of_rows(self):
+        # a negative `n_distinct` is the fraction of distinct values
+        cursor = _Cursor((-0.5, 200.0))
+        assert pg_selectivity(cursor, "resource", "name") == pytest.approx(1 / 100)
+        assert cursor.executed[0][1] == [None, "resource", "name"]
+
+    def test_no_stats(self):
+        assert pg_selectivity(_Cursor(None), "resource", "name") is None
+
+
+class TestSqliteSelectivity:
+    def test_stat1(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute(
+            "CREATE TABLE resource (id INTEGER PRIMARY KEY, tenant TEXT, name TEXT)"
+        )
+        conn.execute("CREATE INDEX resource_tenant ON resource (tenant)")
+        conn.executemany(
+            "INSERT INTO resource (tenant, name) VALUES (?, ?)",
+            [(f"tenant{i % 4}", f"name{i}") for i in range(100)],
+        )
+        cursor = conn.cursor()
+        assert sqlite_selectivity(cursor, "resource", "tenant") is None
+
+        conn.execute("ANALYZE")
+        assert sqlite_selectivity(cursor, "resource", "tenant") == pytest.approx(1 / 4)
+        # unindexed columns have no statistics
+        assert sqlite_selectivity(cursor, "resource", "name") is None
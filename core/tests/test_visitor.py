@@ -0,0 +1,76 @@
+import pytest
+
+from cerbos_query_core import And, Compare, Emitter, Exists, Not, Or
+
+
+class _StringEmitter(Emitter[str]):
+    def visit_and(self, node: And) -> str:
+        return "(" + " AND ".join(c.accept(self) for c in node.children) + ")"
+
+    def visit_or(self, node: Or) -> str:
+        return "(" + " OR ".join(c.accept(self) for c in node.children) + ")"
+
+    def visit_not(self, node: Not) -> str:
+        return "NOT " + node.child.accept(self)
+
+    def visit_compare(self, node: Compare) -> str:
+        column = self.attribute(node.variable)
+        return self.operator_fn(node.operator)(column, node.value)
+
+
+_OPERATOR_FNS = {
+    "eq": lambda c, v: f"{c} = {v!r}",
+    "in": lambda c, v: f"{c} IN {tuple(v)!r}",
+}
+_ATTR_MAP = {"a": "col_a", "b": "col_b", "tags": "tag_id"}
+
+
+class TestEmitter:
+    def test_emit(self):
+        cond = And(
+            [
+                Compare("eq", "a", 1),
+                Not(Or([Compare("eq", "b", 2), Compare("eq", "b", 3)])),
+            ]
+        )
+        emitter = _StringEmitter(_ATTR_MAP, _OPERATOR_FNS)
+        assert emitter.visit(cond) == "(col_a = 1 AND NOT (col_b = 2 OR col_b = 3))"
+
+    def test_override(self):
+        emitter = _StringEmitter(
+            _ATTR_MAP, _OPERATOR_FNS, {"eq": lambda c, v: f"{c} IS {v!r}"}
+        )
+        assert emitter.visit(Compare("eq", "a", 1)) == "col_a IS 1"
+
+    def test_exists_inlined(self):
+        cond = Exists("tags", "t", Compare("in", "t", [1, 2]))
+        assert (
+            _StringEmitter(_ATTR_MAP, _OPERATOR_FNS).visit(cond) == "tag_id IN (1, 2)"
+        )
+
+    def test_exists_lambda_variable_mismatch(self):
+        cond = Exists("tags", "t", Compare("eq", "u", 1))
+        with pytest.raises(ValueError) as exc_info:
+            _StringEmitter(_ATTR_MAP, _OPERATOR_FNS).visit(cond)
+        assert (
+            exc_info.value.args[0]
+            == "'lambda' expression requires variable names to match."
+        )
+
+    def test_all_not_inlined(self):
+        cond = Not(Exists("tags", "t", Not(Compare("eq", "t", 1))))
+        with pytest.raises(ValueError, match="'all' .* requires exists_subqueries"):
+            _StringEmitter(_ATTR_MAP, _OPERATOR_FNS).visit(cond)
+
+    def test_unknown_attribute(self):
+        with pytest.raises(KeyError) as exc_info:
+            _StringEmitter(_ATTR_MAP, _OPERATOR_FNS).visit(Compare("eq", "c", 1))
+        assert (
+            exc_info.value.args[0]
+            == "Attribute does not exist in the attribute column map: c"
+        )
+
+    def test_unknown_operator(self):
+        with pytest.raises(ValueError) as exc_info:
+            _StringEmitter(_ATTR_MAP, _OPERATOR_FNS).visit(Compare("lt", "a", 1))
+        assert exc_info.value.args[0] == "Unrecognised operator: lt"
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from cerbos.engine.v1 import engine_pb2
+from cerbos.sdk.model import Principal, ResourceDesc
+
+from cerbos_query_core import PlanRequest, afetch_plan, fetch_plans
+
+
+class _StubClient:
+    def __init__(self):
+        self.calls = []
+
+    def plan_resources(self, action, principal, resource):
+        self.calls.append((action, principal, resource))
+        return f"plan-{len(self.calls)}"
+
+
+class TestFetchPlans:
+    def test_requests_and_plans(self):
+        client = _StubClient()
+        http_principal = Principal("1", roles={"user"})
+        grpc_principal = engine_pb2.Principal(id="1", roles=["user"])
+        items = [
+            PlanRequest("resource", "view", http_principal),
+            "recorded",
+            PlanRequest("resource", "edit", grpc_principal),
+        ]
+        plans = list(fetch_plans(items, client))
+
+        assert [p for p, _ in plans] == ["plan-1", "recorded", "plan-2"]
+        assert plans[1][1] == 0.0
+        (_, _, http_resource), (_, _, grpc_resource) = client.calls
+        assert http_resource == ResourceDesc("resource")
+        assert grpc_resource == engine_pb2.PlanResourcesInput.Resource(kind="resource")
+
+    def test_client_required(self):
+        with pytest.raises(TypeError):
+            list(fetch_plans([PlanRequest("resource", "view", None)]))
+
+
+class _AsyncStubClient(_StubClient):
+    async def plan_resources(self, action, principal, resource):
+        return super().plan_resources(action, principal, resource)
+
+
+class TestAfetchPlan:
+    def test_request_and_plan(self):
+        client = _AsyncStubClient()
+        principal = Principal("1", roles={"user"})
+        plan = asyncio.run(
+            afetch_plan(PlanRequest("resource", "view", principal), client)
+        )
+
+        assert plan == "plan-1"
+        assert client.calls == [("view", principal, ResourceDesc("resource"))]
+        assert asyncio.run(afetch_plan("recorded")) == "recorded"
+
+    def test_client_required(self):
+        with pytest.raises(TypeError):
+            asyncio.run(afetch_plan(PlanRequest("resource", "view", None)))
@@ -0,0 +1,92 @@
+"""Compare the time from a plan to SQL of `get_query` (building and compiling the `Q` filter)
+against `get_precompiled_query` (substituting the plan's values into SQL compiled once per plan
+shape), for plans with 10, 100 and 1000 leaves.
+
+Run with `python benchmarks/bench_fragment.py` from the `django` directory.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path[:0] = [os.getcwd(), os.path.join(os.getcwd(), "src")]
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "testproject.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from cerbos_django.fragment import FragmentCache, get_precompiled_query  # noqa: E402
+from cerbos_django.query import get_query  # noqa: E402
+from testproject.testapp.models import Resource  # noqa: E402
+
+ATTR_MAP = {
+    "request.resource.attr.aString": Resource.aString,
+    "request.resource.attr.aNumber": Resource.aNumber,
+    "request.resource.attr.aBool": Resource.aBool,
+}
+
+
+def _leaf(operator: str, attr: str, value) -> dict:
+    return {
+        "expression": {
+            "operator": operator,
+            "operands": [{"variable": f"request.resource.attr.{attr}"}, {"value": value}],
+        }
+    }
+
+
+def _plan(rng: random.Random, leaves: int) -> dict:
+    # `or`s of `and`s of three leaves, with per principal values
+    groups = [
+        {
+            "expression": {
+                "operator": "and",
+                "operands": [
+                    _leaf("eq", "aString", f"s{rng.randrange(1000)}"),
+                    _leaf("ge", "aNumber", rng.randrange(100)),
+                    _leaf("eq", "aBool", True),
+                ],
+            }
+        }
+        for _ in range(leaves // 3)
+    ]
+    groups += [_leaf("eq", "aNumber", rng.randrange(100)) for _ in range(leaves % 3)]
+    condition = {"expression": {"operator": "or", "operands": groups}}
+    return {"filter": {"kind": "KIND_CONDITIONAL", "condition": condition}}
+
+
+def _to_sql(query) -> str:
+    qs = Resource.objects.filter(query).values("pk")
+    sql, _ = qs.query.get_compiler(using="default").as_sql()
+    return sql
+
+
+def _time(plans, query) -> float:
+    start = time.perf_counter()
+    for plan in plans:
+        _to_sql(query(plan))
+    return (time.perf_counter() - start) / len(plans)
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'leaves':>6} {'get_query':>12} {'precompiled':>12} {'speedup':>8}")
+    for leaves in (10, 100, 1000):
+        plans = [_plan(rng, leaves) for _ in range(max(10, 2000 // leaves))]
+        cache = FragmentCache()
+        # compile the shape once, as the first request for it would
+        get_precompiled_query(plans[0], Resource, ATTR_MAP, cache=cache)
+
+        q_path = _time(plans, lambda p: get_query(p, ATTR_MAP))
+        precompiled = _time(
+            plans, lambda p: get_precompiled_query(p, Resource, ATTR_MAP, cache=cache)
+        )
+        print(
+            f"{leaves:>6} {q_path * 1e6:>10.1f}us {precompiled * 1e6:>10.1f}us"
+            f" {q_path / precompiled:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
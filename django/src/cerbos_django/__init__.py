@@ -1,7 +1,37 @@
-import importlib.metadata
+from cerbos_query_core import (
+    PlanCardinality,
+    canonical_form,
+    parse_plan_json,
+    partial_evaluate,
+    plan_hash,
+    select_shards,
+    shard_key_values,
+)
 
+from cerbos_django.advisor import advise_indexes
 from cerbos_django.query import get_query, GenericAttribute, OperatorFnMap
+from cerbos_django.selectivity import selectivity_from_db
 
-__version__ = importlib.metadata.version(__package__ or __name__)
+__all__ = [
+    "advise_indexes",
+    "canonical_form",
+    "get_query",
+    "parse_plan_json",
+    "partial_evaluate",
+    "plan_hash",
+    "select_shards",
+    "shard_key_values",
+    "PlanCardinality",
+    "GenericAttribute",
+    "OperatorFnMap",
+    "selectivity_from_db",
+]
 
-__all__ = ["get_query", "GenericAttribute", "OperatorFnMap"]
+
+def __getattr__(name: str):
+    # `importlib.metadata` is slow to import, so the version is only looked up when asked for
+    if name == "__version__":
+        import importlib.metadata
+
+        return importlib.metadata.version(__package__ or __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
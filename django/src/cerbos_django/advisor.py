@@ -0,0 +1,118 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Type, Union
+
+from cerbos_query_core import QueryPlan
+from cerbos_query_core.advisor import (
+    ColumnCombination,
+    ColumnUsage,
+    IndexReport,
+    build_index_report,
+    get_conjunctions,
+)
+from django.db.models import (
+    Field,
+    ManyToManyField,
+    ManyToManyRel,
+    ManyToOneRel,
+    Model,
+    UniqueConstraint,
+)
+
+from cerbos_django.query import GenericAttribute, create_lookup_from_attribute
+
+
+def _column(f: Union[Field, ManyToOneRel]) -> Tuple[Type[Model], str]:
+    # The model (possibly an m2m `through` model) and column a lookup on `f` filters by
+    if isinstance(f, ManyToManyField):
+        return f.remote_field.through, f.m2m_reverse_name()
+    if isinstance(f, ManyToManyRel):
+        return f.through, f.field.m2m_column_name()
+    if isinstance(f, ManyToOneRel):
+        return f.related_model, f.field.column
+    return f.model, f.column
+
+
+def _index_prefixes(model: Type[Model]) -> List[Tuple[str, ...]]:
+    opts = model._meta
+
+    def columns(names: Iterable[str]) -> Tuple[str, ...]:
+        return tuple(opts.get_field(n.lstrip("-")).column for n in names)
+
+    prefixes = [(opts.pk.column,)]
+    # `ForeignKey`s are indexed by default (`db_index=True`)
+    prefixes.extend((f.column,) for f in opts.concrete_fields if f.db_index or f.unique)
+    prefixes.extend(columns(idx.fields) for idx in opts.indexes if idx.fields)
+    prefixes.extend(columns(names) for names in opts.unique_together)
+    prefixes.extend(columns(names) for names in getattr(opts, "index_together", ()))
+    prefixes.extend(
+        columns(c.fields)
+        for c in opts.constraints
+        if isinstance(c, UniqueConstraint) and c.fields and c.condition is None
+    )
+    return prefixes
+
+
+def advise_indexes(
+    query_plans: Iterable[QueryPlan],
+    model: Type[Model],
+    attr_map: Dict[str, GenericAttribute],
+) -> IndexReport:
+    """Report which columns the given plans filter on, and whether they are indexed.
+
+    Columns used in leaf predicates (and the joins of chained lookups) are checked against the
+    primary key, `db_index`/`unique` fields, `Meta.indexes`, `unique_together` and unique
+    constraints of their model. Groups of columns from the same table which are ANDed together
+    are reported as combinations, and any which no existing index prefix covers are suggested as
+    composite indexes - equality columns first, range columns last.
+    """
+    models: Dict[str, Type[Model]] = {}
+    usages: Dict[Tuple[str, str], ColumnUsage] = {}
+    combinations: Dict[Tuple[str, Tuple[str, ...]], ColumnCombination] = {}
+    # Columns which are filtered on without any other column of their table
+    alone: Set[Tuple[str, str]] = set()
+
+    def usage(f: Union[Field, ManyToOneRel], attribute: Optional[str]) -> ColumnUsage:
+        m, column = _column(f)
+        table = m._meta.db_table
+        models[table] = m
+        key = (table, column)
+        if key not in usages:
+            usages[key] = ColumnUsage(table, column, attribute)
+        return usages[key]
+
+    for plan in query_plans:
+        for group in get_conjunctions(plan):
+            by_table: Dict[str, Set[str]] = {}
+            for variable, operator in group:
+                try:
+                    lookup = create_lookup_from_attribute(attr_map[variable])
+                except KeyError:
+                    raise KeyError(
+                        f"Attribute does not exist in the attribute column map: {variable}"
+                    )
+
+                *path, name = lookup.split("__")
+                m = model
+                for part in path:
+                    relation = m._meta.get_field(part)
+                    u = usage(relation, None)
+                    u.operators.add("join")
+                    u.occurrences += 1
+                    alone.add((u.table, u.column))
+                    m = relation.related_model
+
+                u = usage(m._meta.get_field(name), variable)
+                u.operators.add(operator)
+                u.occurrences += 1
+                by_table.setdefault(u.table, set()).add(u.column)
+
+            for table, columns in by_table.items():
+                if len(columns) < 2:
+                    alone.update((table, c) for c in columns)
+                    continue
+                key = (table, tuple(sorted(columns)))
+                if key not in combinations:
+                    combinations[key] = ColumnCombination(table, key[1])
+                combinations[key].occurrences += 1
+
+    prefixes = {table: _index_prefixes(m) for table, m in models.items()}
+    return build_index_report(usages, combinations, alone, prefixes)
@@ -0,0 +1,81 @@
+from functools import partial
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Optional, Type, Union
+
+from asgiref.sync import sync_to_async
+from cerbos_query_core import PlanRequest, QueryPlan, afetch_plan, plan_size
+from django.db.models import Model, QuerySet
+
+from cerbos_django.query import GenericAttribute, OperatorFnMap, get_query
+
+# Plans with more nodes than this (see `plan_size`) are parsed and translated in a worker thread,
+# so they don't block the event loop
+OFFLOAD_NODES = 200
+
+
+async def aget_queryset(
+    query_plan: Union[PlanRequest, QueryPlan],
+    model: Type[Model],
+    attr_map: Dict[str, GenericAttribute],
+    operator_override_fns: Optional[OperatorFnMap] = None,
+    client: Any = None,
+    using: Optional[str] = None,
+    exists_subqueries: bool = False,
+    offload_nodes: int = OFFLOAD_NODES,
+) -> QuerySet:
+    """Return the queryset of `model` a plan allows, from async code.
+
+    A `PlanRequest` is planned first with the async HTTP or gRPC `client`. Plans of more than
+    `offload_nodes` nodes, as sized by `plan_size` before they're parsed, are parsed and
+    translated with `sync_to_async(thread_sensitive=False)`, smaller ones on the event loop, where
+    a thread hop would cost more than the translation. No queries are executed: use `aiterator`,
+    `acount` and `aexists`, or Django's own async methods.
+    """
+    query_plan = await afetch_plan(query_plan, client)
+    build = partial(
+        get_query,
+        query_plan,
+        attr_map,
+        operator_override_fns,
+        exists_subqueries=exists_subqueries,
+    )
+    if plan_size(query_plan, offload_nodes) > offload_nodes:
+        q = await sync_to_async(build, thread_sensitive=False)()
+    else:
+        q = build()
+    return model._default_manager.using(using).filter(q)
+
+
+async def aiterator(queryset: QuerySet, chunk_size: int = 2000) -> AsyncIterator[Model]:
+    """Stream a queryset's results, fetching `chunk_size` rows at a time. On Django < 4.1, which
+    has no `QuerySet.aiterator()`, each chunk is fetched with `sync_to_async`."""
+    if hasattr(queryset, "aiterator"):
+        async for obj in queryset.aiterator(chunk_size=chunk_size):
+            yield obj
+        return
+    async for obj in _aiterate_chunks(queryset, chunk_size):
+        yield obj
+
+
+async def _aiterate_chunks(queryset: QuerySet, chunk_size: int) -> AsyncIterator[Model]:
+    # the database cursor stays open on the thread `sync_to_async` runs every chunk in
+    iterator = queryset.iterator(chunk_size=chunk_size)
+    fetch = sync_to_async(lambda: list(islice(iterator, chunk_size)))
+    while True:
+        chunk = await fetch()
+        for obj in chunk:
+            yield obj
+        if len(chunk) < chunk_size:
+            return
+
+
+async def acount(queryset: QuerySet) -> int:
+    if hasattr(queryset, "acount"):
+        return await queryset.acount()
+    return await sync_to_async(queryset.count)()
+
+
+async def aexists(queryset: QuerySet) -> bool:
+    if hasattr(queryset, "aexists"):
+        return await queryset.aexists()
+    return await sync_to_async(queryset.exists)()
@@ -0,0 +1,83 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Type
+
+from cerbos_query_core import QueryPlan
+from cerbos_query_core.explain import analyse_postgres_plan, analyse_sqlite_plan
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Model
+
+from cerbos_django.advisor import advise_indexes
+from cerbos_django.query import GenericAttribute, OperatorFnMap, get_query
+
+
+@dataclass
+class ExplainReport:
+    vendor: str
+    # empty when the filter can't match any rows, in which case Django never queries the DB
+    sql: str
+    # raw `EXPLAIN` output: rows for SQLite/other vendors, the JSON document for Postgres
+    plan: Any
+    # tables read with a full (sequential) scan
+    full_scans: List[str] = field(default_factory=list)
+    # tables scanned in the inner loop of a nested loop join, i.e. once per outer row
+    nested_loops: List[str] = field(default_factory=list)
+    # "table.column" leaf columns not covered by any index
+    unindexed_columns: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.full_scans or self.nested_loops or self.unindexed_columns)
+
+
+def explain_query(
+    query_plan: QueryPlan,
+    model: Type[Model],
+    attr_map: Dict[str, GenericAttribute],
+    operator_override_fns: Optional[OperatorFnMap] = None,
+    using: str = "default",
+) -> ExplainReport:
+    """Build `model.objects.filter(get_query(...))` for a plan and `EXPLAIN` it, flagging full
+    table scans, tables scanned in the inner loop of nested loop joins and unindexed leaf columns.
+
+    SQLite (`EXPLAIN QUERY PLAN`) and Postgres (`EXPLAIN (FORMAT JSON)`) plans are analysed;
+    other vendors get a plain `EXPLAIN` and only the unindexed column check.
+    """
+    connection = connections[using]
+    vendor = connection.vendor
+    index_report = advise_indexes([query_plan], model, attr_map)
+    unindexed_columns = [
+        f"{u.table}.{u.column}" for u in index_report.columns if not u.indexed
+    ]
+
+    query = model._default_manager.using(using).filter(
+        get_query(query_plan, attr_map, operator_override_fns)
+    ).query
+    try:
+        sql, params = query.get_compiler(using=using).as_sql()
+    except EmptyResultSet:
+        return ExplainReport(vendor=vendor, sql="", plan=[])
+
+    full_scans: List[str] = []
+    nested_loops: List[str] = []
+    with connection.cursor() as cursor:
+        if vendor == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = cursor.fetchall()
+            full_scans, nested_loops = analyse_sqlite_plan(plan)
+        elif vendor == "postgresql":
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+            full_scans, nested_loops = analyse_postgres_plan(plan)
+        else:
+            cursor.execute("EXPLAIN " + sql, params)
+            plan = cursor.fetchall()
+
+    return ExplainReport(
+        vendor=vendor,
+        sql=sql,
+        plan=plan,
+        full_scans=full_scans,
+        nested_loops=nested_loops,
+        unindexed_columns=unindexed_columns,
+    )
@@ -0,0 +1,77 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Type
+
+from cerbos_query_core import ALWAYS_ALLOWED, QueryPlan, parse_plan, select_shards
+from cerbos_query_core.fanout import FanOutResult, SortKey, merge_rows, run_on_shards
+from django.db import connections
+from django.db.models import Model
+
+from cerbos_django.query import GenericAttribute, OperatorFnMap, get_query
+
+
+def _value(obj: Model, lookup: str) -> Any:
+    # `a__b` follows relations, the last field gives its database value (e.g. a foreign key's id)
+    *relations, field = lookup.split("__")
+    for name in relations:
+        obj = getattr(obj, name)
+        if obj is None:
+            return None
+    return obj.serializable_value(field)
+
+
+def _sort_keys(order_by: Sequence[str]) -> List[SortKey]:
+    return [
+        (lambda obj, lookup=o.lstrip("-"): _value(obj, lookup), o.startswith("-"))
+        for o in order_by
+    ]
+
+
+def fan_out(
+    query_plan: QueryPlan,
+    model: Type[Model],
+    attr_map: Dict[str, GenericAttribute],
+    aliases: Iterable[str],
+    operator_override_fns: Optional[OperatorFnMap] = None,
+    order_by: Sequence[str] = (),
+    limit: Optional[int] = None,
+    shard_key: Optional[str] = None,
+    shard_for: Optional[Callable[[Any], str]] = None,
+    exists_subqueries: bool = False,
+    max_workers: int = 8,
+) -> FanOutResult:
+    """Run the query of a plan on several databases (e.g. shards) at once, with a pool of at most
+    `max_workers` threads, and merge the model instances.
+
+    The `Q` is built once. `order_by` (field names, `-` for descending) and `limit` are applied on
+    every database, then the sorted rows are merged and limited again. With a `shard_key`
+    attribute, only the aliases `select_shards` picks with `shard_for` are queried. The result
+    reports the rows and duration of each database.
+    """
+    plan = parse_plan(query_plan)
+    aliases = list(aliases)
+    if plan.kind != ALWAYS_ALLOWED and plan.condition is None:
+        # always denied: no database has rows to return
+        aliases = []
+    elif shard_key is not None:
+        if shard_for is None:
+            raise TypeError("a 'shard_for' function is required to route by 'shard_key'")
+        aliases = select_shards(plan, shard_key, shard_for, aliases)
+
+    q = get_query(plan, attr_map, operator_override_fns, exists_subqueries=exists_subqueries)
+
+    def run(alias: str) -> List[Model]:
+        queryset = model._default_manager.using(alias).filter(q)
+        if order_by:
+            queryset = queryset.order_by(*order_by)
+        if limit is not None:
+            queryset = queryset[:limit]
+        connection = connections[alias]
+        # connections are per thread: close those opened here, in the pool's threads
+        opened = connection.connection is None
+        try:
+            return list(queryset)
+        finally:
+            if opened and not connection.in_atomic_block:
+                connection.close()
+
+    results = run_on_shards(run, aliases, max_workers)
+    return FanOutResult(merge_rows(results, _sort_keys(order_by), limit), results)
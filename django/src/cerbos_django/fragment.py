@@ -0,0 +1,260 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple, Type
+
+from cerbos_query_core import (
+    ALWAYS_ALLOWED,
+    CONDITIONAL,
+    And,
+    Compare,
+    Exists,
+    Node,
+    Not,
+    Or,
+    Plan,
+    QueryPlan,
+    parse_plan,
+)
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db.models import Model, Q
+from django.db.models.expressions import RawSQL
+
+from cerbos_django.query import (
+    GenericAttribute,
+    OperatorFnMap,
+    create_lookup_from_attribute,
+    get_query,
+)
+from cerbos_django.result_cache import query_tables
+
+# Where each compiled parameter comes from: the index of the plan value and the conversion Django
+# applied to it (e.g. `int` for a digit string compared with an integer column), or `None` and the
+# parameter itself for constants of the shape (e.g. booleans)
+_ParamSource = Tuple[Optional[int], Any]
+# The compiled SQL of a shape, the sources of its parameters and the tables it reads
+_Entry = Tuple[str, List[_ParamSource], FrozenSet[str]]
+
+
+class FragmentCache:
+    """A bounded LRU cache of the SQL compiled for each plan shape, shared by all threads."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Any, Optional[_Entry]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            try:
+                entry = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                raise
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Any, entry: Optional[_Entry]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_default_cache = FragmentCache()
+
+
+def _value_shape(value: Any, values: List[Any]) -> Any:
+    # Booleans and `None` change the SQL (e.g. `IS NULL`), so they're part of the shape. Other
+    # scalars become parameters, collected into `values` in traversal order.
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float, str)):
+        values.append(value)
+        # digit strings may be converted to ints
+        return type(value), isinstance(value, str) and value.isdigit()
+    if isinstance(value, list):
+        return tuple(_value_shape(v, values) for v in value)
+    # e.g. maps, compared as a whole
+    return ("literal", repr(value))
+
+
+def _shape(node: Node, values: List[Any]) -> Any:
+    if isinstance(node, (And, Or)):
+        return (type(node).__name__, tuple(_shape(c, values) for c in node.children))
+    if isinstance(node, Not):
+        return ("Not", _shape(node.child, values))
+    if isinstance(node, Exists):
+        return ("Exists", node.variable, node.lambda_variable, _shape(node.body, values))
+    return ("Compare", node.operator, node.variable, _value_shape(node.value, values))
+
+
+# Sentinels for compiling a shape, distinct from each other and recognisable after Django converts
+# them for their column (numbers and digit strings may be converted to ints or floats)
+_SENTINEL_BASE = 1_500_000_000
+_SENTINEL_TOKEN = "cerbossentinel"
+
+
+def _sentinel(value: Any, i: int) -> Any:
+    if isinstance(value, str):
+        return str(_SENTINEL_BASE + i) if value.isdigit() else f"{_SENTINEL_TOKEN}{i}"
+    return type(value)(_SENTINEL_BASE + i)
+
+
+def _substitute(node: Node, sentinels: Iterator[Any]) -> Node:
+    # `sentinels` is consumed in the same order `_shape` collected the values
+    if isinstance(node, (And, Or)):
+        return type(node)([_substitute(c, sentinels) for c in node.children])
+    if isinstance(node, Not):
+        return Not(_substitute(node.child, sentinels))
+    if isinstance(node, Exists):
+        return Exists(node.variable, node.lambda_variable, _substitute(node.body, sentinels))
+
+    def value(v: Any) -> Any:
+        if v is None or isinstance(v, bool) or not isinstance(v, (int, float, str, list)):
+            return v
+        if isinstance(v, list):
+            return [value(e) for e in v]
+        return next(sentinels)
+
+    return Compare(node.operator, node.variable, value(node.value))
+
+
+def _compile(
+    condition: Node,
+    values: List[Any],
+    model: Type[Model],
+    attr_map: Dict[str, GenericAttribute],
+    operator_override_fns: Optional[OperatorFnMap],
+    using: str,
+    exists_subqueries: bool,
+) -> Optional[_Entry]:
+    sentinels = [_sentinel(v, i) for i, v in enumerate(values)]
+    positions = {s: i for i, s in enumerate(sentinels)}
+    try:
+        q = get_query(
+            Plan(CONDITIONAL, _substitute(condition, iter(sentinels))),
+            attr_map,
+            operator_override_fns,
+            exists_subqueries=exists_subqueries,
+        )
+        query = model._default_manager.using(using).filter(q).values("pk").query
+        sql, params = query.get_compiler(using=using).as_sql()
+    except (EmptyResultSet, TypeError, ValueError, ValidationError):
+        # Can't be compiled with sentinels (e.g. they don't convert to the column type, or the
+        # filter can't match anything): always use the `Q` path for this shape
+        return None
+
+    sources: List[_ParamSource] = []
+    for param in params:
+        # sentinels of one number type equal to their conversions to others
+        i = positions.get(param) if isinstance(param, (int, float, str)) else None
+        if i is None and isinstance(param, (int, float)) and not isinstance(param, bool):
+            i = positions.get(str(int(param)))
+        if i is not None:
+            convert = type(param)
+            sources.append((i, None if convert is type(sentinels[i]) else convert))
+        elif param is None or isinstance(param, bool):
+            sources.append((None, param))
+        else:
+            # A plan value transformed in a way we can't reproduce (e.g. into a `Decimal`, a
+            # datetime or a `LIKE` pattern), or a constant we can't tell apart from one
+            return None
+    return sql, sources, frozenset(query_tables(query))
+
+
+def get_precompiled_query(
+    query_plan: QueryPlan,
+    model: Type[Model],
+    attr_map: Dict[str, GenericAttribute],
+    operator_override_fns: Optional[OperatorFnMap] = None,
+    using: str = "default",
+    exists_subqueries: bool = False,
+    cache: Optional[FragmentCache] = None,
+) -> Q:
+    """Like `get_query`, but the filter is compiled to SQL once per plan shape (the plan with its
+    values taken out), model, attribute map and database, and cached. Later plans of the same
+    shape only substitute their values into `Q(pk__in=RawSQL(sql, params))`, skipping the
+    resolution of the nested `Q` lookups.
+
+    Shapes which can't be compiled this way, e.g. whose values are transformed by an operator
+    override or converted by Django for their column in ways other than between numbers and digit
+    strings, fall back to `get_query`, as do values which don't convert exactly (e.g. `1.5` for an
+    integer column).
+
+    Overrides from `large_in_fn(strategy="temp_table")` are refused, as each compilation of their
+    query creates its own table.
+    """
+    if any(
+        getattr(fn, "uses_temp_tables", False)
+        for fn in (operator_override_fns or {}).values()
+    ):
+        raise ValueError(
+            "the 'temp_table' large 'in' strategy can't be used with precompiled queries"
+        )
+    plan = parse_plan(query_plan)
+    if plan.kind == ALWAYS_ALLOWED or plan.condition is None:
+        return get_query(plan, attr_map, operator_override_fns)
+
+    if cache is None:
+        cache = _default_cache
+    values: List[Any] = []
+    key = (
+        _shape(plan.condition, values),
+        model,
+        using,
+        exists_subqueries,
+        tuple(
+            sorted((k, create_lookup_from_attribute(v)) for k, v in attr_map.items())
+        ),
+        tuple(sorted((operator_override_fns or {}).items())),
+    )
+    try:
+        entry = cache.get(key)
+    except KeyError:
+        entry = _compile(
+            plan.condition,
+            values,
+            model,
+            attr_map,
+            operator_override_fns,
+            using,
+            exists_subqueries,
+        )
+        cache.put(key, entry)
+
+    if entry is None:
+        return get_query(
+            plan, attr_map, operator_override_fns, exists_subqueries=exists_subqueries
+        )
+    sql, sources, tables = entry
+    params = []
+    for i, constant in sources:
+        if i is None:
+            params.append(constant)
+        elif constant is None:
+            params.append(values[i])
+        else:
+            value = values[i]
+            converted = constant(value)
+            if type(value)(converted) != value:
+                # not exactly representable, e.g. `1.5` for an integer column, which Django
+                # rounds depending on the lookup (up for `gte` and `lt`)
+                return get_query(
+                    plan, attr_map, operator_override_fns, exists_subqueries=exists_subqueries
+                )
+            params.append(converted)
+    fragment = RawSQL(sql, params)
+    # for `AuthorizedResultCache`, which can't tell the tables raw SQL reads
+    fragment.tables = tables
+    return Q(pk__in=fragment)
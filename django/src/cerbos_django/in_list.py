@@ -0,0 +1,201 @@
+import itertools
+import json
+import re
+from contextlib import closing
+from typing import Any, Callable, Iterable, List, Optional
+from weakref import WeakValueDictionary
+
+from django.core.signals import request_finished
+from django.db import NotSupportedError, connections
+from django.db.backends.signals import connection_created
+from django.db.models import Expression, Field, Q
+from django.db.models.constants import LOOKUP_SEP
+
+ARRAY_STRATEGY = "array"
+VALUES_STRATEGY = "values"
+TEMP_TABLE_STRATEGY = "temp_table"
+_STRATEGIES = (ARRAY_STRATEGY, VALUES_STRATEGY, TEMP_TABLE_STRATEGY)
+
+# Attribute of the connections holding the names of the temporary tables created on them
+_TEMP_TABLES_KEY = "_cerbos_in_tables"
+_TEMP_TABLE_PREFIX = "cerbos_in_"
+_SAVEPOINT = "cerbos_drop_temp_table"
+_temp_table_names = itertools.count()
+
+
+class _ArrayValues(Expression):
+    """The right hand side of an `__in` lookup, bound as a single parameter."""
+
+    def __init__(self, values: List[Any]):
+        super().__init__()
+        self.values = values
+
+    def as_sql(self, compiler, connection):
+        raise NotSupportedError(
+            f"The '{ARRAY_STRATEGY}' IN list strategy is not supported on {connection.vendor}"
+        )
+
+    def as_postgresql(self, compiler, connection):
+        return "SELECT unnest(%s)", (self.values,)
+
+    def as_sqlite(self, compiler, connection):
+        return "SELECT value FROM json_each(%s)", (json.dumps(self.values),)
+
+
+class _RowValues(Expression):
+    """The right hand side of an `__in` lookup, as a `VALUES` list of rows."""
+
+    def __init__(self, values: List[Any]):
+        super().__init__()
+        self.values = values
+
+    def as_sql(self, compiler, connection):
+        return "VALUES " + ", ".join(["(%s)"] * len(self.values)), tuple(self.values)
+
+
+class _TempTableValues(Expression):
+    """The right hand side of an `__in` lookup on `path`, as a temporary table with the type of the
+    target column. Compiling the query only names the table: `_with_temp_tables` creates and fills
+    it for each statement which reads it, on the connection running the statement."""
+
+    def __init__(self, path: str, values: List[Any]):
+        super().__init__()
+        self.path = path
+        self.values = values
+        self.target: Optional[Field] = None
+        self.table = ""
+
+    def resolve_expression(self, query=None, *args, **kwargs):
+        c = super().resolve_expression(query, *args, **kwargs)
+        # the column compared with, e.g. the related primary key for a foreign key
+        _, _, targets, _ = query.names_to_path(
+            self.path.split(LOOKUP_SEP), query.get_meta(), fail_on_missing=False
+        )
+        c.target = targets[-1]
+        c.table = f"{_TEMP_TABLE_PREFIX}{next(_temp_table_names)}"
+        return c
+
+    def as_sql(self, compiler, connection):
+        _temp_tables[self.table] = self
+        if _with_temp_tables not in connection.execute_wrappers:
+            connection.execute_wrappers.append(_with_temp_tables)
+        return f"SELECT value FROM {connection.ops.quote_name(self.table)}", ()
+
+    def create(self, connection):
+        table = connection.ops.quote_name(self.table)
+        values = [(self.target.get_db_prep_value(v, connection),) for v in self.values]
+        # a cursor of its own, which execute wrappers don't see
+        with connection.wrap_database_errors, closing(connection.create_cursor()) as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {table} (value {self.target.rel_db_type(connection)})"
+            )
+            cursor.executemany(f"INSERT INTO {table} (value) VALUES (%s)", values)
+
+
+# The tables of compiled queries by name, for as long as the queries are kept
+_temp_tables: "WeakValueDictionary[str, _TempTableValues]" = WeakValueDictionary()
+_TEMP_TABLE_NAME = re.compile(_TEMP_TABLE_PREFIX + r"\d+")
+
+
+def _with_temp_tables(execute, sql, params, many, context):
+    # An execute wrapper of the connections which compiled `"temp_table"` queries: creates the
+    # tables a statement reads before running it and drops them after it
+    connection = context["connection"]
+    created = connection.__dict__.setdefault(_TEMP_TABLES_KEY, set())
+    if not created and _TEMP_TABLE_PREFIX not in sql:
+        return execute(sql, params, many, context)
+    names = set(_TEMP_TABLE_NAME.findall(sql))
+    if created - names:
+        # left by earlier statements whose results were still being read
+        _drop(connection, created - names)
+    tables = []
+    for name in names:
+        values = _temp_tables.get(name)
+        if values is None:
+            continue
+        if name not in created:
+            values.create(connection)
+            created.add(name)
+        tables.append(name)
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if tables:
+            _drop(connection, tables)
+
+
+def _drop(connection, tables: Iterable[str]):
+    created = connection.__dict__.get(_TEMP_TABLES_KEY, set())
+    # in a transaction, a failed statement would abort it on PostgreSQL
+    savepoint = connection.in_atomic_block and connection.features.uses_savepoints
+    ops = connection.ops
+    with connection.wrap_database_errors, closing(connection.create_cursor()) as cursor:
+        for table in list(tables):
+            if savepoint:
+                cursor.execute(ops.savepoint_create_sql(_SAVEPOINT))
+            try:
+                cursor.execute(f"DROP TABLE IF EXISTS {ops.quote_name(table)}")
+            except connection.Database.DatabaseError:
+                # e.g. still read by an unconsumed cursor on SQLite: retried by the next statement
+                if savepoint:
+                    cursor.execute(ops.savepoint_rollback_sql(_SAVEPOINT))
+                continue
+            if savepoint:
+                cursor.execute(ops.savepoint_commit_sql(_SAVEPOINT))
+            created.discard(table)
+
+
+def drop_temp_tables(**kwargs):
+    """Drop the temporary tables of the `"temp_table"` strategy left on this thread's database
+    connections, which are dropped after each statement reading them unless its results are still
+    being read (e.g. on SQLite). Connected to `request_finished`."""
+    for connection in connections.all(initialized_only=True):
+        if connection.__dict__.get(_TEMP_TABLES_KEY) and connection.connection is not None:
+            _drop(connection, connection.__dict__[_TEMP_TABLES_KEY])
+
+
+def _forget_temp_tables(sender, connection, **kwargs):
+    # the temporary tables of a closed connection are gone with it
+    connection.__dict__.pop(_TEMP_TABLES_KEY, None)
+
+
+request_finished.connect(drop_temp_tables)
+connection_created.connect(_forget_temp_tables)
+
+
+def large_in_fn(
+    threshold: int = 1000,
+    strategy: str = ARRAY_STRATEGY,
+) -> Callable[[str, Any], Q]:
+    """An `in` operator function for `operator_override_fns`, which renders lists longer than
+    `threshold` without a query parameter per value:
+
+    - `"array"`: a single parameter, `column IN (SELECT unnest(%s))` on PostgreSQL, or a JSON
+      array with `column IN (SELECT value FROM json_each(%s))` on SQLite.
+    - `"values"`: `column IN (VALUES (%s), (%s), ...)`, which PostgreSQL can plan as a join.
+    - `"temp_table"`: `column IN (SELECT value FROM <table>)`, where the table is a temporary
+      table of the column's type, which is created and filled with the values on the connection
+      running the query, right before it runs, and dropped after it. It can't be used with
+      `get_precompiled_query`.
+
+    Shorter lists are rendered as usual.
+    """
+    if strategy not in _STRATEGIES:
+        raise ValueError(
+            f"Unknown IN list strategy: '{strategy}', expected one of: {', '.join(_STRATEGIES)}"
+        )
+
+    def fn(c: str, v: Any) -> Q:
+        if not isinstance(v, list):
+            v = [v]
+        if len(v) <= threshold:
+            return Q(**{c + "__in": v})
+        if strategy == ARRAY_STRATEGY:
+            return Q(**{c + "__in": _ArrayValues(v)})
+        if strategy == VALUES_STRATEGY:
+            return Q(**{c + "__in": _RowValues(v)})
+        return Q(**{c + "__in": _TempTableValues(c, v)})
+
+    # checked by `get_precompiled_query`, whose SQL would name a table of another compilation
+    fn.uses_temp_tables = strategy == TEMP_TABLE_STRATEGY
+    return fn
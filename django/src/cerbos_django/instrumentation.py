@@ -0,0 +1,3 @@
+from cerbos_query_core.instrumentation import MetricsCallback, TranslationMetrics, span_hook
+
+__all__ = ["MetricsCallback", "TranslationMetrics", "span_hook"]
@@ -0,0 +1,28 @@
+from typing import Dict, Optional, Type
+
+from cerbos_query_core import ALWAYS_ALLOWED, QueryPlan, parse_plan
+from cerbos_query_core.membership import IdSet, id_set
+from django.db.models import Model
+
+from cerbos_django.query import GenericAttribute, OperatorFnMap, get_query
+
+
+def authorized_ids(
+    query_plan: QueryPlan,
+    model: Type[Model],
+    attr_map: Dict[str, GenericAttribute],
+    operator_override_fns: Optional[OperatorFnMap] = None,
+    using: str = "default",
+    id_field: str = "pk",
+    exists_subqueries: bool = False,
+    chunk_size: int = 2000,
+) -> IdSet:
+    """Run the plan's query once, selecting only `id_field`, and return the ids as an `id_set` for
+    fast membership checks, e.g. cached per principal and action in a `MembershipCache`. Rows are
+    streamed in chunks of `chunk_size`. Always denied plans return an empty set without a query."""
+    plan = parse_plan(query_plan)
+    if plan.kind != ALWAYS_ALLOWED and plan.condition is None:
+        return id_set(())
+    q = get_query(plan, attr_map, operator_override_fns, exists_subqueries=exists_subqueries)
+    queryset = model._default_manager.using(using).filter(q).values_list(id_field, flat=True)
+    return id_set(queryset.iterator(chunk_size=chunk_size))
@@ -1,13 +1,32 @@
 from functools import reduce
 from operator import and_, or_
+from time import perf_counter, time_ns
 from types import MappingProxyType
-from typing import Any, Callable, cast, Dict, TypeVar, Iterable, Union, Optional
-
-from cerbos.engine.v1 import engine_pb2
-from cerbos.response.v1 import response_pb2
-from cerbos.sdk.model import PlanResourcesFilterKind, PlanResourcesResponse
-from dataclasses_json import DataClassJsonMixin
-from django.db.models import Model as _Model, Q, Field, ManyToOneRel, ManyToManyRel
+from typing import Any, Callable, Dict, TypeVar, Iterable, Union, Optional, Set, Tuple, Type
+
+from cerbos_query_core import (
+    ALWAYS_ALLOWED,
+    And,
+    Compare,
+    Emitter,
+    Exists,
+    KnownAttributes,
+    Not,
+    Or,
+    QueryPlan,
+    parse_plan,
+    partial_evaluate,
+)
+from cerbos_query_core.passes import SelectivityMap, measure, reorder_condition
+from django.db.models import (
+    Model as _Model,
+    Q,
+    Exists as _Exists,
+    Field,
+    ManyToOneRel,
+    ManyToManyRel,
+    OuterRef,
+)
 from django.db.models.fields.related_descriptors import (
     ForwardManyToOneDescriptor,
     ReverseManyToOneDescriptor,
@@ -16,7 +35,8 @@ from django.db.models.fields.related_descriptors import (
     ManyToManyDescriptor,
 )
 from django.db.models.query_utils import DeferredAttribute
-from google.protobuf.json_format import MessageToDict
+
+from cerbos_django.instrumentation import MetricsCallback, TranslationMetrics
 
 Model = TypeVar("Model", bound=_Model)
 OperatorFnMap = Dict[str, Callable[[str, Any], Q]]
@@ -48,20 +68,6 @@ __operator_fns: OperatorFnMap = {
 }
 OPERATOR_FNS = MappingProxyType(__operator_fns)
 
-# We support both the legacy HTTP and gRPC clients, so therefore we need to accept both input types
-_deny_types = frozenset(
-    [
-        PlanResourcesFilterKind.ALWAYS_DENIED,
-        engine_pb2.PlanResourcesFilter.KIND_ALWAYS_DENIED,
-    ]
-)
-_allow_types = frozenset(
-    [
-        PlanResourcesFilterKind.ALWAYS_ALLOWED,
-        engine_pb2.PlanResourcesFilter.KIND_ALWAYS_ALLOWED,
-    ]
-)
-
 
 def create_lookup_from_attribute(attr: GenericAttribute) -> str:
     if isinstance(attr, str):
@@ -89,94 +95,158 @@ def create_lookup_from_attribute(attr: GenericAttribute) -> str:
     return lookup
 
 
-def get_query(
-    query_plan: Union[PlanResourcesResponse, response_pb2.PlanResourcesResponse],
-    attr_map: Dict[str, GenericAttribute],
-    operator_override_fns: Optional[OperatorFnMap] = None,
-) -> Q:
-    if query_plan.filter is None or query_plan.filter.kind in _deny_types:
-        return Q(pk__in=[])  # Doesn't hit DB
+def _to_many_relation(attr: GenericAttribute) -> Optional[Tuple[Type[_Model], str]]:
+    # The related model of a to-many relation descriptor, and the lookup from it back to the
+    # model the descriptor belongs to
+    # ManyToManyDescriptor is a subclass of ReverseManyToOneDescriptor -> needs to be checked first
+    if isinstance(attr, ManyToManyDescriptor):
+        if attr.reverse:
+            return attr.rel.related_model, attr.rel.field.name
+        return attr.field.related_model, attr.field.related_query_name()
+    if isinstance(attr, ReverseManyToOneDescriptor):
+        return attr.rel.related_model, attr.rel.field.name
+    return None
+
+
+class _QEmitter(Emitter[Q]):
+    def __init__(
+        self,
+        attr_map: Dict[str, GenericAttribute],
+        operator_override_fns: Optional[OperatorFnMap],
+        relations: Optional[Set[str]],
+        exists_subqueries: bool = False,
+        lambda_variable: Optional[str] = None,
+    ):
+        super().__init__(attr_map, OPERATOR_FNS, operator_override_fns)
+        # Relation lookup paths the filter traverses, only collected when instrumentation is enabled
+        self.relations = relations
+        self.exists_subqueries = exists_subqueries
+        self.subqueries = 0
+        # Set when emitting the body of an `exists` subquery, whose fields are looked up on the
+        # related model
+        self.lambda_variable = lambda_variable
+
+    def attribute(self, variable: str) -> GenericAttribute:
+        if self.lambda_variable is None:
+            return super().attribute(variable)
+        # `x` is the related object itself, `x.field` one of its fields
+        head, _, path = variable.partition(".")
+        if head != self.lambda_variable:
+            raise ValueError(
+                f"'exists' subqueries can only refer to the lambda variable: {variable}"
+            )
+        return path.replace(".", "__") or "pk"
 
-    if query_plan.filter.kind in _allow_types:
-        return Q()
+    def visit_and(self, node: And) -> Q:
+        return reduce(and_, (c.accept(self) for c in node.children))
+
+    def visit_or(self, node: Or) -> Q:
+        return reduce(or_, (c.accept(self) for c in node.children))
 
-    def get_operator_fn(op: str, c: str, v: Any) -> Q:
-        # Check to see if the client has overridden the function
-        if (
-            operator_override_fns
-            and (override_fn := operator_override_fns.get(op)) is not None
+    def visit_not(self, node: Not) -> Q:
+        return ~node.child.accept(self)
+
+    def visit_exists(self, node: Exists) -> Q:
+        if self.exists_subqueries and (
+            related := _to_many_relation(self.attribute(node.variable))
         ):
-            return override_fn(c, v)
-
-        # Otherwise, fall back to default handlers
-        if (default_fn := OPERATOR_FNS.get(op)) is not None:
-            return default_fn(c, v)
-
-        raise ValueError(f"Unrecognised operator: {op}")
-
-    def map_exists_operator(child_operands: list[dict]) -> Q:
-        d = {k: v for o in child_operands for k, v in o.items()}
-        variable = d["variable"]
-        sub_expression = d["expression"]
-
-        operator = sub_expression["operator"]
-        if operator != "lambda":
-            raise NotImplementedError
-        operands = sub_expression["operands"]
-
-        d2 = {k: v for o in operands for k, v in o.items()}
-        lambda_variable = d2["variable"]
-        lambda_expression = d2["expression"]
-
-        d3 = {k: v for o in lambda_expression["operands"] for k, v in o.items()}
-        if d3["variable"] != lambda_variable:
-            raise ValueError("'lambda' expression requires variable names to match.")
-        d3["variable"] = variable
-        lambda_expression["operands"] = [{key: value} for key, value in d3.items()]
-        sub_query = traverse_and_map_operands(lambda_expression)
-
-        return sub_query
-
-    def traverse_and_map_operands(operand: dict) -> Q:
-        if exp := operand.get("expression"):
-            return traverse_and_map_operands(exp)
-
-        operator = operand["operator"]
-        child_operands = operand["operands"]
-
-        # if `operator` in ["and", "or"], `child_operands` is a nested list of `expression` dicts (handled at the
-        # beginning of this closure)
-        if operator == "and":
-            return reduce(and_, (traverse_and_map_operands(o) for o in child_operands))
-        if operator == "or":
-            return reduce(or_, (traverse_and_map_operands(o) for o in child_operands))
-        if operator == "not":
-            return ~(reduce(and_, (traverse_and_map_operands(o) for o in child_operands)))
-        if operator == "exists":
-            return map_exists_operator(child_operands)
-
-        # otherwise, they are a list[dict] (len==2), in the form: `[{'variable': 'foo'}, {'value': 'bar'}]`
-        # The order of the keys `variable` and `value` is not guaranteed.
-        d = {k: v for o in child_operands for k, v in o.items()}
-        variable = d["variable"]
-        value = d["value"]
-
-        try:
-            attribute = attr_map[variable]
-        except KeyError:
-            raise KeyError(
-                f"Attribute does not exist in the attribute column map: {variable}"
+            model, outer_lookup = related
+            body = _QEmitter(
+                self.attr_map,
+                self.operator_override_fns,
+                None,
+                exists_subqueries=True,
+                lambda_variable=node.lambda_variable,
+            )
+            condition = node.body.accept(body)
+            self.subqueries += 1 + body.subqueries
+            return Q(
+                _Exists(
+                    model._default_manager.filter(
+                        condition, **{outer_lookup: OuterRef("pk")}
+                    )
+                )
             )
 
-        attribute_lookup = create_lookup_from_attribute(attribute)
+        if self.relations is not None and node.variable in self.attr_map:
+            self.relations.add(create_lookup_from_attribute(self.attr_map[node.variable]))
+        return super().visit_exists(node)
+
+    def visit_compare(self, node: Compare) -> Q:
+        attribute_lookup = create_lookup_from_attribute(self.attribute(node.variable))
+        if self.relations is not None:
+            parts = attribute_lookup.split("__")
+            self.relations.update("__".join(parts[:i]) for i in range(1, len(parts)))
 
         # the operator handlers here are the leaf nodes of the recursion
-        return get_operator_fn(operator, attribute_lookup, value)
+        return self.operator_fn(node.operator)(attribute_lookup, node.value)
+
 
-    cond = (
-        MessageToDict(query_plan.filter.condition)
-        if isinstance(query_plan, response_pb2.PlanResourcesResponse)
-        else cast(DataClassJsonMixin, query_plan.filter.condition).to_dict()
-    )
+def get_query(
+    query_plan: QueryPlan,
+    attr_map: Dict[str, GenericAttribute],
+    operator_override_fns: Optional[OperatorFnMap] = None,
+    selectivity: Optional[SelectivityMap] = None,
+    on_metrics: Optional[MetricsCallback] = None,
+    exists_subqueries: bool = False,
+    known_attributes: Optional[KnownAttributes] = None,
+) -> Q:
+    """Translate a plan into a `Q` for the resource model.
+
+    `known_attributes` are resource attribute values known for every row being queried (e.g. the
+    tenant being listed), which are substituted into the plan: branches they decide are pruned, and
+    a plan which folds to allow-all or deny-all needs no filter.
+
+    With `exists_subqueries`, `exists` (and `all`) lambdas over to-many relation descriptors
+    become correlated `Exists(...)` subqueries rather than joins, so no base row is repeated.
+    Their bodies can only refer to the lambda variable (`x` for the related object's primary
+    key, `x.field` for its fields).
+    """
+    # Timings are only taken when instrumentation is enabled, to keep the hot path lean
+    if on_metrics is not None:
+        start_ns, t0 = time_ns(), perf_counter()
+
+    plan = parse_plan(query_plan)
+    if known_attributes:
+        plan = partial_evaluate(plan, known_attributes)
+
+    if on_metrics is not None:
+        t1 = perf_counter()
+
+    if plan.kind == ALWAYS_ALLOWED:
+        if on_metrics is not None:
+            on_metrics(TranslationMetrics(plan.kind, start_ns, t1 - t0))
+        return Q()
+
+    # Always denied, or no filter at all
+    if plan.condition is None:
+        if on_metrics is not None:
+            on_metrics(TranslationMetrics(plan.kind, start_ns, t1 - t0))
+        return Q(pk__in=[])  # Doesn't hit DB
+
+    cond = plan.condition
+    # Optionally reorder `and`/`or` children so the most useful predicates are emitted first
+    if selectivity is not None:
+        cond = reorder_condition(cond, selectivity)
+
+    relations: Optional[Set[str]] = set() if on_metrics is not None else None
+    emitter = _QEmitter(attr_map, operator_override_fns, relations, exists_subqueries)
+    q = cond.accept(emitter)
+
+    if on_metrics is not None:
+        t2 = perf_counter()
+        node_count, max_depth = measure(cond)
+        on_metrics(
+            TranslationMetrics(
+                filter_kind=plan.kind,
+                start_time_ns=start_ns,
+                conversion_time=t1 - t0,
+                traversal_time=t2 - t1,
+                node_count=node_count,
+                max_depth=max_depth,
+                joins=len(relations),
+                subqueries=emitter.subqueries,
+            )
+        )
 
-    return traverse_and_map_operands(cond)
+    return q
@@ -0,0 +1,66 @@
+import queue
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+from cerbos_query_core.replay import PlanRecorder, PlanResponse, ReplayReport, load_plans
+from django.db import connections
+from django.db.models import Model
+
+from cerbos_django.query import GenericAttribute, OperatorFnMap, get_query
+
+__all__ = ["PlanRecorder", "PlanResponse", "ReplayReport", "load_plans", "replay"]
+
+
+def replay(
+    query_plans: Iterable[PlanResponse],
+    model: Type[Model],
+    attr_map: Dict[str, GenericAttribute],
+    operator_override_fns: Optional[OperatorFnMap] = None,
+    using: str = "default",
+    concurrency: int = 1,
+    iterations: int = 1,
+) -> ReplayReport:
+    """Translate and evaluate `model.objects.filter(get_query(...))` for each plan `iterations`
+    times on `concurrency` threads, measuring per request latency and overall throughput."""
+    work: "queue.SimpleQueue[PlanResponse]" = queue.SimpleQueue()
+    for query_plan in list(query_plans) * iterations:
+        work.put(query_plan)
+
+    results: List[Tuple[float, int]] = []
+    errors: List[BaseException] = []
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            while True:
+                try:
+                    query_plan = work.get_nowait()
+                except queue.Empty:
+                    return
+
+                start = time.perf_counter()
+                q = get_query(query_plan, attr_map, operator_override_fns)
+                rows = len(model._default_manager.using(using).filter(q))
+                latency = time.perf_counter() - start
+                with lock:
+                    results.append((latency, rows))
+        except BaseException as e:
+            with lock:
+                errors.append(e)
+        finally:
+            # Django connections are per thread, and would otherwise leak with the thread
+            connections[using].close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duration = time.perf_counter() - start
+
+    if errors:
+        raise errors[0]
+
+    return ReplayReport.from_results(results, duration)
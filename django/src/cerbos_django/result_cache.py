@@ -0,0 +1,134 @@
+from typing import Any, List, Set, Type
+
+from cerbos_query_core.results import ResultCache
+from django.db import connections, transaction
+from django.db.models import Model, QuerySet
+from django.db.models.expressions import BaseExpression, RawSQL
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.db.models.sql import Query
+from django.db.models.sql.where import WhereNode
+
+
+class UntrackedSQL(Exception):
+    """Raised by `query_tables` for raw SQL whose tables aren't known."""
+
+
+def query_tables(query: Query) -> Set[str]:
+    """The tables a query reads: its model's (and its multi-table inheritance parents'), those it
+    joins, and those of its subqueries (e.g. `Exists` filters and querysets given to `__in`) and of
+    `get_precompiled_query` filters. Raises `UntrackedSQL` for other `RawSQL` expressions."""
+    meta = query.get_meta()
+    tables = {meta.db_table, *(parent._meta.db_table for parent in meta.get_parent_list())}
+    tables.update(a.table_name for a in query.alias_map.values())
+    stack: List[Any] = [query.where, *query.annotations.values()]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Query):
+            tables |= query_tables(node)
+        elif isinstance(getattr(node, "query", None), Query):
+            tables |= query_tables(node.query)
+        elif isinstance(node, RawSQL):
+            # only precompiled filters record the tables they read
+            if getattr(node, "tables", None) is None:
+                raise UntrackedSQL(node.sql)
+            tables |= node.tables
+        elif isinstance(node, WhereNode):
+            stack.extend(node.children)
+        elif hasattr(node, "lhs"):
+            # lookups, which aren't expressions before Django 4.0
+            stack.extend((node.lhs, node.rhs))
+        elif isinstance(node, BaseExpression):
+            stack.extend(node.get_source_expressions())
+    return tables
+
+
+class _Invalidate:
+    """An `on_commit` callback invalidating the tables written in the transaction. While it's
+    pending, reads of those tables on the connection bypass the cache."""
+
+    def __init__(self, cache: ResultCache, table: str):
+        self.cache = cache
+        self.table = table
+
+    def __call__(self):
+        self.cache.invalidate(self.table)
+
+
+class AuthorizedResultCache:
+    """Caches the results of authorized querysets, keyed by their SQL and parameters and the
+    database alias, and invalidated by writes to the tables they read.
+
+    `install` connects to the `post_save`, `post_delete` and `m2m_changed` signals, so saving and
+    deleting instances and changing many-to-many relations invalidate the cache (again on commit,
+    for results cached by other connections in between). `QuerySet.update()`, `bulk_create()` and
+    raw SQL send no signals: call `invalidate` after them.
+
+    `store` is any `LRUStore`-like mapping, an in-process LRU by default. Cached instances are
+    shared by every caller, so don't modify them.
+    """
+
+    def __init__(self, store: Any = None):
+        self.cache = ResultCache(store)
+
+    def install(self):
+        post_save.connect(self._on_write)
+        post_delete.connect(self._on_write)
+        m2m_changed.connect(self._on_m2m_changed)
+
+    def uninstall(self):
+        post_save.disconnect(self._on_write)
+        post_delete.disconnect(self._on_write)
+        m2m_changed.disconnect(self._on_m2m_changed)
+
+    def invalidate(self, *tables: str):
+        self.cache.invalidate(*tables)
+
+    def get_results(self, queryset: QuerySet) -> List[Any]:
+        """Return the results of `queryset`, e.g. `Model.objects.filter(get_query(...))` with more
+        filters, ordering and slicing, from the cache if no table it reads (its model's, and those
+        of the relations and subqueries it uses) was written since they were cached.
+
+        Querysets reading tables written in the current transaction of their database are
+        evaluated without the cache, as the writes may be rolled back, and so are those filtering
+        with raw SQL other than `get_precompiled_query`'s, as the tables they read aren't known.
+        """
+        try:
+            tables = query_tables(queryset.query)
+        except UntrackedSQL:
+            return list(queryset)
+        if tables & self._pending(queryset.db):
+            return list(queryset)
+        sql, params = queryset.query.sql_with_params()
+        key = self.cache.key(
+            (queryset.db, sql, tuple(repr(p) for p in params)),
+            tables,
+        )
+        try:
+            return self.cache.get(key)
+        except KeyError:
+            pass
+        results = list(queryset)
+        self.cache.set(key, results)
+        return results
+
+    def _pending(self, using: str) -> Set[str]:
+        # the tables written in the current transaction, which haven't been committed yet
+        return {
+            entry[1].table
+            for entry in connections[using].run_on_commit
+            if isinstance(entry[1], _Invalidate) and entry[1].cache is self.cache
+        }
+
+    def _written(self, table: str, using: str):
+        self.cache.invalidate(table)
+        transaction.on_commit(_Invalidate(self.cache, table), using=using)
+
+    def _on_write(self, sender: Type[Model], using: str, **kwargs):
+        # instances of multi-table inheritance children are also rows of their parents' tables
+        for model in (sender, *sender._meta.get_parent_list()):
+            self._written(model._meta.db_table, using)
+
+    def _on_m2m_changed(self, sender: Type[Model], action: str, using: str, **kwargs):
+        # the sender is the `through` model
+        if action.startswith("post_"):
+            self._written(sender._meta.db_table, using)
@@ -0,0 +1,57 @@
+from typing import Any, Dict, Tuple, Type
+
+from cerbos_query_core.passes import SelectivityMap
+from cerbos_query_core.statistics import pg_selectivity, sqlite_selectivity
+from django.db import connections
+from django.db.models import Count, Field, Model
+
+from cerbos_django.query import create_lookup_from_attribute
+
+
+def resolve_lookup(model: Type[Model], lookup: str) -> Tuple[Type[Model], Field]:
+    """Follow a `__`-separated lookup through relations, returning the final model and field."""
+    *path, name = lookup.split("__")
+    for part in path:
+        model = model._meta.get_field(part).related_model
+    return model, model._meta.get_field(name)
+
+
+def selectivity_from_db(
+    model: Type[Model],
+    attr_map: Dict[str, Any],
+    using: str = "default",
+    exact: bool = False,
+) -> SelectivityMap:
+    """Derive per-attribute equality selectivities from the database statistics.
+
+    Postgres hints are read from `pg_stats`, SQLite hints from `sqlite_stat1` (both are only
+    populated after `ANALYZE`). With `exact=True`, attributes missing from the statistics are
+    measured with `COUNT(DISTINCT ...)`, which scans the table.
+    """
+    vendor = connections[using].vendor
+    hints: SelectivityMap = {}
+    for attr, attribute in attr_map.items():
+        lookup = create_lookup_from_attribute(attribute)
+        field_model, field = resolve_lookup(model, lookup)
+
+        s = None
+        if (column := getattr(field, "column", None)) is not None:
+            table_name = field_model._meta.db_table
+            if vendor == "postgresql":
+                with connections[using].cursor() as cursor:
+                    s = pg_selectivity(cursor, table_name, column)
+            elif vendor == "sqlite":
+                with connections[using].cursor() as cursor:
+                    s = sqlite_selectivity(cursor, table_name, column)
+
+        if s is None and exact:
+            counts = model._default_manager.using(using).aggregate(
+                distinct=Count(lookup, distinct=True), total=Count("pk")
+            )
+            if counts["distinct"] and counts["total"]:
+                s = 1 / counts["distinct"]
+
+        if s is not None:
+            hints[attr] = s
+    return hints
+
@@ -0,0 +1,63 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Type, Union
+
+from cerbos_query_core import ALWAYS_ALLOWED, QueryPlan, parse_plan
+from django.db.models import Expression, F, Model, QuerySet
+
+from cerbos_django.query import GenericAttribute, OperatorFnMap, get_query
+
+
+class KindQuery(NamedTuple):
+    """A resource kind's part of a union: its plan, model and attribute map, and its projection
+    from the union's column names to its field names or expressions (e.g. `Value("leave")`),
+    in the same order for every kind. As they're annotations, the column names can't be names of
+    the model's fields."""
+
+    query_plan: QueryPlan
+    model: Type[Model]
+    attr_map: Dict[str, GenericAttribute]
+    projection: Dict[str, Union[str, Expression]]
+    operator_override_fns: Optional[OperatorFnMap] = None
+
+
+def get_union_queryset(
+    kinds: Iterable[KindQuery],
+    order_by: Sequence[str] = (),
+    limit: Optional[int] = None,
+    using: Optional[str] = None,
+) -> QuerySet:
+    """Combine the authorized querysets of several resource kinds with `QuerySet.union(all=True)`,
+    into a single query returning a dict per row.
+
+    `order_by` and `limit` apply to the whole union, so refer to the projection's column names.
+    Kinds whose plans are always denied are left out.
+    """
+    querysets: List[QuerySet] = []
+    denied = None
+    for kind in kinds:
+        plan = parse_plan(kind.query_plan)
+        queryset = kind.model._default_manager.using(using).filter(
+            get_query(plan, kind.attr_map, kind.operator_override_fns)
+        )
+        queryset = queryset.values(
+            **{
+                name: F(value) if isinstance(value, str) else value
+                for name, value in kind.projection.items()
+            }
+        )
+        if plan.kind != ALWAYS_ALLOWED and plan.condition is None:
+            denied = queryset
+        else:
+            querysets.append(queryset)
+
+    if not querysets:
+        if denied is None:
+            raise ValueError("get_union_queryset() requires at least one resource kind")
+        querysets.append(denied)
+    queryset = querysets[0]
+    if len(querysets) > 1:
+        queryset = queryset.union(*querysets[1:], all=True)
+    if order_by:
+        queryset = queryset.order_by(*order_by)
+    if limit is not None:
+        queryset = queryset[:limit]
+    return queryset
@@ -0,0 +1,79 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union
+
+from cerbos_query_core import PlanRequest, QueryPlan, fetch_plans
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Model
+
+from cerbos_django.fragment import FragmentCache, get_precompiled_query
+from cerbos_django.query import GenericAttribute, OperatorFnMap, get_query
+
+
+@dataclass
+class WarmupReport:
+    # wall clock time of the whole warm-up, in seconds
+    duration: float
+    # seconds spent waiting for Cerbos to plan `PlanRequest`s
+    planning_time: float
+    # per plan translation + compilation times in seconds, in input order
+    timings: List[float] = field(default_factory=list)
+    # compiled (sql, params), empty when the filter can't match any rows
+    queries: List[Tuple[str, Tuple[Any, ...]]] = field(default_factory=list)
+
+    @property
+    def plans(self) -> int:
+        return len(self.timings)
+
+
+def warm_up(
+    items: Iterable[Union[PlanRequest, QueryPlan]],
+    model: Type[Model],
+    attr_map: Dict[str, GenericAttribute],
+    operator_override_fns: Optional[OperatorFnMap] = None,
+    client: Any = None,
+    using: str = "default",
+    exists_subqueries: bool = False,
+    precompile: bool = False,
+    cache: Optional[FragmentCache] = None,
+) -> WarmupReport:
+    """Translate plans and compile `model.objects.filter(get_query(...))` for the `using`
+    database ahead of the first requests, e.g. at startup.
+
+    `items` are recorded plans (see `replay.load_plans`) or `PlanRequest`s, which are planned
+    with `client`. No queries are executed.
+
+    Django doesn't keep compiled SQL, so by default nothing but the report is kept: requests still
+    compile their filters, and only one-time costs such as imports and model metadata caches are
+    taken out of them. With `precompile`, filters are built with `get_precompiled_query`, which
+    keeps the SQL of each plan shape in `cache` (the default `FragmentCache` if `None`), so
+    requests calling it with the same cache and arguments skip compiling those shapes.
+    """
+    start = time.perf_counter()
+    report = WarmupReport(duration=0.0, planning_time=0.0)
+    for query_plan, planning_time in fetch_plans(items, client):
+        report.planning_time += planning_time
+        t0 = time.perf_counter()
+        if precompile:
+            q = get_precompiled_query(
+                query_plan,
+                model,
+                attr_map,
+                operator_override_fns,
+                using=using,
+                exists_subqueries=exists_subqueries,
+                cache=cache,
+            )
+        else:
+            q = get_query(
+                query_plan, attr_map, operator_override_fns, exists_subqueries=exists_subqueries
+            )
+        query = model._default_manager.using(using).filter(q).query
+        try:
+            sql, params = query.get_compiler(using=using).as_sql()
+        except EmptyResultSet:
+            sql, params = "", ()
+        report.queries.append((sql, tuple(params)))
+        report.timings.append(time.perf_counter() - t0)
+    report.duration = time.perf_counter() - start
+    return report
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("testapp", "0003_alter_resource_createdby_alter_resource_ownedby"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Invoice",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=20)),
+                ("issuedAt", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("testapp", "0004_invoice"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecurringInvoice",
+            fields=[
+                (
+                    "invoice_ptr",
+                    models.OneToOneField(
+                        auto_created=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        parent_link=True,
+                        primary_key=True,
+                        serialize=False,
+                        to="testapp.invoice",
+                    ),
+                ),
+                ("interval", models.IntegerField()),
+            ],
+            bases=("testapp.invoice",),
+        ),
+    ]
@@ -43,3 +43,14 @@ class NestedResource(models.Model):
     aString = models.CharField(max_length=30)
     aNumber = models.IntegerField()
     aBool = models.BooleanField()
+
+
+class Invoice(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    amount = models.DecimalField(max_digits=20, decimal_places=2)
+    issuedAt = models.DateTimeField()
+
+
+# a multi-table inheritance child, whose rows are also rows of the invoice table
+class RecurringInvoice(Invoice):
+    interval = models.IntegerField()
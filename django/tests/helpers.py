@@ -0,0 +1,49 @@
+from typing import Optional
+
+from cerbos.sdk.model import (
+    PlanResourcesFilter,
+    PlanResourcesFilterKind,
+    PlanResourcesResponse,
+)
+
+# Plan builders shared by the tests, e.g. `conditional(expr("or", leaf("eq", "aBool", True), ...))`
+
+
+def response(filter: dict) -> dict:
+    return {
+        "requestId": "1",
+        "action": "action",
+        "resourceKind": "resource",
+        "policyVersion": "default",
+        "filter": filter,
+    }
+
+
+def expr(operator: str, *operands: dict) -> dict:
+    return {"expression": {"operator": operator, "operands": list(operands)}}
+
+
+def leaf(operator: str, attr: str, value) -> dict:
+    return expr(operator, {"variable": f"request.resource.attr.{attr}"}, {"value": value})
+
+
+def conditional(condition: dict) -> dict:
+    return response({"kind": "KIND_CONDITIONAL", "condition": condition})
+
+
+def leaf_plan(operator: str, attr: str, value) -> dict:
+    """A conditional plan with a single `attr <operator> value` predicate."""
+    return conditional(leaf(operator, attr, value))
+
+
+def sdk_plan(
+    condition: Optional[dict], kind=PlanResourcesFilterKind.CONDITIONAL
+) -> PlanResourcesResponse:
+    """The plan as an HTTP SDK `PlanResourcesResponse`."""
+    return PlanResourcesResponse(
+        filter=PlanResourcesFilter.from_dict({"kind": kind, "condition": condition}),
+        request_id="1",
+        action="action",
+        resource_kind="resource",
+        policy_version="default",
+    )
@@ -0,0 +1,49 @@
+from cerbos.sdk.model import PlanResourcesFilterKind
+from helpers import expr, leaf, sdk_plan
+
+from cerbos_django import advise_indexes
+
+
+_PLANS = [
+    sdk_plan(expr("and", leaf("gt", "aNumber", 1), leaf("eq", "aString", "s"))),
+    sdk_plan(
+        expr(
+            "or",
+            expr("and", leaf("eq", "aString", "s"), leaf("lt", "aNumber", 5)),
+            leaf("eq", "nested.aString", "string1"),
+        )
+    ),
+    sdk_plan(leaf("in", "related", [1, 2])),
+    sdk_plan(None, kind=PlanResourcesFilterKind.ALWAYS_DENIED),
+]
+
+
+class TestAdviseIndexes:
+    def test_report(self, resource_model, nested_resource_model):
+        attr = {
+            "request.resource.attr.aNumber": resource_model.aNumber,
+            "request.resource.attr.aString": "aString",
+            "request.resource.attr.nested.aString": [
+                resource_model.nested,
+                nested_resource_model.aString,
+            ],
+            "request.resource.attr.related": resource_model.related,
+        }
+        report = advise_indexes(_PLANS, resource_model, attr)
+
+        usages = {(u.table, u.column): u for u in report.columns}
+        assert usages[("testapp_resource", "aNumber")].operators == {"gt", "lt"}
+        assert not usages[("testapp_resource", "aNumber")].indexed
+        # Foreign keys and m2m through tables are indexed by Django
+        assert usages[("testapp_resource", "nested_id")].operators == {"join"}
+        assert usages[("testapp_resource", "nested_id")].indexed
+        assert usages[("testapp_resource_related", "nestedresource_id")].indexed
+        assert not usages[("testapp_nestedresource", "aString")].indexed
+
+        assert [(c.columns, c.occurrences) for c in report.combinations] == [
+            (("aNumber", "aString"), 2)
+        ]
+        assert [(s.table, s.columns) for s in report.suggestions] == [
+            ("testapp_resource", ("aString", "aNumber")),
+            ("testapp_nestedresource", ("aString",)),
+        ]
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+from cerbos.sdk.model import Principal, ResourceDesc
+from helpers import leaf_plan, response
+
+from cerbos_django import aio
+from cerbos_django.aio import acount, aexists, aget_queryset, aiterator
+from cerbos_query_core import PlanRequest
+
+
+class _AsyncStubClient:
+    def __init__(self, plan):
+        self.plan = plan
+        self.calls = []
+
+    async def plan_resources(self, action, principal, resource):
+        self.calls.append((action, principal, resource))
+        return self.plan
+
+
+@pytest.fixture
+def attr(resource_model):
+    return {"request.resource.attr.aBool": resource_model.aBool}
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("testdata")
+class TestAsync:
+    async def test_aiterator(self, resource_model, attr):
+        queryset = await aget_queryset(leaf_plan("eq", "aBool", True), resource_model, attr)
+        names = [r.name async for r in aiterator(queryset.order_by("name"), chunk_size=1)]
+        assert names == ["resource1", "resource3"]
+
+    async def test_acount_and_aexists(self, resource_model, attr):
+        queryset = await aget_queryset(leaf_plan("eq", "aBool", False), resource_model, attr)
+        assert await acount(queryset) == 1
+        assert await aexists(queryset)
+
+        denied_plan = response({"kind": "KIND_ALWAYS_DENIED"})
+        denied = await aget_queryset(denied_plan, resource_model, attr)
+        assert await acount(denied) == 0
+        assert not await aexists(denied)
+
+    async def test_plan_request(self, resource_model, attr):
+        client = _AsyncStubClient(leaf_plan("eq", "aBool", False))
+        principal = Principal("1", roles={"user"})
+        request = PlanRequest("resource", "view", principal)
+        queryset = await aget_queryset(request, resource_model, attr, client=client)
+
+        assert [r.name async for r in aiterator(queryset)] == ["resource2"]
+        assert client.calls == [("view", principal, ResourceDesc("resource"))]
+
+    async def test_offloaded(self, resource_model, attr, monkeypatch):
+        threads = []
+        original = aio.get_query
+
+        def get_query(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(aio, "get_query", get_query)
+        plan = leaf_plan("eq", "aBool", True)
+        await aget_queryset(plan, resource_model, attr)
+        queryset = await aget_queryset(plan, resource_model, attr, offload_nodes=0)
+
+        assert await acount(queryset) == 2
+        assert threads[0] == threading.get_ident()
+        assert threads[1] != threading.get_ident()
+
+    async def test_chunks(self, resource_model):
+        # the fallback for Django versions without `QuerySet.aiterator()`
+        queryset = resource_model.objects.order_by("name")
+        names = [r.name async for r in aio._aiterate_chunks(queryset, 2)]
+        assert names == ["resource1", "resource2", "resource3"]
@@ -0,0 +1,45 @@
+from cerbos.sdk.model import PlanResourcesFilterKind
+from helpers import leaf, sdk_plan
+
+from cerbos_django.explain import explain_query
+
+
+class TestExplainQuery:
+    def test_full_scan(self, resource_model, testdata):
+        attr = {"request.resource.attr.aBool": resource_model.aBool}
+        report = explain_query(sdk_plan(leaf("eq", "aBool", True)), resource_model, attr)
+
+        assert report.vendor == "sqlite"
+        assert report.sql.startswith("SELECT")
+        assert report.full_scans == ["testapp_resource"]
+        assert report.nested_loops == []
+        assert report.unindexed_columns == ["testapp_resource.aBool"]
+        assert not report.ok
+
+    def test_related(self, resource_model, nested_resource_model, testdata):
+        attr = {
+            "request.resource.attr.nested.aString": [
+                resource_model.nested,
+                nested_resource_model.aString,
+            ]
+        }
+        plan = sdk_plan(leaf("eq", "nested.aString", "string1"))
+        report = explain_query(plan, resource_model, attr)
+        # `nested_id` is an indexed foreign key, `aString` isn't
+        assert report.unindexed_columns == ["testapp_nestedresource.aString"]
+        # SQLite drives the join from the related table, searching resources by `nested_id`
+        assert report.full_scans == ["testapp_nestedresource"]
+        assert report.nested_loops == []
+
+    def test_indexed(self, resource_model, testdata):
+        attr = {"request.resource.attr.id": resource_model.id}
+        report = explain_query(sdk_plan(leaf("eq", "id", 1)), resource_model, attr)
+        assert report.ok
+        assert report.plan[0][-1].startswith("SEARCH testapp_resource")
+
+    def test_always_denied(self, resource_model, db, django_assert_num_queries):
+        plan = sdk_plan(None, kind=PlanResourcesFilterKind.ALWAYS_DENIED)
+        with django_assert_num_queries(0):
+            report = explain_query(plan, resource_model, {})
+        assert report.sql == ""
+        assert report.ok
@@ -0,0 +1,62 @@
+import pytest
+from helpers import leaf_plan, response
+
+from cerbos_django.fanout import fan_out
+
+from testproject.testapp import models
+
+
+_ALIASES = ["default", "shard"]
+
+
+@pytest.fixture
+def shards(testdata):
+    # user 2's resources moved to the second shard, which has its own copy of the other tables
+    for model in (models.User, models.NestedResource):
+        model.objects.using("shard").bulk_create(list(model.objects.all()))
+    resources = list(models.Resource.objects.filter(ownedBy=2))
+    models.Resource.objects.using("shard").bulk_create(resources)
+    models.Resource.objects.filter(ownedBy=2).delete()
+
+
+@pytest.fixture
+def attr(resource_model):
+    return {
+        "request.resource.attr.aBool": resource_model.aBool,
+        "request.resource.attr.ownedBy": resource_model.ownedBy,
+    }
+
+
+@pytest.mark.django_db(transaction=True, databases=_ALIASES)
+class TestFanOut:
+    def test_merged(self, resource_model, attr, shards):
+        result = fan_out(leaf_plan("eq", "aBool", True), resource_model, attr, _ALIASES)
+        assert sorted(r.name for r in result.rows) == ["resource1", "resource3"]
+        assert [(s.shard, len(s.rows)) for s in result.shards] == [("default", 1), ("shard", 1)]
+        assert all(s.duration > 0 for s in result.shards)
+
+    def test_order_and_limit(self, resource_model, attr, shards):
+        plan = response({"kind": "KIND_ALWAYS_ALLOWED"})
+        result = fan_out(plan, resource_model, attr, _ALIASES, order_by=["-aNumber"], limit=2)
+        assert [r.name for r in result.rows] == ["resource3", "resource2"]
+        # pushed down to each database
+        assert [len(s.rows) for s in result.shards] == [2, 1]
+
+        result = fan_out(plan, resource_model, attr, _ALIASES, order_by=["-ownedBy", "name"])
+        assert [r.name for r in result.rows] == ["resource3", "resource1", "resource2"]
+
+    def test_shard_routing(self, resource_model, attr, shards, django_assert_num_queries):
+        result = fan_out(
+            leaf_plan("eq", "ownedBy", 2),
+            resource_model,
+            attr,
+            _ALIASES,
+            shard_key="request.resource.attr.ownedBy",
+            shard_for=lambda owner: _ALIASES[owner - 1],
+        )
+        assert [s.shard for s in result.shards] == ["shard"]
+        assert [r.name for r in result.rows] == ["resource3"]
+
+        denied = response({"kind": "KIND_ALWAYS_DENIED"})
+        with django_assert_num_queries(0):
+            assert fan_out(denied, resource_model, attr, _ALIASES) == ([], [])
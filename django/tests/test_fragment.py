@@ -0,0 +1,172 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from django.db.models import Q
+from helpers import conditional, expr, leaf, response
+
+from cerbos_django.fragment import FragmentCache, get_precompiled_query
+from cerbos_django.query import get_query
+
+from testproject.testapp import models
+
+
+@pytest.fixture
+def invoices(transactional_db):
+    models.Invoice.objects.bulk_create(
+        [
+            models.Invoice(id=1, amount=Decimal("5.00"), issuedAt=datetime(2024, 1, 1)),
+            models.Invoice(id=2, amount=Decimal("50.00"), issuedAt=datetime(2024, 6, 1)),
+            models.Invoice(id=3, amount=Decimal("500.00"), issuedAt=datetime(2025, 1, 1)),
+        ]
+    )
+
+
+def _names(model, query) -> list:
+    return sorted(model.objects.filter(query).values_list("name", flat=True))
+
+
+class TestGetPrecompiledQuery:
+    def test_same_rows(self, resource_model, testdata, django_assert_num_queries):
+        attr = {
+            "request.resource.attr.aString": resource_model.aString,
+            "request.resource.attr.aNumber": resource_model.aNumber,
+            "request.resource.attr.aBool": resource_model.aBool,
+        }
+        plan = conditional(
+            expr(
+                "and",
+                leaf("in", "aString", ["string", "anotherString"]),
+                leaf("ge", "aNumber", 2),
+                leaf("eq", "aBool", True),
+            )
+        )
+        cache = FragmentCache()
+        query = get_precompiled_query(plan, resource_model, attr, cache=cache)
+        with django_assert_num_queries(1):
+            names = _names(resource_model, query)
+        assert names == _names(resource_model, get_query(plan, attr)) == ["resource3"]
+
+    def test_cached_per_shape(self, resource_model, testdata):
+        attr = {"request.resource.attr.aNumber": resource_model.aNumber}
+        cache = FragmentCache()
+        for number in (1, 2, 3):
+            query = get_precompiled_query(
+                conditional(leaf("eq", "aNumber", number)), resource_model, attr, cache=cache
+            )
+            assert _names(resource_model, query) == [f"resource{number}"]
+        assert (cache.hits, cache.misses, len(cache)) == (2, 1, 1)
+
+        # a list of another length is another shape
+        query = get_precompiled_query(
+            conditional(leaf("in", "aNumber", [1, 3])), resource_model, attr, cache=cache
+        )
+        assert _names(resource_model, query) == ["resource1", "resource3"]
+        assert len(cache) == 2
+
+    def test_converted_values(self, resource_model, testdata):
+        # digit strings and floats compared with an integer foreign key
+        attr = {"request.resource.attr.ownedBy": resource_model.ownedBy}
+        cache = FragmentCache()
+        for owner, names in (("1", ["resource1", "resource2"]), ("2", ["resource3"])):
+            query = get_precompiled_query(
+                conditional(leaf("eq", "ownedBy", owner)), resource_model, attr, cache=cache
+            )
+            assert _names(resource_model, query) == names
+        query = get_precompiled_query(
+            conditional(leaf("eq", "ownedBy", 2.0)), resource_model, attr, cache=cache
+        )
+        assert _names(resource_model, query) == ["resource3"]
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_inexact_conversions(self, resource_model, testdata):
+        # Django rounds `1.5` up for `gte` and `lt` on an integer column, which the cached
+        # conversion from `2.0` can't reproduce
+        attr = {"request.resource.attr.aNumber": resource_model.aNumber}
+        cache = FragmentCache()
+        for operator, warm in (("ge", 2.0), ("lt", 2.0)):
+            get_precompiled_query(
+                conditional(leaf(operator, "aNumber", warm)), resource_model, attr, cache=cache
+            )
+            plan = conditional(leaf(operator, "aNumber", 1.5))
+            query = get_precompiled_query(plan, resource_model, attr, cache=cache)
+            assert _names(resource_model, query) == _names(resource_model, get_query(plan, attr))
+        assert _names(resource_model, query) == ["resource1"]
+
+    def test_fallback(self, resource_model, testdata):
+        # the override wraps the value in `%`s, which can't be reproduced from the compiled SQL
+        attr = {"request.resource.attr.aString": resource_model.aString}
+        overrides = {"contains": lambda c, v: Q(**{c + "__contains": v})}
+        cache = FragmentCache()
+        for _ in range(2):
+            query = get_precompiled_query(
+                conditional(leaf("contains", "aString", "other")),
+                resource_model,
+                attr,
+                overrides,
+                cache=cache,
+            )
+            assert "RawSQL" not in str(query)
+            assert _names(resource_model, query) == ["resource3"]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_constant_plans(self, resource_model, testdata):
+        attr = {"request.resource.attr.aBool": resource_model.aBool}
+        allowed = response({"kind": "KIND_ALWAYS_ALLOWED"})
+        query = get_precompiled_query(allowed, resource_model, attr)
+        assert len(_names(resource_model, query)) == 3
+
+    def test_exists_subqueries(self, resource_model, testdata):
+        condition = {
+            "expression": {
+                "operator": "exists",
+                "operands": [
+                    {"variable": "request.resource.attr.related"},
+                    {
+                        "expression": {
+                            "operator": "lambda",
+                            "operands": [
+                                {
+                                    "expression": {
+                                        "operator": "eq",
+                                        "operands": [
+                                            {"variable": "x.aString"},
+                                            {"value": "string2"},
+                                        ],
+                                    }
+                                },
+                                {"variable": "x"},
+                            ],
+                        }
+                    },
+                ],
+            }
+        }
+        attr = {"request.resource.attr.related": resource_model.related}
+        query = get_precompiled_query(
+            conditional(condition),
+            resource_model,
+            attr,
+            exists_subqueries=True,
+            cache=FragmentCache(),
+        )
+        assert _names(resource_model, query) == ["resource2", "resource3"]
+
+    @pytest.mark.parametrize(
+        "attr_name,operator,values",
+        [
+            ("amount", "gt", [(10, [2, 3]), (99, [3]), (1000, [])]),
+            ("amount", "lt", [(10, [1]), (99, [1, 2])]),
+            ("issuedAt", "gt", [("2024-03-01T00:00:00", [2, 3]), ("2024-12-01T00:00:00", [3])]),
+        ],
+    )
+    def test_non_numeric_columns(self, invoices, attr_name, operator, values):
+        # Django converts values for decimal and datetime columns into types whose sentinels
+        # can't be recognised, so these shapes always go through `get_query`
+        attr = {f"request.resource.attr.{attr_name}": getattr(models.Invoice, attr_name)}
+        cache = FragmentCache()
+        for value, ids in values:
+            plan = conditional(leaf(operator, attr_name, value))
+            query = get_precompiled_query(plan, models.Invoice, attr, cache=cache)
+            assert "RawSQL" not in str(query)
+            assert sorted(models.Invoice.objects.filter(query).values_list("id", flat=True)) == ids
@@ -0,0 +1,30 @@
+import os
+
+from cerbos_query_core.importtime import import_times
+
+# Modules which only plans built with the HTTP or gRPC clients need
+_CLIENT_MODULES = (
+    "google.protobuf",
+    "cerbos.engine.v1.engine_pb2",
+    "cerbos.response.v1.response_pb2",
+    "cerbos.sdk.model",
+    "dataclasses_json",
+)
+
+
+def _env() -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "testproject.settings",
+        "PYTHONPATH": os.pathsep.join([os.path.join(root, "src"), root]),
+    }
+
+
+class TestImports:
+    def test_client_modules_not_imported(self):
+        times = import_times("import django; django.setup(); import cerbos_django", _env())
+        assert "cerbos_django" in times
+        imported = [m for m in _CLIENT_MODULES if m in times]
+        assert imported == [], f"cerbos_django ({times['cerbos_django']}us) imports {imported}"
+
@@ -0,0 +1,106 @@
+import pytest
+from django.db import NotSupportedError, connection, transaction
+from helpers import leaf_plan
+
+from cerbos_django.fragment import FragmentCache, get_precompiled_query
+from cerbos_django.in_list import drop_temp_tables, large_in_fn
+from cerbos_django.query import get_query
+
+
+# long enough to pass a threshold of 2, with values matching no rows
+_NUMBERS = [1, 3, *range(100, 150)]
+_STRINGS = ["string", "anotherString", *(f"s{n}" for n in range(50))]
+
+
+@pytest.fixture
+def attr(resource_model):
+    return {
+        "request.resource.attr.aNumber": resource_model.aNumber,
+        "request.resource.attr.aString": resource_model.aString,
+        "request.resource.attr.ownedBy": resource_model.ownedBy,
+    }
+
+
+def _names(model, query) -> list:
+    return sorted(model.objects.filter(query).values_list("name", flat=True))
+
+
+class TestLargeInFn:
+    @pytest.mark.parametrize("strategy", ["array", "values", "temp_table"])
+    def test_strategies(self, strategy, resource_model, attr, testdata):
+        overrides = {"in": large_in_fn(2, strategy)}
+        for plan in (leaf_plan("in", "aNumber", _NUMBERS), leaf_plan("in", "aString", _STRINGS)):
+            query = get_query(plan, attr, overrides)
+            sql, _ = resource_model.objects.filter(query).query.sql_with_params()
+            assert "%s, %s" not in sql
+            assert _names(resource_model, query) == ["resource1", "resource3"]
+
+        # a foreign key
+        query = get_query(leaf_plan("in", "ownedBy", [2, *range(100, 150)]), attr, overrides)
+        assert _names(resource_model, query) == ["resource3"]
+
+    def test_below_threshold(self, resource_model, attr, testdata):
+        query = get_query(leaf_plan("in", "aNumber", _NUMBERS), attr, {"in": large_in_fn()})
+        _, params = resource_model.objects.filter(query).query.sql_with_params()
+        assert len(params) == len(_NUMBERS)
+
+    def test_array_unsupported(self, resource_model, attr, monkeypatch):
+        query = get_query(leaf_plan("in", "aNumber", _NUMBERS), attr, {"in": large_in_fn(2)})
+        monkeypatch.setattr(connection, "vendor", "mysql")
+        with pytest.raises(NotSupportedError):
+            resource_model.objects.filter(query).query.sql_with_params()
+
+    def test_precompiled(self, resource_model, attr, testdata):
+        # a parameter holding several values can't be substituted, so the shape uses `get_query`
+        # rather than the first plan's values
+        overrides = {"in": large_in_fn(2)}
+        cache = FragmentCache()
+        for first in (1, 2):
+            plan = leaf_plan("in", "aNumber", [first, *range(100, 150)])
+            query = get_precompiled_query(plan, resource_model, attr, overrides, cache=cache)
+            assert "RawSQL" not in str(query)
+            assert _names(resource_model, query) == [f"resource{first}"]
+
+    def test_temp_table_lifetime(self, resource_model, attr, testdata):
+        def temp_tables():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT name FROM sqlite_temp_master WHERE type = 'table'")
+                return cursor.fetchall()
+
+        drop_temp_tables()
+        # digit strings, stored with the column's type
+        plan = leaf_plan("in", "aNumber", ["1", "3", *map(str, range(100, 150))])
+        query = get_query(plan, attr, {"in": large_in_fn(2, "temp_table")})
+        queryset = resource_model.objects.filter(query).order_by("name")
+        # created when the query runs, not when it's compiled
+        assert "cerbos_in_" in str(queryset.query)
+        assert temp_tables() == []
+        assert list(queryset.values_list("name", flat=True)) == ["resource1", "resource3"]
+        assert temp_tables() == []
+
+        # not dropped while its results are read, but by the next statement after that
+        rows = queryset.iterator(chunk_size=1)
+        assert next(rows).name == "resource1"
+        assert len(temp_tables()) == 1
+        assert [r.name for r in rows] == ["resource3"]
+        assert temp_tables() == []
+
+        # in a transaction, which failed drops mustn't abort
+        with transaction.atomic():
+            rows = queryset.iterator(chunk_size=1)
+            next(rows)
+            assert resource_model.objects.count() == 3
+            list(rows)
+            drop_temp_tables()
+            assert temp_tables() == []
+
+    def test_temp_table_precompiled(self, resource_model, attr):
+        overrides = {"in": large_in_fn(2, "temp_table")}
+        with pytest.raises(ValueError):
+            get_precompiled_query(
+                leaf_plan("in", "aNumber", _NUMBERS), resource_model, attr, overrides
+            )
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            large_in_fn(strategy="unnest")
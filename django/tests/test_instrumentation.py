@@ -0,0 +1,74 @@
+from cerbos.response.v1 import response_pb2
+from cerbos.sdk.model import PlanResourcesResponse
+from google.protobuf.json_format import ParseDict
+from helpers import response
+
+from cerbos_django import get_query
+
+
+_CONDITION = {
+    "expression": {
+        "operator": "or",
+        "operands": [
+            {
+                "expression": {
+                    "operator": "eq",
+                    "operands": [
+                        {"variable": "request.resource.attr.aBool"},
+                        {"value": True},
+                    ],
+                }
+            },
+            {
+                "expression": {
+                    "operator": "not",
+                    "operands": [
+                        {
+                            "expression": {
+                                "operator": "eq",
+                                "operands": [
+                                    {"variable": "request.resource.attr.ownedBy"},
+                                    {"value": "1"},
+                                ],
+                            }
+                        }
+                    ],
+                }
+            },
+        ],
+    }
+}
+_CONDITIONAL = response({"kind": "KIND_CONDITIONAL", "condition": _CONDITION})
+
+
+class TestInstrumentation:
+    def test_conditional_metrics(self, resource_model, user_model):
+        attr = {
+            "request.resource.attr.aBool": resource_model.aBool,
+            "request.resource.attr.ownedBy": [resource_model.ownedBy, user_model.name],
+        }
+        for plan in (
+            PlanResourcesResponse.from_dict(_CONDITIONAL),
+            ParseDict(_CONDITIONAL, response_pb2.PlanResourcesResponse()),
+        ):
+            collected = []
+            get_query(plan, attr, on_metrics=collected.append)
+
+            (m,) = collected
+            assert m.filter_kind == "KIND_CONDITIONAL"
+            assert m.conversion_time > 0
+            assert m.traversal_time > 0
+            assert (m.node_count, m.max_depth) == (8, 4)
+            # ownedBy__name traverses the ownedBy relation
+            assert m.joins == 1
+            assert m.subqueries == 0
+
+    def test_constant_filter_metrics(self):
+        for kind in ("KIND_ALWAYS_ALLOWED", "KIND_ALWAYS_DENIED"):
+            collected = []
+            plan = ParseDict(response({"kind": kind}), response_pb2.PlanResourcesResponse())
+            get_query(plan, {}, on_metrics=collected.append)
+            assert [m.filter_kind for m in collected] == [kind]
+            assert collected[0].node_count == 0
+            # the plan is still parsed
+            assert collected[0].conversion_time > 0
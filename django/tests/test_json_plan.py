@@ -0,0 +1,114 @@
+import json
+
+import pytest
+from cerbos.sdk.model import PlanResourcesResponse
+from cerbos_query_core import parse_condition
+from helpers import response
+
+from cerbos_django import get_query, parse_plan_json, plan_hash, select_shards
+
+
+def _response(filter: dict) -> dict:
+    return {
+        **response(filter),
+        "meta": {"filterDebug": "request.resource.attr.related.exists(x, x in [1, 10])"},
+    }
+
+
+# request.resource.attr.related.exists(x, x in [1, 10])
+_EXISTS = _response(
+    {
+        "kind": "KIND_CONDITIONAL",
+        "condition": {
+            "expression": {
+                "operator": "exists",
+                "operands": [
+                    {"variable": "request.resource.attr.related"},
+                    {
+                        "expression": {
+                            "operator": "lambda",
+                            "operands": [
+                                {
+                                    "expression": {
+                                        "operator": "in",
+                                        "operands": [
+                                            {"variable": "x"},
+                                            {"value": [1, 10]},
+                                        ],
+                                    }
+                                },
+                                {"variable": "x"},
+                            ],
+                        }
+                    },
+                ],
+            }
+        },
+    }
+)
+
+
+class TestJsonPlan:
+    @pytest.mark.parametrize("encode", [json.dumps, lambda d: json.dumps(d).encode()])
+    def test_raw_json(self, resource_model, testdata, encode):
+        attr = {"request.resource.attr.related": resource_model.related}
+        query = get_query(encode(_EXISTS), attr)
+        assert query == get_query(PlanResourcesResponse.from_dict(_EXISTS), attr)
+
+        res = resource_model.objects.filter(query)
+        assert {r.name for r in res} == {"resource1", "resource2"}
+
+    def test_constant_filters(self, resource_model, testdata):
+        allowed = json.dumps(_response({"kind": "KIND_ALWAYS_ALLOWED"}))
+        denied = json.dumps(_response({"kind": "KIND_ALWAYS_DENIED"}))
+        assert resource_model.objects.filter(get_query(allowed, {})).count() == 3
+        assert resource_model.objects.filter(get_query(denied, {})).count() == 0
+
+    def test_metrics(self, resource_model):
+        attr = {"request.resource.attr.related": resource_model.related}
+        collected = []
+        get_query(json.dumps(_EXISTS), attr, on_metrics=collected.append)
+        (m,) = collected
+        assert m.filter_kind == "KIND_CONDITIONAL"
+        assert m.conversion_time > 0
+        assert m.joins == 1
+
+    def test_parsed_plan_reuse(self, resource_model):
+        # translating `exists` must leave the parsed condition untouched
+        plan = parse_plan_json(json.dumps(_EXISTS))
+        attr = {"request.resource.attr.related": resource_model.related}
+        assert get_query(plan, attr) == get_query(plan, attr)
+        assert plan.condition == parse_condition(_EXISTS["filter"]["condition"])
+
+    def test_plan_hash(self):
+        sdk_plan = PlanResourcesResponse.from_dict(_EXISTS)
+        other = json.loads(json.dumps(_EXISTS))
+        other["requestId"] = "2"
+        assert plan_hash(sdk_plan) == plan_hash(json.dumps(other))
+        assert plan_hash(sdk_plan) != plan_hash(_response({"kind": "KIND_ALWAYS_ALLOWED"}))
+
+    def test_select_shards(self):
+        # resources partitioned across databases by owner
+        plan = _response(
+            {
+                "kind": "KIND_CONDITIONAL",
+                "condition": {
+                    "expression": {
+                        "operator": "in",
+                        "operands": [
+                            {"variable": "request.resource.attr.ownedBy"},
+                            {"value": [1, 3]},
+                        ],
+                    }
+                },
+            }
+        )
+        aliases = ["owners-0", "owners-1", "owners-2"]
+
+        def alias_for(owner: int) -> str:
+            return aliases[owner % 3]
+
+        attribute = "request.resource.attr.ownedBy"
+        assert select_shards(plan, attribute, alias_for, aliases) == ["owners-0", "owners-1"]
+        # `related` isn't the shard key
+        assert select_shards(_EXISTS, attribute, alias_for, aliases) == aliases
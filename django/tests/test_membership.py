@@ -0,0 +1,36 @@
+import pytest
+from helpers import leaf_plan, response
+
+from cerbos_django.membership import authorized_ids
+
+
+@pytest.fixture
+def attr(resource_model):
+    return {
+        "request.resource.attr.aBool": resource_model.aBool,
+        "request.resource.attr.nestedString": (resource_model.related, "aString"),
+    }
+
+
+@pytest.mark.usefixtures("testdata")
+class TestAuthorizedIds:
+    def test_primary_keys(self, resource_model, attr):
+        ids = authorized_ids(leaf_plan("eq", "aBool", True), resource_model, attr)
+        pks = dict(resource_model.objects.values_list("name", "pk"))
+        assert sorted(ids) == sorted([pks["resource1"], pks["resource3"]])
+        assert pks["resource2"] not in ids
+
+    def test_id_field(self, resource_model, attr):
+        # resource2 is related to both nested resources: its name is only listed once
+        ids = authorized_ids(
+            leaf_plan("in", "nestedString", ["string1", "string2"]),
+            resource_model,
+            attr,
+            id_field="name",
+        )
+        assert ids == frozenset({"resource1", "resource2", "resource3"})
+
+    def test_denied(self, resource_model, attr, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            ids = authorized_ids(response({"kind": "KIND_ALWAYS_DENIED"}), resource_model, attr)
+        assert len(ids) == 0
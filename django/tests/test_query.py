@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from cerbos.engine.v1 import engine_pb2
 from cerbos.sdk.grpc.client import CerbosClient as GrpcCerbosClient
@@ -7,6 +9,7 @@ from cerbos.sdk.model import (
     PlanResourcesResponse,
 )
 from cerbos.sdk.model import Principal
+from cerbos_query_core import CONDITIONAL, And, Compare, Or, Plan, parse_plan
 from django.db.models import Q
 from google.protobuf.json_format import ParseDict
 from google.protobuf.struct_pb2 import Value
@@ -520,3 +523,143 @@ class TestGetQueryOverrides:
         res = qs.all()
         assert len(res) == 1
         assert res[0].name == "resource1"
+
+
+def _lambda_plan(operator: str, collection: str, body: dict) -> PlanResourcesResponse:
+    return PlanResourcesResponse(
+        filter=PlanResourcesFilter.from_dict(
+            {
+                "kind": PlanResourcesFilterKind.CONDITIONAL,
+                "condition": {
+                    "expression": {
+                        "operator": operator,
+                        "operands": [
+                            {"variable": f"request.resource.attr.{collection}"},
+                            {
+                                "expression": {
+                                    "operator": "lambda",
+                                    "operands": [{"expression": body}, {"variable": "x"}],
+                                }
+                            },
+                        ],
+                    }
+                },
+            }
+        ),
+        **_default_resp_params(),
+    )
+
+
+def _body(operator: str, variable: str, value) -> dict:
+    return {"operator": operator, "operands": [{"variable": variable}, {"value": value}]}
+
+
+class TestExistsSubqueries:
+    def test_no_duplicate_rows(self, resource_model, testdata, django_assert_num_queries):
+        # resource2 is related to both
+        plan = _lambda_plan("exists", "related", _body("in", "x", [1, 2]))
+        attr = {"request.resource.attr.related": resource_model.related}
+
+        joined = resource_model.objects.filter(get_query(plan, attr))
+        assert len(joined) == 4
+
+        collected = []
+        query = get_query(plan, attr, on_metrics=collected.append, exists_subqueries=True)
+        with django_assert_num_queries(1):
+            names = [r.name for r in resource_model.objects.filter(query)]
+        assert sorted(names) == ["resource1", "resource2", "resource3"]
+        assert (collected[0].joins, collected[0].subqueries) == (0, 1)
+
+    def test_related_fields(self, resource_model, testdata):
+        plan = _lambda_plan("exists", "related", _body("eq", "x.aString", "string2"))
+        attr = {"request.resource.attr.related": resource_model.related}
+        query = get_query(plan, attr, exists_subqueries=True)
+        names = resource_model.objects.filter(query).values_list("name", flat=True)
+        assert sorted(names) == ["resource2", "resource3"]
+
+    def test_all(self, resource_model, testdata, django_assert_num_queries):
+        plan = _lambda_plan("all", "related", _body("eq", "x.aBool", True))
+        attr = {"request.resource.attr.related": resource_model.related}
+        query = get_query(plan, attr, exists_subqueries=True)
+        with django_assert_num_queries(1):
+            names = list(resource_model.objects.filter(query).values_list("name", flat=True))
+        assert names == ["resource1"]
+
+    def test_all_requires_subqueries(self, resource_model):
+        plan = _lambda_plan("all", "related", _body("eq", "x.aBool", True))
+        attr = {"request.resource.attr.related": resource_model.related}
+        with pytest.raises(ValueError, match="'all' .* requires exists_subqueries"):
+            get_query(plan, attr)
+
+    def test_reverse_foreign_key(self, user_model, resource_model, testdata):
+        plan = _lambda_plan("exists", "ownedResources", _body("eq", "x.aString", "string"))
+        attr = {"request.resource.attr.ownedResources": user_model.ownedResources}
+        query = get_query(plan, attr, exists_subqueries=True)
+        assert list(user_model.objects.filter(query).values_list("id", flat=True)) == [1]
+
+        # NOT EXISTS
+        negated = user_model.objects.filter(~query).values_list("id", flat=True)
+        assert list(negated) == [2]
+
+    def test_outer_variable_in_body(self, resource_model):
+        plan = _lambda_plan("exists", "related", _body("eq", "request.resource.attr.aBool", True))
+        attr = {
+            "request.resource.attr.related": resource_model.related,
+            "request.resource.attr.aBool": resource_model.aBool,
+        }
+        with pytest.raises(ValueError):
+            get_query(plan, attr, exists_subqueries=True)
+
+
+class TestConcurrentTranslation:
+    def test_shared_parsed_plan(self, resource_model):
+        # One parsed plan, cached and translated from many threads at once
+        plan = parse_plan(_lambda_plan("exists", "related", _body("in", "x", [1, 2])))
+        snapshot = (plan.condition, hash(plan.condition), repr(plan.condition))
+        attr = {"request.resource.attr.related": resource_model.related}
+
+        def translate(i: int) -> str:
+            q = get_query(plan, attr, exists_subqueries=i % 2 == 0)
+            return str(resource_model.objects.filter(q).query)
+
+        expected = {translate(0), translate(1)}
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = set(executor.map(translate, range(400)))
+
+        assert results == expected
+        assert (plan.condition, hash(plan.condition), repr(plan.condition)) == snapshot
+
+
+class TestKnownAttributes:
+    def test_folded(self, resource_model, testdata, django_assert_num_queries):
+        # request.resource.attr.ownedBy == 1 && (aNumber > 1 || aBool == true)
+        plan = Plan(
+            CONDITIONAL,
+            And(
+                [
+                    Compare("eq", "request.resource.attr.ownedBy", 1),
+                    Or(
+                        [
+                            Compare("gt", "request.resource.attr.aNumber", 1),
+                            Compare("eq", "request.resource.attr.aBool", True),
+                        ]
+                    ),
+                ]
+            ),
+        )
+        attr = {
+            "request.resource.attr.ownedBy": resource_model.ownedBy,
+            "request.resource.attr.aNumber": resource_model.aNumber,
+            "request.resource.attr.aBool": resource_model.aBool,
+        }
+        # listing one owner's resources
+        owned = resource_model.objects.filter(ownedBy=1)
+        query = get_query(plan, attr, known_attributes={"request.resource.attr.ownedBy": 1})
+        assert "ownedBy" not in str(query)
+        names = owned.filter(query).values_list("name", flat=True)
+        assert sorted(names) == ["resource1", "resource2"]
+
+        # another owner's, with no query needed
+        query = get_query(plan, attr, known_attributes={"request.resource.attr.ownedBy": 2})
+        with django_assert_num_queries(0):
+            assert list(resource_model.objects.filter(query)) == []
@@ -0,0 +1,204 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from django.db import transaction
+from django.db.models.expressions import RawSQL
+from helpers import conditional, expr, leaf, leaf_plan
+
+from cerbos_django.fragment import FragmentCache, get_precompiled_query
+from cerbos_django.query import get_query
+from cerbos_django.result_cache import AuthorizedResultCache, UntrackedSQL, query_tables
+
+from testproject.testapp import models
+
+
+@pytest.fixture
+def attr(resource_model):
+    return {
+        "request.resource.attr.aBool": resource_model.aBool,
+        "request.resource.attr.ownerName": "ownedBy__name",
+        "request.resource.attr.relatedString": (resource_model.related, "aString"),
+    }
+
+
+@pytest.fixture
+def queryset(resource_model, attr):
+    def queryset(attr_name, value, attr=attr):
+        return resource_model.objects.filter(get_query(leaf_plan("eq", attr_name, value), attr))
+
+    return queryset
+
+
+@pytest.fixture
+def cache():
+    cache = AuthorizedResultCache()
+    cache.install()
+    yield cache
+    cache.uninstall()
+
+
+def _names(results) -> list:
+    return sorted(r.name for r in results)
+
+
+@pytest.mark.parametrize("exists_subqueries", [False, True])
+def test_tables(resource_model, user_model, nested_resource_model, attr, exists_subqueries):
+    plan = conditional(
+        expr("or", leaf("eq", "ownerName", "user1"), leaf("eq", "relatedString", "string1"))
+    )
+    q = get_query(plan, attr, exists_subqueries=exists_subqueries)
+    assert query_tables(resource_model.objects.filter(q).query) == {
+        resource_model._meta.db_table,
+        user_model._meta.db_table,
+        resource_model.related.through._meta.db_table,
+        nested_resource_model._meta.db_table,
+    }
+
+
+def test_precompiled_tables(resource_model, user_model, attr):
+    plan = leaf_plan("eq", "ownerName", "user1")
+    q = get_precompiled_query(plan, resource_model, attr, cache=FragmentCache())
+    assert "RawSQL" in str(q)
+    assert query_tables(resource_model.objects.filter(q).query) == {
+        resource_model._meta.db_table,
+        user_model._meta.db_table,
+    }
+
+    with pytest.raises(UntrackedSQL):
+        query_tables(resource_model.objects.filter(pk__in=RawSQL("SELECT 1", [])).query)
+
+
+def test_inherited_tables():
+    assert query_tables(models.RecurringInvoice.objects.all().query) == {
+        models.RecurringInvoice._meta.db_table,
+        models.Invoice._meta.db_table,
+    }
+
+
+@pytest.mark.usefixtures("testdata")
+class TestAuthorizedResultCache:
+    def test_hit(self, cache, queryset, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            first = cache.get_results(queryset("aBool", True))
+            second = cache.get_results(queryset("aBool", True))
+
+        assert _names(first) == ["resource1", "resource3"]
+        assert second == first
+        assert (cache.cache.hits, cache.cache.misses) == (1, 1)
+
+    def test_final_queryset(self, cache, queryset, django_assert_num_queries):
+        # ordering and slicing are part of the key
+        with django_assert_num_queries(2):
+            for _ in range(2):
+                first = cache.get_results(queryset("aBool", True).order_by("-name")[:1])
+                second = cache.get_results(queryset("aBool", True).order_by("name")[:1])
+
+        assert _names(first) == ["resource3"]
+        assert _names(second) == ["resource1"]
+
+    def test_invalidated_by_save(self, cache, queryset, resource_model):
+        cache.get_results(queryset("aBool", True))
+        resource = resource_model.objects.get(name="resource2")
+        resource.aBool = True
+        resource.save()
+        results = cache.get_results(queryset("aBool", True))
+
+        assert _names(results) == ["resource1", "resource2", "resource3"]
+
+    def test_rolled_back_writes(self, cache, queryset, resource_model):
+        with pytest.raises(RuntimeError), transaction.atomic():
+            resource = resource_model.objects.get(name="resource2")
+            resource.aBool = True
+            resource.save()
+            # read by the transaction which wrote, so not cached
+            assert len(cache.get_results(queryset("aBool", True))) == 3
+            raise RuntimeError
+        results = cache.get_results(queryset("aBool", True))
+
+        assert _names(results) == ["resource1", "resource3"]
+        assert cache.cache.misses == 1
+
+    def test_invalidated_by_related_save(self, cache, queryset, user_model):
+        assert _names(cache.get_results(queryset("ownerName", "user1"))) == [
+            "resource1",
+            "resource2",
+        ]
+
+        user = user_model.objects.get(name="user1")
+        user.name = "renamed"
+        user.save()
+        assert cache.get_results(queryset("ownerName", "user1")) == []
+
+    def test_invalidated_by_m2m_changed(
+        self, cache, queryset, resource_model, nested_resource_model
+    ):
+        cache.get_results(queryset("relatedString", "string2"))
+        resource_model.objects.get(name="resource1").related.add(
+            nested_resource_model.objects.get(aString="string2")
+        )
+        results = cache.get_results(queryset("relatedString", "string2"))
+
+        assert _names(results) == ["resource1", "resource2", "resource3"]
+
+    def test_unrelated_writes(
+        self, cache, queryset, resource_model, nested_resource_model, django_assert_num_queries
+    ):
+        # only reads the resource table
+        attr = {"request.resource.attr.aBool": resource_model.aBool}
+        cache.get_results(queryset("aBool", True, attr))
+        nested_resource_model.objects.create(aString="string3", aNumber=3, aBool=True)
+        with django_assert_num_queries(0):
+            cache.get_results(queryset("aBool", True, attr))
+
+    def test_invalidate(self, cache, queryset, resource_model):
+        cache.get_results(queryset("aBool", True))
+        # sends no signals
+        resource_model.objects.update(aBool=False)
+        assert len(cache.get_results(queryset("aBool", True))) == 2
+
+        cache.invalidate(resource_model._meta.db_table)
+        assert cache.get_results(queryset("aBool", True)) == []
+
+    def test_precompiled_invalidated_by_related_save(self, cache, resource_model, user_model, attr):
+        def results():
+            plan = leaf_plan("eq", "ownerName", "user1")
+            q = get_precompiled_query(plan, resource_model, attr, cache=FragmentCache())
+            return cache.get_results(resource_model.objects.filter(q))
+
+        assert _names(results()) == ["resource1", "resource2"]
+        user = user_model.objects.get(name="user1")
+        user.name = "renamed"
+        user.save()
+        assert results() == []
+
+    def test_untracked_sql(self, cache, resource_model, django_assert_num_queries):
+        queryset = resource_model.objects.filter(
+            pk__in=RawSQL(f"SELECT id FROM {resource_model._meta.db_table}", [])
+        )
+        with django_assert_num_queries(2):
+            for _ in range(2):
+                assert len(cache.get_results(queryset.all())) == 3
+        assert cache.cache.misses == 0
+
+
+def test_inherited_writes(cache, transactional_db):
+    def amounts(model):
+        return sorted(i.amount for i in cache.get_results(model.objects.all()))
+
+    models.RecurringInvoice.objects.create(
+        amount=Decimal("5.00"), issuedAt=datetime(2024, 1, 1), interval=30
+    )
+    assert amounts(models.Invoice) == amounts(models.RecurringInvoice) == [Decimal("5.00")]
+
+    # saving the child writes the parent's table
+    invoice = models.RecurringInvoice.objects.get()
+    invoice.amount = Decimal("6.00")
+    invoice.save()
+    assert amounts(models.Invoice) == [Decimal("6.00")]
+
+    # and saving the parent changes the child's rows
+    invoice = models.Invoice.objects.get()
+    invoice.amount = Decimal("7.00")
+    invoice.save()
+    assert amounts(models.RecurringInvoice) == [Decimal("7.00")]
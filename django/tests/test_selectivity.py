@@ -0,0 +1,60 @@
+import pytest
+from helpers import leaf, sdk_plan
+
+from cerbos_django import get_query, selectivity_from_db
+from cerbos_django.selectivity import resolve_lookup
+
+
+_COND = {
+    "expression": {
+        "operator": "and",
+        "operands": [
+            leaf("eq", "aBool", True),
+            leaf("eq", "name", "resource1"),
+            leaf("gt", "aNumber", 0),
+        ],
+    }
+}
+_HINTS = {
+    "request.resource.attr.aBool": 0.5,
+    "request.resource.attr.name": 0.01,
+}
+
+
+class TestGetQuerySelectivity:
+    def test_emitted_order(self, resource_model, testdata):
+        attr = {
+            "request.resource.attr.aBool": resource_model.aBool,
+            "request.resource.attr.name": resource_model.name,
+            "request.resource.attr.aNumber": resource_model.aNumber,
+        }
+        query = get_query(sdk_plan(_COND), attr, selectivity=_HINTS)
+        assert [child[0] for child in query.children] == [
+            "name",
+            "aNumber__gt",
+            "aBool",
+        ]
+
+        res = resource_model.objects.filter(query)
+        assert len(res) == 1
+        assert res[0].name == "resource1"
+
+    def test_selectivity_from_db_exact(self, resource_model, nested_resource_model, testdata):
+        attr = {
+            "request.resource.attr.aBool": resource_model.aBool,
+            "request.resource.attr.nested.aString": [
+                resource_model.nested,
+                nested_resource_model.aString,
+            ],
+        }
+        assert selectivity_from_db(resource_model, attr) == {}
+        hints = selectivity_from_db(resource_model, attr, exact=True)
+        assert hints == {
+            "request.resource.attr.aBool": pytest.approx(1 / 2),
+            "request.resource.attr.nested.aString": pytest.approx(1 / 2),
+        }
+
+    def test_resolve_lookup(self, resource_model, nested_resource_model):
+        model, field = resolve_lookup(resource_model, "nested__aString")
+        assert model is nested_resource_model
+        assert field.name == "aString"
@@ -0,0 +1,67 @@
+import pytest
+from django.db.models import CharField, Value
+from helpers import leaf_plan, response
+
+from cerbos_django.union import KindQuery, get_union_queryset
+
+
+_DENIED = response({"kind": "KIND_ALWAYS_DENIED"})
+
+
+@pytest.fixture
+def resource_kind(resource_model):
+    def kind(plan) -> KindQuery:
+        return KindQuery(
+            plan,
+            resource_model,
+            {"request.resource.attr.aBool": resource_model.aBool},
+            {
+                "kind": Value("resource", output_field=CharField()),
+                "key": "id",
+                "title": "name",
+            },
+        )
+
+    return kind
+
+
+@pytest.fixture
+def user_kind(user_model):
+    def kind(plan) -> KindQuery:
+        return KindQuery(
+            plan,
+            user_model,
+            {"request.resource.attr.role": user_model.role},
+            {
+                "kind": Value("user", output_field=CharField()),
+                "key": "id",
+                "title": "name",
+            },
+        )
+
+    return kind
+
+
+class TestGetUnionQueryset:
+    def test_union_all(self, resource_kind, user_kind, testdata, django_assert_num_queries):
+        queryset = get_union_queryset(
+            [
+                resource_kind(leaf_plan("eq", "aBool", True)),
+                user_kind(leaf_plan("eq", "role", "user")),
+            ],
+            order_by=["-title"],
+            limit=2,
+        )
+        with django_assert_num_queries(1):
+            rows = [(r["kind"], r["title"]) for r in queryset]
+        assert rows == [("user", "user2"), ("resource", "resource3")]
+
+    def test_denied_kinds(self, resource_kind, user_kind, testdata):
+        admins = user_kind(leaf_plan("eq", "role", "admin"))
+        queryset = get_union_queryset([resource_kind(_DENIED), admins])
+        assert list(queryset) == [{"kind": "user", "key": 1, "title": "user1"}]
+
+        assert list(get_union_queryset([resource_kind(_DENIED), user_kind(_DENIED)])) == []
+
+        with pytest.raises(ValueError):
+            get_union_queryset([])
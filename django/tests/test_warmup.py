@@ -0,0 +1,54 @@
+from cerbos.sdk.model import PlanResourcesResponse, Principal
+from helpers import response
+
+from cerbos_query_core import PlanRequest
+from cerbos_django.fragment import FragmentCache, get_precompiled_query
+from cerbos_django.warmup import warm_up
+
+
+_CONDITIONAL = response(
+    {
+        "kind": "KIND_CONDITIONAL",
+        "condition": {
+            "expression": {
+                "operator": "eq",
+                "operands": [
+                    {"variable": "request.resource.attr.aBool"},
+                    {"value": True},
+                ],
+            }
+        },
+    }
+)
+
+
+class _StubClient:
+    def plan_resources(self, action, principal, resource):
+        return PlanResourcesResponse.from_dict(_CONDITIONAL)
+
+
+class TestWarmUp:
+    def test_warm_up(self, resource_model):
+        attr = {"request.resource.attr.aBool": resource_model.aBool}
+        items = [
+            PlanRequest("resource", "view", Principal("1", roles={"user"})),
+            response({"kind": "KIND_ALWAYS_DENIED"}),
+        ]
+        report = warm_up(items, resource_model, attr, client=_StubClient())
+        assert report.plans == 2
+        assert report.duration >= sum(report.timings) + report.planning_time
+        (sql, _), denied = report.queries
+        assert sql.endswith('WHERE "testapp_resource"."aBool"')
+        # never sent to the database
+        assert denied == ("", ())
+
+    def test_precompile(self, resource_model):
+        attr = {"request.resource.attr.aBool": resource_model.aBool}
+        cache = FragmentCache()
+        report = warm_up([_CONDITIONAL], resource_model, attr, precompile=True, cache=cache)
+        assert len(cache) == 1
+        [(sql, _)] = report.queries
+        assert '"testapp_resource"."id" IN (SELECT' in sql
+
+        get_precompiled_query(_CONDITIONAL, resource_model, attr, cache=cache)
+        assert (cache.hits, cache.misses) == (1, 1)
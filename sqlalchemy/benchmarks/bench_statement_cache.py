@@ -0,0 +1,118 @@
+"""Compare SQLAlchemy compiled statement cache hit rates and per request time of filtering ORM
+selects with `get_query` per request against a `SessionAuthorization`, for principals whose plans
+come in a few shapes with varying values.
+
+Run with `python benchmarks/bench_statement_cache.py` from the `sqlalchemy` directory.
+"""
+
+import random
+import time
+
+from cerbos_sqlalchemy import get_query
+from cerbos_sqlalchemy.session import SessionAuthorization
+from sqlalchemy import Boolean, Column, Integer, String, create_engine, event, select
+from sqlalchemy.engine import default
+from sqlalchemy.orm import Session, declarative_base
+
+Base = declarative_base()
+
+
+class Document(Base):
+    __tablename__ = "document"
+
+    id = Column(Integer, primary_key=True)
+    owner = Column(String)
+    department = Column(String)
+    public = Column(Boolean)
+    level = Column(Integer)
+
+
+def _leaf(operator: str, attr: str, value) -> dict:
+    return {
+        "expression": {
+            "operator": operator,
+            "operands": [
+                {"variable": f"request.resource.attr.{attr}"},
+                {"value": value},
+            ],
+        }
+    }
+
+
+def _plan(rng: random.Random) -> dict:
+    # three plan shapes, with per principal values
+    owner = _leaf("eq", "owner", f"user{rng.randrange(1000)}")
+    shape = rng.randrange(3)
+    if shape == 0:
+        condition = owner
+    elif shape == 1:
+        departments = [f"d{rng.randrange(20)}" for _ in range(rng.randrange(1, 5))]
+        condition = {
+            "expression": {
+                "operator": "or",
+                "operands": [owner, _leaf("in", "department", departments)],
+            }
+        }
+    else:
+        condition = {
+            "expression": {
+                "operator": "and",
+                "operands": [
+                    _leaf("eq", "public", True),
+                    _leaf("le", "level", rng.randrange(5)),
+                ],
+            }
+        }
+    return {"filter": {"kind": "KIND_CONDITIONAL", "condition": condition}}
+
+
+ATTR_MAP = {
+    "request.resource.attr.owner": Document.owner,
+    "request.resource.attr.department": Document.department,
+    "request.resource.attr.public": Document.public,
+    "request.resource.attr.level": Document.level,
+}
+
+
+def _run(engine, plans, query) -> tuple:
+    hits = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        hits.append(context.cache_hit == default.CACHE_HIT)
+
+    event.listen(engine, "before_cursor_execute", record)
+    start = time.perf_counter()
+    for plan in plans:
+        with Session(engine) as session:
+            session.scalars(query(session, plan)).all()
+    duration = time.perf_counter() - start
+    event.remove(engine, "before_cursor_execute", record)
+    return sum(hits) / len(hits), duration / len(plans)
+
+
+def main():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    rng = random.Random(0)
+    plans = [_plan(rng) for _ in range(2000)]
+
+    authorization = SessionAuthorization({Document: ATTR_MAP})
+
+    def per_request(session, plan):
+        return get_query(plan, Document, ATTR_MAP)
+
+    def session_wide(session, plan):
+        authorization.set_plan(session, Document, plan)
+        return select(Document)
+
+    print(f"{'strategy':>14} {'hit rate':>9} {'per request':>12}")
+    for name, query in (("get_query", per_request), ("session", session_wide)):
+        if name == "session":
+            authorization.install(Session)
+        hit_rate, latency = _run(engine, plans, query)
+        print(f"{name:>14} {hit_rate:>8.1%} {latency * 1e6:>10.1f}us")
+    authorization.uninstall(Session)
+
+
+if __name__ == "__main__":
+    main()
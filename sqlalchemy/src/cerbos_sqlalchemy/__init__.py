@@ -1,7 +1,39 @@
-import importlib.metadata
+from cerbos_query_core import (
+    PlanCardinality,
+    canonical_form,
+    parse_plan_json,
+    partial_evaluate,
+    plan_hash,
+    select_shards,
+    shard_key_values,
+)
 
-from cerbos_sqlalchemy.query import get_query
+from cerbos_sqlalchemy.advisor import advise_indexes
+from cerbos_sqlalchemy.query import get_criteria, get_query
+from cerbos_sqlalchemy.selectivity import selectivity_from_db
+from cerbos_sqlalchemy.shared_cache import SharedQueryCache, get_compiled_query
 
-__version__ = importlib.metadata.version(__package__ or __name__)
+__all__ = [
+    "PlanCardinality",
+    "SharedQueryCache",
+    "advise_indexes",
+    "canonical_form",
+    "get_compiled_query",
+    "get_criteria",
+    "get_query",
+    "parse_plan_json",
+    "partial_evaluate",
+    "plan_hash",
+    "select_shards",
+    "shard_key_values",
+    "selectivity_from_db",
+]
 
-__all__ = ["get_query"]
+
+def __getattr__(name: str):
+    # `importlib.metadata` is slow to import, so the version is only looked up when asked for
+    if name == "__version__":
+        import importlib.metadata
+
+        return importlib.metadata.version(__package__ or __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,95 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from cerbos_query_core import QueryPlan
+from cerbos_query_core.advisor import (
+    ColumnCombination,
+    ColumnUsage,
+    IndexReport,
+    build_index_report,
+    get_conjunctions,
+)
+
+from cerbos_sqlalchemy.query import GenericColumn, GenericExpression, GenericTable
+from sqlalchemy import Column, Table, UniqueConstraint
+from sqlalchemy.sql.visitors import iterate
+
+
+def _index_prefixes(table: Table) -> List[Tuple[str, ...]]:
+    prefixes = [tuple(c.name for c in table.primary_key.columns)]
+    prefixes.extend(tuple(c.name for c in idx.columns) for idx in table.indexes)
+    prefixes.extend(
+        tuple(c.name for c in con.columns)
+        for con in table.constraints
+        if isinstance(con, UniqueConstraint)
+    )
+    # Single column `unique=True` constraints are only visible on the column itself
+    prefixes.extend((c.name,) for c in table.columns if c.unique)
+    return [p for p in prefixes if p]
+
+
+def advise_indexes(
+    query_plans: Iterable[QueryPlan],
+    attr_map: Dict[str, GenericColumn],
+    table_mapping: Union[List[Tuple[GenericTable, GenericExpression]], None] = None,
+) -> IndexReport:
+    """Report which columns the given plans filter on, and whether they are indexed.
+
+    Columns used in leaf predicates (and `table_mapping` join predicates) are checked against
+    the indexes, primary keys and unique constraints declared on their `Table`. Groups of columns
+    from the same table which are ANDed together are reported as combinations, and any which no
+    existing index prefix covers are suggested as composite indexes - equality columns first,
+    range columns last.
+    """
+    tables: Dict[str, Table] = {}
+    usages: Dict[Tuple[str, str], ColumnUsage] = {}
+    combinations: Dict[Tuple[str, Tuple[str, ...]], ColumnCombination] = {}
+    # Columns which are filtered on without any other column of their table
+    alone: Set[Tuple[str, str]] = set()
+
+    def usage(column: Column, attribute: Optional[str]) -> ColumnUsage:
+        tables[column.table.name] = column.table
+        key = (column.table.name, column.name)
+        if key not in usages:
+            usages[key] = ColumnUsage(column.table.name, column.name, attribute)
+        return usages[key]
+
+    for plan in query_plans:
+        for group in get_conjunctions(plan):
+            by_table: Dict[str, Set[str]] = {}
+            for variable, operator in group:
+                try:
+                    column = attr_map[variable].expression
+                except KeyError:
+                    raise KeyError(
+                        f"Attribute does not exist in the attribute column map: {variable}"
+                    )
+                u = usage(column, variable)
+                u.operators.add(operator)
+                u.occurrences += 1
+                by_table.setdefault(u.table, set()).add(u.column)
+
+            for table_name, columns in by_table.items():
+                if len(columns) < 2:
+                    alone.update((table_name, c) for c in columns)
+                    continue
+                key = (table_name, tuple(sorted(columns)))
+                if key not in combinations:
+                    combinations[key] = ColumnCombination(table_name, key[1])
+                combinations[key].occurrences += 1
+
+    for _, predicate in table_mapping or []:
+        for element in iterate(predicate):
+            if isinstance(element, Column):
+                u = usage(element, None)
+                u.operators.add("join")
+                u.occurrences += 1
+                alone.add((u.table, u.column))
+
+    prefixes = {name: _index_prefixes(t) for name, t in tables.items()}
+    return build_index_report(
+        usages,
+        combinations,
+        alone,
+        prefixes,
+        join_reason="column is used in a join predicate",
+    )
@@ -0,0 +1,90 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple, Union
+
+from cerbos_query_core import QueryPlan
+from cerbos_query_core.explain import analyse_postgres_plan, analyse_sqlite_plan
+
+from cerbos_sqlalchemy.advisor import advise_indexes
+from cerbos_sqlalchemy.query import (
+    GenericColumn,
+    GenericExpression,
+    GenericTable,
+    OperatorFnMap,
+    get_query,
+)
+from sqlalchemy.engine import Connection
+
+
+@dataclass
+class ExplainReport:
+    dialect: str
+    sql: str
+    # raw `EXPLAIN` output: rows for SQLite/other dialects, the JSON document for Postgres
+    plan: Any
+    # tables read with a full (sequential) scan
+    full_scans: List[str] = field(default_factory=list)
+    # tables scanned in the inner loop of a nested loop join, i.e. once per outer row
+    nested_loops: List[str] = field(default_factory=list)
+    # "table.column" leaf columns not covered by any index
+    unindexed_columns: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.full_scans or self.nested_loops or self.unindexed_columns)
+
+
+def explain_query(
+    query_plan: QueryPlan,
+    conn: Connection,
+    table: GenericTable,
+    attr_map: Dict[str, GenericColumn],
+    table_mapping: Union[List[Tuple[GenericTable, GenericExpression]], None] = None,
+    operator_override_fns: Union[OperatorFnMap, None] = None,
+) -> ExplainReport:
+    """Build the query for a plan and `EXPLAIN` it on `conn`, flagging full table scans,
+    tables scanned in the inner loop of nested loop joins and unindexed leaf columns.
+
+    SQLite (`EXPLAIN QUERY PLAN`) and Postgres (`EXPLAIN (FORMAT JSON)`) plans are analysed;
+    other dialects get a plain `EXPLAIN` and only the unindexed column check.
+    """
+    query = get_query(
+        query_plan,
+        table,
+        attr_map,
+        table_mapping,
+        operator_override_fns=operator_override_fns,
+    )
+    compiled = query.compile(
+        dialect=conn.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    sql = str(compiled)
+    params = compiled.params
+    args = (
+        tuple(params[k] for k in compiled.positiontup)
+        if compiled.positional
+        else params
+    )
+
+    dialect = conn.dialect.name
+    full_scans: List[str] = []
+    nested_loops: List[str] = []
+    if dialect == "sqlite":
+        plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, args).fetchall()
+        full_scans, nested_loops = analyse_sqlite_plan(plan)
+    elif dialect == "postgresql":
+        plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql, args).scalar()
+        full_scans, nested_loops = analyse_postgres_plan(plan)
+    else:
+        plan = conn.exec_driver_sql("EXPLAIN " + sql, args).fetchall()
+
+    index_report = advise_indexes([query_plan], attr_map)
+    return ExplainReport(
+        dialect=dialect,
+        sql=sql,
+        plan=plan,
+        full_scans=full_scans,
+        nested_loops=nested_loops,
+        unindexed_columns=[
+            f"{u.table}.{u.column}" for u in index_report.columns if not u.indexed
+        ],
+    )
@@ -0,0 +1,164 @@
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from cerbos_query_core import ALWAYS_ALLOWED, QueryPlan, parse_plan, select_shards
+from cerbos_query_core.fanout import (
+    FanOutResult,
+    SortKey,
+    merge_rows,
+    run_on_shards,
+    run_on_shards_async,
+)
+
+from cerbos_sqlalchemy.query import (
+    GenericColumn,
+    GenericExpression,
+    GenericTable,
+    OperatorFnMap,
+    get_query,
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select, operators
+from sqlalchemy.sql.expression import ColumnElement
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+def _sort_keys(order_by: Sequence[ColumnElement]) -> List[SortKey]:
+    # `column` or `column.asc()` / `column.desc()`, looked up in rows by the column's key
+    keys: List[SortKey] = []
+    for clause in order_by:
+        modifier = getattr(clause, "modifier", None)
+        column = (
+            clause.element
+            if modifier in (operators.asc_op, operators.desc_op)
+            else clause
+        )
+        if hasattr(column, "__clause_element__"):
+            column = column.__clause_element__()
+        keys.append(
+            (
+                lambda row, key=column.key: row._mapping[key],
+                modifier is operators.desc_op,
+            )
+        )
+    return keys
+
+
+def _prepare(
+    query_plan: QueryPlan,
+    table: GenericTable,
+    attr_map: Dict[str, GenericColumn],
+    engines: Iterable[Any],
+    table_mapping: Union[List[Tuple[GenericTable, GenericExpression]], None],
+    operator_override_fns: Union[OperatorFnMap, None],
+    order_by: Sequence[ColumnElement],
+    limit: Union[int, None],
+    shard_key: Union[str, None],
+    shard_for: Union[Callable[[Any], Any], None],
+) -> Tuple[Select, List[Any]]:
+    plan = parse_plan(query_plan)
+    engines = list(engines)
+    if plan.kind != ALWAYS_ALLOWED and plan.condition is None:
+        # always denied: no shard has rows to return
+        engines = []
+    elif shard_key is not None:
+        if shard_for is None:
+            raise TypeError(
+                "a 'shard_for' function is required to route by 'shard_key'"
+            )
+        engines = select_shards(plan, shard_key, shard_for, engines)
+
+    query = get_query(plan, table, attr_map, table_mapping, operator_override_fns)
+    if order_by:
+        query = query.order_by(*order_by)
+    if limit is not None:
+        query = query.limit(limit)
+    return query, engines
+
+
+def fan_out(
+    query_plan: QueryPlan,
+    table: GenericTable,
+    attr_map: Dict[str, GenericColumn],
+    engines: Iterable[Engine],
+    table_mapping: Union[List[Tuple[GenericTable, GenericExpression]], None] = None,
+    operator_override_fns: Union[OperatorFnMap, None] = None,
+    order_by: Sequence[ColumnElement] = (),
+    limit: Union[int, None] = None,
+    shard_key: Union[str, None] = None,
+    shard_for: Union[Callable[[Any], Engine], None] = None,
+    max_workers: int = 8,
+) -> FanOutResult:
+    """Run the query of a plan on several engines (e.g. shards) at once, with a pool of at most
+    `max_workers` threads, and merge the rows.
+
+    The query is built once. `order_by` (columns, or their `asc()`/`desc()`) and `limit` are
+    applied on every engine, then the sorted rows are merged and limited again. With a
+    `shard_key` attribute, only the engines `select_shards` picks with `shard_for` are queried.
+    The result reports the rows and duration of each engine.
+    """
+    query, engines = _prepare(
+        query_plan,
+        table,
+        attr_map,
+        engines,
+        table_mapping,
+        operator_override_fns,
+        order_by,
+        limit,
+        shard_key,
+        shard_for,
+    )
+
+    def run(engine: Engine) -> List[Any]:
+        with engine.connect() as conn:
+            return conn.execute(query).fetchall()
+
+    results = run_on_shards(run, engines, max_workers)
+    return FanOutResult(merge_rows(results, _sort_keys(order_by), limit), results)
+
+
+async def fan_out_async(
+    query_plan: QueryPlan,
+    table: GenericTable,
+    attr_map: Dict[str, GenericColumn],
+    engines: Iterable["AsyncEngine"],
+    table_mapping: Union[List[Tuple[GenericTable, GenericExpression]], None] = None,
+    operator_override_fns: Union[OperatorFnMap, None] = None,
+    order_by: Sequence[ColumnElement] = (),
+    limit: Union[int, None] = None,
+    shard_key: Union[str, None] = None,
+    shard_for: Union[Callable[[Any], "AsyncEngine"], None] = None,
+) -> FanOutResult:
+    """Like `fan_out`, for `AsyncEngine`s, queried concurrently on the running event loop."""
+    query, engines = _prepare(
+        query_plan,
+        table,
+        attr_map,
+        engines,
+        table_mapping,
+        operator_override_fns,
+        order_by,
+        limit,
+        shard_key,
+        shard_for,
+    )
+
+    async def run(engine: "AsyncEngine") -> List[Any]:
+        async with engine.connect() as conn:
+            result = await conn.execute(query)
+            return result.fetchall()
+
+    results = await run_on_shards_async(run, engines)
+    return FanOutResult(merge_rows(results, _sort_keys(order_by), limit), results)
@@ -0,0 +1,222 @@
+import itertools
+import json
+from typing import Any, Callable, List, Union
+
+from cerbos_sqlalchemy.query import GenericColumn, GenericExpression
+from sqlalchemy import Boolean, Column, MetaData, String, Table, bindparam, event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import CompileError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.compiler import StrSQLCompiler
+from sqlalchemy.sql.elements import ClauseList, ColumnElement
+from sqlalchemy.sql.visitors import InternalTraversal
+from sqlalchemy.types import ARRAY, TypeDecorator, TypeEngine
+
+ARRAY_STRATEGY = "array"
+VALUES_STRATEGY = "values"
+TEMP_TABLE_STRATEGY = "temp_table"
+_STRATEGIES = (ARRAY_STRATEGY, VALUES_STRATEGY, TEMP_TABLE_STRATEGY)
+
+
+class _ValueList(TypeDecorator):
+    # A list bound as a single parameter: an array on PostgreSQL, a JSON array elsewhere
+    impl = String
+    cache_ok = True
+
+    def __init__(self, item_type: TypeEngine):
+        super().__init__()
+        self.item_type = item_type
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(ARRAY(self.item_type))
+        return dialect.type_descriptor(String())
+
+    def process_bind_param(self, value, dialect):
+        if dialect.name == "postgresql":
+            return value
+        return json.dumps(value)
+
+
+def _clause(column: GenericColumn) -> ColumnElement:
+    # ORM attributes are resolved to their columns
+    return (
+        column.__clause_element__() if hasattr(column, "__clause_element__") else column
+    )
+
+
+class _InArray(ColumnElement):
+    """`column IN values`, with `values` bound as a single parameter."""
+
+    inherit_cache = True
+    type = Boolean()
+    _traverse_internals = [
+        ("column", InternalTraversal.dp_clauseelement),
+        ("values", InternalTraversal.dp_clauseelement),
+    ]
+
+    def __init__(self, column: GenericColumn, values: List[Any]):
+        self.column = _clause(column)
+        self.values = bindparam(None, values, type_=_ValueList(self.column.type))
+
+
+class _InValues(ColumnElement):
+    """`column IN (VALUES (v1), (v2), ...)`."""
+
+    inherit_cache = True
+    type = Boolean()
+    _traverse_internals = [
+        ("column", InternalTraversal.dp_clauseelement),
+        ("values", InternalTraversal.dp_clauseelement),
+    ]
+
+    def __init__(self, column: GenericColumn, values: List[Any]):
+        self.column = _clause(column)
+        self.values = ClauseList(
+            *(bindparam(None, v, type_=self.column.type) for v in values)
+        )
+
+
+class _InTempTable(ColumnElement):
+    """`column IN (SELECT value FROM <temporary table>)`, the table being created and filled with
+    `values` when the statement is executed."""
+
+    type = Boolean()
+    # the values aren't parameters of the statement, so its compiled form can't be reused
+    _traverse_internals = [
+        ("column", InternalTraversal.dp_clauseelement),
+        ("values", InternalTraversal.dp_unknown_structure),
+    ]
+
+    def __init__(self, column: GenericColumn, values: List[Any]):
+        self.column = _clause(column)
+        self.values = values
+
+
+# `connection.info` key of the names of the temporary tables created on a pooled connection
+_TEMP_TABLES_KEY = "cerbos_in_tables"
+_temp_table_names = itertools.count()
+
+
+@compiles(_InArray, "postgresql")
+def _compile_in_array_postgresql(element, compiler, **kw):
+    column = compiler.process(element.column, **kw)
+    return f"{column} = ANY ({compiler.process(element.values, **kw)})"
+
+
+@compiles(_InArray, "sqlite")
+def _compile_in_array_sqlite(element, compiler, **kw):
+    column = compiler.process(element.column, **kw)
+    values = compiler.process(element.values, **kw)
+    return f"{column} IN (SELECT value FROM json_each({values}))"
+
+
+@compiles(_InArray)
+def _compile_in_array(element, compiler, **kw):
+    if isinstance(compiler, StrSQLCompiler):
+        # `str()` of a statement
+        return _compile_in_array_postgresql(element, compiler, **kw)
+    raise CompileError(
+        f"The '{ARRAY_STRATEGY}' IN list strategy is not supported by the "
+        f"'{compiler.dialect.name}' dialect"
+    )
+
+
+@compiles(_InValues)
+def _compile_in_values(element, compiler, **kw):
+    column = compiler.process(element.column, **kw)
+    rows = ", ".join(f"({compiler.process(v, **kw)})" for v in element.values)
+    return f"{column} IN (VALUES {rows})"
+
+
+@compiles(_InTempTable)
+def _compile_in_temp_table(element, compiler, **kw):
+    # a table per compilation, which `_fill_temp_tables` creates before the statement runs
+    table = Table(
+        f"cerbos_in_{next(_temp_table_names)}",
+        MetaData(),
+        Column("value", element.column.type),
+        prefixes=["TEMPORARY"],
+    )
+    compiler.__dict__.setdefault("_cerbos_temp_tables", []).append(
+        (table, element.values)
+    )
+    column = compiler.process(element.column, **kw)
+    return f"{column} IN (SELECT value FROM {compiler.preparer.format_table(table)})"
+
+
+def _fill_temp_tables(conn, cursor, statement, parameters, context, executemany):
+    temp_tables = getattr(getattr(context, "compiled", None), "_cerbos_temp_tables", ())
+    for table, values in temp_tables:
+        table.create(conn)
+        conn.info.setdefault(_TEMP_TABLES_KEY, set()).add(table.name)
+        conn.execute(table.insert(), [{"value": v} for v in values])
+
+
+def _drop_temp_tables(dbapi_connection, connection_record):
+    # once the connection is back in the pool, and no results can read the tables any more
+    names = connection_record.info.get(_TEMP_TABLES_KEY)
+    if not names or dbapi_connection is None:
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name in list(names):
+            try:
+                cursor.execute(f"DROP TABLE IF EXISTS {name}")
+            except Exception:
+                # e.g. still read by an unconsumed result on SQLite: retried at the next checkin
+                continue
+            names.discard(name)
+        dbapi_connection.commit()
+    finally:
+        cursor.close()
+
+
+def _install_temp_tables(engine: Engine):
+    if not event.contains(engine, "before_cursor_execute", _fill_temp_tables):
+        event.listen(engine, "before_cursor_execute", _fill_temp_tables)
+        event.listen(engine.pool, "checkin", _drop_temp_tables)
+
+
+def large_in_fn(
+    threshold: int = 1000,
+    strategy: str = ARRAY_STRATEGY,
+    engine: Union[Engine, Connection, None] = None,
+) -> Callable[[GenericColumn, Any], GenericExpression]:
+    """An `in` operator function for `operator_override_fns`, which renders lists longer than
+    `threshold` without a bound parameter per value:
+
+    - `"array"`: a single parameter, `column = ANY (:values)` on PostgreSQL, or a JSON array
+      with `column IN (SELECT value FROM json_each(:values))` on SQLite.
+    - `"values"`: `column IN (VALUES (:v1), (:v2), ...)`, which PostgreSQL can plan as a join.
+    - `"temp_table"`: `column IN (SELECT value FROM <table>)`, where the table is a temporary
+      table which is created on the connection and filled with the values right before the
+      statement runs on `engine`, and dropped when the connection is returned to the pool.
+      Statements using it are never served from the compiled cache, and can't be compiled ahead
+      (e.g. by `get_compiled_query`).
+
+    Shorter lists are rendered as usual.
+    """
+    if strategy not in _STRATEGIES:
+        raise ValueError(
+            f"Unknown IN list strategy: '{strategy}', expected one of: {', '.join(_STRATEGIES)}"
+        )
+    if strategy == TEMP_TABLE_STRATEGY:
+        if engine is None:
+            raise TypeError("The 'temp_table' strategy requires an 'engine'")
+        _install_temp_tables(engine.engine)
+
+    def fn(c: GenericColumn, v: Any) -> GenericExpression:
+        if not isinstance(v, list):
+            return c.in_([v])
+        if len(v) <= threshold:
+            return c.in_(v)
+        if strategy == ARRAY_STRATEGY:
+            return _InArray(c, v)
+        if strategy == VALUES_STRATEGY:
+            return _InValues(c, v)
+        return _InTempTable(c, v)
+
+    # checked by the functions caching compiled statements
+    fn.uses_temp_tables = strategy == TEMP_TABLE_STRATEGY
+    return fn
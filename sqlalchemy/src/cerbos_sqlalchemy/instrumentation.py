@@ -0,0 +1,7 @@
+from cerbos_query_core.instrumentation import (
+    MetricsCallback,
+    TranslationMetrics,
+    span_hook,
+)
+
+__all__ = ["MetricsCallback", "TranslationMetrics", "span_hook"]
@@ -0,0 +1,39 @@
+from typing import Dict, List, Tuple, Union
+
+from cerbos_query_core import ALWAYS_ALLOWED, QueryPlan, parse_plan
+from cerbos_query_core.membership import IdSet, id_set
+
+from cerbos_sqlalchemy.query import (
+    GenericColumn,
+    GenericExpression,
+    GenericTable,
+    OperatorFnMap,
+    get_query,
+)
+from sqlalchemy.engine import Connection
+
+
+def authorized_ids(
+    query_plan: QueryPlan,
+    conn: Connection,
+    table: GenericTable,
+    attr_map: Dict[str, GenericColumn],
+    table_mapping: Union[List[Tuple[GenericTable, GenericExpression]], None] = None,
+    operator_override_fns: Union[OperatorFnMap, None] = None,
+    id_column: Union[GenericColumn, None] = None,
+) -> IdSet:
+    """Run the plan's query once, selecting only `id_column` (by default the table's primary key),
+    and return the ids as an `id_set` for fast membership checks, e.g. cached per principal and
+    action in a `MembershipCache`. Always denied plans return an empty set without a query.
+    """
+    if id_column is None:
+        id_column, *others = getattr(table, "__table__", table).primary_key.columns
+        if others:
+            raise TypeError(
+                f"an 'id_column' is required for composite primary keys: {table}"
+            )
+    plan = parse_plan(query_plan)
+    if plan.kind != ALWAYS_ALLOWED and plan.condition is None:
+        return id_set(())
+    query = get_query(plan, table, attr_map, table_mapping, operator_override_fns)
+    return id_set(conn.execute(query.with_only_columns(id_column)).scalars())
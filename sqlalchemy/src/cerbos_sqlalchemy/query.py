@@ -1,18 +1,32 @@
+from time import perf_counter, time_ns
 from types import MappingProxyType
-from typing import Any, Callable, Dict, List, Tuple, Union
-
-from cerbos.engine.v1 import engine_pb2
-from cerbos.response.v1 import response_pb2
-from cerbos.sdk.model import PlanResourcesFilterKind, PlanResourcesResponse
-from google.protobuf.json_format import MessageToDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple, Union
+
+from cerbos_query_core import (
+    ALWAYS_ALLOWED,
+    And,
+    Compare,
+    Emitter,
+    KnownAttributes,
+    Not,
+    Or,
+    QueryPlan,
+    parse_plan,
+    partial_evaluate,
+)
+from cerbos_query_core.passes import SelectivityMap, measure, reorder_condition
 
-from sqlalchemy import Column, Table, and_, not_, or_, select
-from sqlalchemy.orm import DeclarativeMeta, InstrumentedAttribute
+from cerbos_sqlalchemy.instrumentation import MetricsCallback, TranslationMetrics
+from sqlalchemy import Column, Table, and_, false, not_, or_, select, true
 from sqlalchemy.sql import Select
-from sqlalchemy.sql.expression import BinaryExpression, ColumnOperators
+from sqlalchemy.sql.expression import BinaryExpression, ColumnElement, ColumnOperators
 
-GenericTable = Union[Table, DeclarativeMeta]
-GenericColumn = Union[Column, InstrumentedAttribute]
+if TYPE_CHECKING:
+    # `sqlalchemy.orm` is slow to import, and not needed to translate plans for Core tables
+    from sqlalchemy.orm import DeclarativeMeta, InstrumentedAttribute
+
+GenericTable = Union[Table, "DeclarativeMeta"]
+GenericColumn = Union[Column, "InstrumentedAttribute"]
 GenericExpression = Union[BinaryExpression, ColumnOperators]
 OperatorFnMap = Dict[str, Callable[[GenericColumn, Any], GenericExpression]]
 
@@ -32,20 +46,6 @@ __operator_fns: OperatorFnMap = {
 }
 OPERATOR_FNS = MappingProxyType(__operator_fns)
 
-# We support both the legacy HTTP and gRPC clients, so therefore we need to accept both input types
-_deny_types = frozenset(
-    [
-        PlanResourcesFilterKind.ALWAYS_DENIED,
-        engine_pb2.PlanResourcesFilter.KIND_ALWAYS_DENIED,
-    ]
-)
-_allow_types = frozenset(
-    [
-        PlanResourcesFilterKind.ALWAYS_ALLOWED,
-        engine_pb2.PlanResourcesFilter.KIND_ALWAYS_ALLOWED,
-    ]
-)
-
 
 def _get_table_name(t: GenericTable) -> str:
     try:
@@ -56,19 +56,60 @@ def _get_table_name(t: GenericTable) -> str:
         return t.name
 
 
+class _ExpressionEmitter(Emitter[GenericExpression]):
+    def visit_and(self, node: And) -> GenericExpression:
+        return and_(*[c.accept(self) for c in node.children])
+
+    def visit_or(self, node: Or) -> GenericExpression:
+        return or_(*[c.accept(self) for c in node.children])
+
+    def visit_not(self, node: Not) -> GenericExpression:
+        return not_(node.child.accept(self))
+
+    def visit_compare(self, node: Compare) -> GenericExpression:
+        column = self.attribute(node.variable)
+        # the operator handlers here are the leaf nodes of the recursion
+        return self.operator_fn(node.operator)(column, node.value)
+
+
 def get_query(
-    query_plan: Union[PlanResourcesResponse, response_pb2.PlanResourcesResponse],  # type: ignore (https://github.com/microsoft/pyright/issues/1035)
+    query_plan: QueryPlan,
     table: GenericTable,
     attr_map: Dict[str, GenericColumn],
     table_mapping: Union[List[Tuple[GenericTable, GenericExpression]], None] = None,
     operator_override_fns: Union[OperatorFnMap, None] = None,
+    selectivity: Union[SelectivityMap, None] = None,
+    on_metrics: Union[MetricsCallback, None] = None,
+    known_attributes: Union[KnownAttributes, None] = None,
 ) -> Select:
-    if query_plan.filter is None or query_plan.filter.kind in _deny_types:
-        return select(table).where(False)
-
-    if query_plan.filter.kind in _allow_types:
+    """Translate a plan into a `select()` of `table`.
+
+    `known_attributes` are resource attribute values known for every row being queried (e.g. the
+    tenant being listed), which are substituted into the plan: branches they decide are pruned, and
+    a plan which folds to allow-all or deny-all needs no filter.
+    """
+    # Timings are only taken when instrumentation is enabled, to keep the hot path lean
+    if on_metrics is not None:
+        start_ns, t0 = time_ns(), perf_counter()
+
+    plan = parse_plan(query_plan)
+    if known_attributes:
+        plan = partial_evaluate(plan, known_attributes)
+
+    if on_metrics is not None:
+        t1 = perf_counter()
+
+    if plan.kind == ALWAYS_ALLOWED:
+        if on_metrics is not None:
+            on_metrics(TranslationMetrics(plan.kind, start_ns, t1 - t0))
         return select(table)
 
+    # Always denied, or no filter at all
+    if plan.condition is None:
+        if on_metrics is not None:
+            on_metrics(TranslationMetrics(plan.kind, start_ns, t1 - t0))
+        return select(table).where(False)
+
     # Inspect passed columns. If > 1 origin table, assert that the mapping has been defined
     required_tables = set()
     for c in attr_map.values():
@@ -90,63 +131,61 @@ def get_query(
                 )
             )
 
-    def get_operator_fn(op: str, c: GenericColumn, v: Any) -> GenericExpression:
-        # Check to see if the client has overridden the function
-        if (
-            operator_override_fns
-            and (override_fn := operator_override_fns.get(op)) is not None
-        ):
-            return override_fn(c, v)
-
-        # Otherwise, fall back to default handlers
-        if (default_fn := OPERATOR_FNS.get(op)) is not None:
-            return default_fn(c, v)
-
-        raise ValueError(f"Unrecognised operator: {op}")
-
-    def traverse_and_map_operands(operand: dict):
-        if exp := operand.get("expression"):
-            return traverse_and_map_operands(exp)
-
-        operator = operand["operator"]
-        child_operands = operand["operands"]
-
-        # if `operator` in ["and", "or"], `child_operands` is a nested list of `expression` dicts (handled at the
-        # beginning of this closure)
-        if operator == "and":
-            return and_(*[traverse_and_map_operands(o) for o in child_operands])
-        if operator == "or":
-            return or_(*[traverse_and_map_operands(o) for o in child_operands])
-        if operator == "not":
-            return not_(*[traverse_and_map_operands(o) for o in child_operands])
-
-        # otherwise, they are a list[dict] (len==2), in the form: `[{'variable': 'foo'}, {'value': 'bar'}]`
-        # The order of the keys `variable` and `value` is not guaranteed.
-        d = {k: v for o in child_operands for k, v in o.items()}
-        variable = d["variable"]
-        value = d["value"]
-
-        try:
-            column = attr_map[variable]
-        except KeyError:
-            raise KeyError(
-                f"Attribute does not exist in the attribute column map: {variable}"
-            )
-
-        # the operator handlers here are the leaf nodes of the recursion
-        return get_operator_fn(operator, column, value)
-
-    cond = (
-        MessageToDict(query_plan.filter.condition)
-        if isinstance(query_plan, response_pb2.PlanResourcesResponse)
-        else query_plan.filter.condition.to_dict()
-    )
+    cond = plan.condition
+    # Optionally reorder `and`/`or` children so the most useful predicates are emitted first
+    if selectivity is not None:
+        cond = reorder_condition(cond, selectivity)
 
-    q = select(table).where(traverse_and_map_operands(cond))
+    emitter = _ExpressionEmitter(attr_map, OPERATOR_FNS, operator_override_fns)
+    q = select(table).where(cond.accept(emitter))
 
     if table_mapping:
         q = q.select_from(table)
         for join_table, predicate in table_mapping:
             q = q.join(join_table, predicate)
 
+    if on_metrics is not None:
+        t2 = perf_counter()
+        node_count, max_depth = measure(cond)
+        on_metrics(
+            TranslationMetrics(
+                filter_kind=plan.kind,
+                start_time_ns=start_ns,
+                conversion_time=t1 - t0,
+                traversal_time=t2 - t1,
+                node_count=node_count,
+                max_depth=max_depth,
+                joins=len(table_mapping or ()),
+            )
+        )
+
     return q
+
+
+def get_criteria(
+    query_plan: QueryPlan,
+    attr_map: Dict[str, GenericColumn],
+    operator_override_fns: Union[OperatorFnMap, None] = None,
+    selectivity: Union[SelectivityMap, None] = None,
+    known_attributes: Union[KnownAttributes, None] = None,
+) -> ColumnElement:
+    """The plan's filter as a boolean expression, e.g. for `where()` or `with_loader_criteria`.
+
+    Plan values are bound parameters, so criteria for plans of the same shape share a cache key.
+    Unlike `get_query`, no joins are added: columns must belong to the filtered table.
+    """
+    plan = parse_plan(query_plan)
+    if known_attributes:
+        plan = partial_evaluate(plan, known_attributes)
+    if plan.kind == ALWAYS_ALLOWED:
+        return true()
+    # Always denied, or no filter at all
+    if plan.condition is None:
+        return false()
+
+    cond = plan.condition
+    if selectivity is not None:
+        cond = reorder_condition(cond, selectivity)
+    return cond.accept(
+        _ExpressionEmitter(attr_map, OPERATOR_FNS, operator_override_fns)
+    )
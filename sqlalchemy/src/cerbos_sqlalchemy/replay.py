@@ -0,0 +1,68 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple, Union
+
+from cerbos_query_core.replay import (
+    PlanRecorder,
+    PlanResponse,
+    ReplayReport,
+    load_plans,
+)
+
+from cerbos_sqlalchemy.query import (
+    GenericColumn,
+    GenericExpression,
+    GenericTable,
+    OperatorFnMap,
+    get_query,
+)
+from sqlalchemy.engine import Engine
+
+__all__ = ["PlanRecorder", "PlanResponse", "ReplayReport", "load_plans", "replay"]
+
+
+def replay(
+    query_plans: Iterable[PlanResponse],
+    engine: Engine,
+    table: GenericTable,
+    attr_map: Dict[str, GenericColumn],
+    table_mapping: Union[List[Tuple[GenericTable, GenericExpression]], None] = None,
+    operator_override_fns: Union[OperatorFnMap, None] = None,
+    concurrency: int = 1,
+    iterations: int = 1,
+) -> ReplayReport:
+    """Translate and execute each plan `iterations` times on `concurrency` threads (one
+    connection each), measuring per request latency and overall throughput."""
+    work = list(query_plans) * iterations
+    local = threading.local()
+    connections = []
+    connections_lock = threading.Lock()
+
+    def run(query_plan: PlanResponse) -> Tuple[float, int]:
+        if (conn := getattr(local, "conn", None)) is None:
+            conn = local.conn = engine.connect()
+            with connections_lock:
+                connections.append(conn)
+
+        start = time.perf_counter()
+        query = get_query(
+            query_plan,
+            table,
+            attr_map,
+            table_mapping,
+            operator_override_fns=operator_override_fns,
+        )
+        rows = len(conn.execute(query).fetchall())
+        return time.perf_counter() - start, rows
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(run, work))
+    finally:
+        for conn in connections:
+            conn.close()
+    duration = time.perf_counter() - start
+
+    return ReplayReport.from_results(results, duration)
@@ -0,0 +1,115 @@
+from typing import Any, Dict, List, Set
+
+from cerbos_query_core.results import ResultCache
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Connection, Row
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.sql import Executable
+from sqlalchemy.sql.expression import TableClause
+from sqlalchemy.sql.util import find_tables
+
+# `session.info` (and `connection.info`) key of the tables written in the session's transaction
+_WRITTEN_KEY = "cerbos_written_tables"
+
+
+def _tables(statement: Executable) -> Set[str]:
+    # every table the statement reads, including those of subqueries and aliases
+    return {
+        t.name
+        for t in find_tables(statement, check_columns=True)
+        if isinstance(t, TableClause)
+    }
+
+
+class AuthorizedResultCache:
+    """Caches the rows of authorized queries, keyed by their compiled SQL and parameters and the
+    database, and invalidated by writes to the tables they read.
+
+    Listen on a `Session` or `sessionmaker` with `install`, so ORM writes invalidate the cache:
+    flushes of new, changed and deleted objects (again on commit or rollback, for results cached
+    by other connections in between), and ORM `insert()`/`update()`/`delete()` statements. Call
+    `invalidate` for writes made otherwise, e.g. with Core statements or by other processes.
+
+    `store` is any `LRUStore`-like mapping, an in-process LRU by default.
+    """
+
+    def __init__(self, store: Any = None):
+        self.cache = ResultCache(store)
+
+    def install(self, target: Any = Session):
+        event.listen(target, "after_flush", self._on_flush)
+        event.listen(target, "after_commit", self._on_end)
+        event.listen(target, "after_rollback", self._on_end)
+        event.listen(target, "do_orm_execute", self._on_execute)
+
+    def uninstall(self, target: Any = Session):
+        event.remove(target, "after_flush", self._on_flush)
+        event.remove(target, "after_commit", self._on_end)
+        event.remove(target, "after_rollback", self._on_end)
+        event.remove(target, "do_orm_execute", self._on_execute)
+
+    def invalidate(self, *tables: str):
+        self.cache.invalidate(*tables)
+
+    def execute(self, connection: Connection, statement: Executable) -> List[Row]:
+        """Return the rows of `statement` on `connection`, e.g. `get_query(...)` with more filters,
+        ordering and a limit, from the cache if no table it reads was written since they were
+        cached.
+
+        Statements reading tables the session owning `connection` wrote in its current
+        transaction are executed without the cache, as the rows may be rolled back.
+        """
+        tables = _tables(statement)
+        if tables & connection.info.get(_WRITTEN_KEY, set()):
+            return connection.execute(statement).fetchall()
+        compiled = statement.compile(
+            dialect=connection.dialect, compile_kwargs={"render_postcompile": True}
+        )
+        key = self.cache.key(
+            (
+                connection.engine.url.render_as_string(),
+                str(compiled),
+                tuple(sorted((k, repr(v)) for k, v in compiled.params.items())),
+            ),
+            tables,
+        )
+        try:
+            return self.cache.get(key)
+        except KeyError:
+            pass
+        rows = connection.execute(statement).fetchall()
+        self.cache.set(key, rows)
+        return rows
+
+    def _on_flush(self, session: Session, flush_context: Any):
+        mappers: Dict[Any, Set[str]] = {}
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            mapper = inspect(obj).mapper
+            mappers.setdefault(mapper, set()).update(t.name for t in mapper.tables)
+        for mapper, tables in mappers.items():
+            self._written(session, tables, {"mapper": mapper})
+
+    def _on_execute(self, state: ORMExecuteState):
+        if state.is_insert or state.is_update or state.is_delete:
+            self._written(
+                state.session, {state.statement.table.name}, state.bind_arguments
+            )
+
+    def _written(
+        self, session: Session, tables: Set[str], bind_arguments: Dict[str, Any]
+    ):
+        if not tables:
+            return
+        self.cache.invalidate(*tables)
+        written = session.info.setdefault(_WRITTEN_KEY, set())
+        written.update(tables)
+        # shared with the connection of the transaction, to bypass the cache in `execute`
+        session.connection(bind_arguments=bind_arguments).info[_WRITTEN_KEY] = written
+
+    def _on_end(self, session: Session):
+        written = session.info.pop(_WRITTEN_KEY, None)
+        if written:
+            self.cache.invalidate(*written)
+            # the connection goes back to the pool with the set, empty
+            written.clear()
@@ -0,0 +1,49 @@
+from contextlib import closing
+from typing import Dict
+
+from cerbos_query_core.passes import SelectivityMap
+from cerbos_query_core.statistics import pg_selectivity, sqlite_selectivity
+
+from cerbos_sqlalchemy.query import GenericColumn
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection
+
+
+def selectivity_from_db(
+    conn: Connection,
+    attr_map: Dict[str, GenericColumn],
+    exact: bool = False,
+) -> SelectivityMap:
+    """Derive per-attribute equality selectivities from the database statistics.
+
+    Postgres hints are read from `pg_stats`, SQLite hints from `sqlite_stat1` (both are only
+    populated after `ANALYZE`). With `exact=True`, attributes missing from the statistics are
+    measured with `COUNT(DISTINCT ...)`, which scans the table.
+    """
+    dialect = conn.dialect.name
+    hints: SelectivityMap = {}
+    for attr, c in attr_map.items():
+        column = c.expression  # unwraps `InstrumentedAttribute`s, a no-op for `Column`s
+        table_name, column_name = column.table.name, column.name
+
+        s = None
+        if dialect in ("postgresql", "sqlite"):
+            with closing(conn.connection.cursor()) as cursor:
+                if dialect == "postgresql":
+                    s = pg_selectivity(
+                        cursor, table_name, column_name, column.table.schema
+                    )
+                else:
+                    s = sqlite_selectivity(cursor, table_name, column_name)
+
+        if s is None and exact:
+            distinct, total = conn.execute(
+                select(func.count(column.distinct()), func.count()).select_from(
+                    column.table
+                )
+            ).one()
+            s = 1 / distinct if distinct and total else None
+
+        if s is not None:
+            hints[attr] = s
+    return hints
@@ -0,0 +1,82 @@
+from typing import Any, Dict, Union
+
+from cerbos_query_core import QueryPlan
+
+from cerbos_sqlalchemy.query import GenericColumn, OperatorFnMap, get_criteria
+from sqlalchemy import event, false
+from sqlalchemy.orm import ORMExecuteState, Session, with_loader_criteria
+
+# `session.info` key of the per session `with_loader_criteria` options
+_OPTIONS_KEY = "cerbos_criteria"
+# execution option which turns authorization off for a statement
+SKIP_AUTHORIZATION = "cerbos_skip_authorization"
+
+
+class SessionAuthorization:
+    """Filters every ORM SELECT of a session to the rows the session's principal may access.
+
+    `attr_maps` maps each authorized entity (a mapped class) to its attribute map, whose columns
+    must belong to the entity. Listen on a `Session`, `sessionmaker` or session instance with
+    `install`, then give each session its principal's plans with `set_plan`:
+
+    ```python
+    authorization = SessionAuthorization({LeaveRequest: attr_map})
+    authorization.install(Session)
+
+    with Session(engine) as session:
+        authorization.set_plan(session, LeaveRequest, plan)
+        session.scalars(select(LeaveRequest))  # filtered, as are lazy loads of the results
+    ```
+
+    The criteria are applied with `with_loader_criteria(..., include_aliases=True)`, so they also
+    reach joins, aliases and relationship loads. Entities without a plan on the session match no
+    rows. Plan values are bound parameters: statements filtered by plans of the same shape have
+    the same cache key, and share SQLAlchemy's compiled statement cache across principals.
+    """
+
+    def __init__(
+        self,
+        attr_maps: Dict[Any, Dict[str, GenericColumn]],
+        operator_override_fns: Union[OperatorFnMap, None] = None,
+    ):
+        self.attr_maps = attr_maps
+        self.operator_override_fns = operator_override_fns
+        # used for entities with no plan, so they fail closed
+        self._deny = {
+            entity: with_loader_criteria(entity, false(), include_aliases=True)
+            for entity in attr_maps
+        }
+
+    def install(self, target: Any = Session):
+        event.listen(target, "do_orm_execute", self._on_execute)
+
+    def uninstall(self, target: Any = Session):
+        event.remove(target, "do_orm_execute", self._on_execute)
+
+    def set_plan(self, session: Session, entity: Any, query_plan: QueryPlan):
+        """Authorize `session`'s loads of `entity` with a plan, translated once here."""
+        if entity not in self.attr_maps:
+            raise KeyError(f"Entity is not configured for authorization: {entity!r}")
+        criteria = get_criteria(
+            query_plan, self.attr_maps[entity], self.operator_override_fns
+        )
+        session.info.setdefault(_OPTIONS_KEY, {})[entity] = with_loader_criteria(
+            entity, criteria, include_aliases=True
+        )
+
+    def clear(self, session: Session):
+        session.info.pop(_OPTIONS_KEY, None)
+
+    def _on_execute(self, state: ORMExecuteState):
+        # Column and relationship loads carry the options of the statement which loaded the object
+        if (
+            not state.is_select
+            or state.is_column_load
+            or state.is_relationship_load
+            or state.execution_options.get(SKIP_AUTHORIZATION, False)
+        ):
+            return
+        options = state.session.info.get(_OPTIONS_KEY, {})
+        state.statement = state.statement.options(
+            *(options.get(entity, deny) for entity, deny in self._deny.items())
+        )
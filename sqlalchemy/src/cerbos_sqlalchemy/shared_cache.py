@@ -0,0 +1,283 @@
+import json
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from hashlib import blake2b
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+from cerbos_query_core import QueryPlan, parse_plan, plan_hash
+
+from cerbos_sqlalchemy.query import (
+    GenericColumn,
+    GenericExpression,
+    GenericTable,
+    OperatorFnMap,
+    _get_table_name,
+    get_query,
+)
+from sqlalchemy.engine import Dialect
+
+# Bumped whenever the file layout or the entry encoding changes
+LAYOUT_VERSION = 1
+
+_MAGIC = b"CQPC"
+# magic, layout version, sets, ways, slot size, write generation
+_HEADER = struct.Struct("<4sIIIIQ")
+_HEADER_SIZE = 32
+_GENERATION_OFFSET = 20
+# seqlock counter, write generation, key, payload length
+_SLOT = struct.Struct("<QQ16sI")
+_SLOT_HEADER_SIZE = 40
+_U64 = struct.Struct("<Q")
+
+
+@dataclass
+class CompiledQuery:
+    sql: str
+    # a tuple for positional paramstyles, a dict for named ones, ready for `exec_driver_sql`
+    params: Union[Tuple[Any, ...], Dict[str, Any]]
+
+
+class SharedQueryCache:
+    """A fixed size cache of compiled queries in shared memory, for prefork servers.
+
+    Backed by the file at `path`, which any process can open, or, with no path, by anonymous
+    shared memory inherited by processes forked after it's created (e.g. in gunicorn's master
+    with `preload_app`).
+
+    The memory is split into `size // (ways * slot_size)` sets of `ways` fixed size slots.
+    Reads take no locks: each slot is guarded by a sequence counter which writers make odd while
+    they write it, and a read which sees it odd or changed is a miss. Writers serialize on a file
+    lock (or a `multiprocessing.Lock`) and overwrite the oldest slot of the set, so the cache never
+    grows. Entries larger than a slot are not cached.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, None] = None,
+        size: int = 4 * 1024 * 1024,
+        slot_size: int = 4096,
+        ways: int = 4,
+    ):
+        if slot_size <= _SLOT_HEADER_SIZE or ways < 1:
+            raise ValueError(
+                "'slot_size' must be larger than 40 bytes and 'ways' positive."
+            )
+        sets = (size - _HEADER_SIZE) // (slot_size * ways)
+        if sets < 1:
+            raise ValueError("'size' is too small for a single set of slots.")
+        self.slot_size = slot_size
+        self.ways = ways
+        self.sets = sets
+        self.size = _HEADER_SIZE + sets * ways * slot_size
+        # per process counts
+        self.hits = 0
+        self.misses = 0
+
+        self._fd: Union[int, None] = None
+        self._lock = None
+        if path is None:
+            import multiprocessing
+
+            self._mm = mmap.mmap(-1, self.size)
+            self._lock = multiprocessing.Lock()
+            self._mm[:_GENERATION_OFFSET] = self._header()
+            return
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            with self._locked():
+                header = os.pread(self._fd, _GENERATION_OFFSET, 0)
+                # Other processes may have mapped the file with its layout: resetting it would
+                # have them read and write at the wrong offsets
+                if any(header) and header != self._header():
+                    raise ValueError(
+                        f"{path!r} holds a query cache with another layout (size, slot size, "
+                        "ways or version): open it with the same arguments, or use another path."
+                    )
+                if os.fstat(self._fd).st_size < self.size:
+                    os.ftruncate(self._fd, self.size)
+                self._mm = mmap.mmap(self._fd, self.size)
+                if not any(header):
+                    self._mm[:_GENERATION_OFFSET] = self._header()
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def _header(self) -> bytes:
+        return _HEADER.pack(
+            _MAGIC, LAYOUT_VERSION, self.sets, self.ways, self.slot_size, 0
+        )[:_GENERATION_OFFSET]
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        if self._lock is not None:
+            with self._lock:
+                yield
+            return
+        import fcntl
+
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _slots(self, key: bytes) -> range:
+        first = _HEADER_SIZE + (int.from_bytes(key[:8], "little") % self.sets) * (
+            self.ways * self.slot_size
+        )
+        return range(first, first + self.ways * self.slot_size, self.slot_size)
+
+    def get(self, key: bytes) -> Union[bytes, None]:
+        mm = self._mm
+        for offset in self._slots(key):
+            seq, _, slot_key, length = _SLOT.unpack_from(mm, offset)
+            if seq & 1 or slot_key != key:
+                continue
+            start = offset + _SLOT_HEADER_SIZE
+            payload = mm[start : start + length]
+            # a writer got in while we were reading
+            if _U64.unpack_from(mm, offset)[0] != seq:
+                break
+            self.hits += 1
+            return payload
+        self.misses += 1
+        return None
+
+    def put(self, key: bytes, payload: bytes) -> bool:
+        if len(payload) > self.slot_size - _SLOT_HEADER_SIZE:
+            return False
+        mm = self._mm
+        with self._locked():
+            victim, oldest = None, None
+            for offset in self._slots(key):
+                seq, generation, slot_key, _ = _SLOT.unpack_from(mm, offset)
+                if slot_key == key:
+                    victim = offset
+                    break
+                if oldest is None or generation < oldest:
+                    victim, oldest = offset, generation
+            generation = _U64.unpack_from(mm, _GENERATION_OFFSET)[0] + 1
+            _U64.pack_into(mm, _GENERATION_OFFSET, generation)
+
+            seq = _U64.unpack_from(mm, victim)[0]
+            _U64.pack_into(mm, victim, seq + 1)
+            start = victim + _SLOT_HEADER_SIZE
+            mm[start : start + len(payload)] = payload
+            _SLOT.pack_into(mm, victim, seq + 1, generation, key, len(payload))
+            _U64.pack_into(mm, victim, seq + 2)
+        return True
+
+    def clear(self):
+        mm = self._mm
+        empty = bytes(self.slot_size - 8)
+        with self._locked():
+            for offset in range(_HEADER_SIZE, self.size, self.slot_size):
+                seq = _U64.unpack_from(mm, offset)[0]
+                _U64.pack_into(mm, offset, seq + 1)
+                mm[offset + 8 : offset + self.slot_size] = empty
+                _U64.pack_into(mm, offset, seq + 2)
+
+    def close(self):
+        self._mm.close()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+@lru_cache(maxsize=None)
+def _adapter_version() -> str:
+    # looked up on first use: `importlib.metadata` is slow to import, and source checkouts which
+    # aren't installed have no version
+    import importlib.metadata
+
+    try:
+        return importlib.metadata.version("cerbos-sqlalchemy")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _cache_key(
+    plan_key: str,
+    table: GenericTable,
+    attr_map: Dict[str, GenericColumn],
+    dialect: Dialect,
+    namespace: str,
+) -> bytes:
+    columns = ",".join(
+        f"{k}={c.table.name}.{c.name}" for k, c in sorted(attr_map.items())
+    )
+    data = "\0".join(
+        (
+            _adapter_version(),
+            dialect.name,
+            dialect.driver,
+            dialect.paramstyle,
+            namespace,
+            _get_table_name(table),
+            columns,
+            plan_key,
+        )
+    )
+    return blake2b(data.encode(), digest_size=16).digest()
+
+
+def get_compiled_query(
+    query_plan: QueryPlan,
+    table: GenericTable,
+    attr_map: Dict[str, GenericColumn],
+    dialect: Dialect,
+    table_mapping: Union[List[Tuple[GenericTable, GenericExpression]], None] = None,
+    operator_override_fns: Union[OperatorFnMap, None] = None,
+    cache: Union[SharedQueryCache, None] = None,
+    namespace: str = "",
+) -> CompiledQuery:
+    """Build the query for a plan and compile it for `dialect`, reusing the SQL compiled by any
+    process sharing `cache`.
+
+    Entries are keyed by the canonical plan, the adapter version, the dialect, the table and the
+    `attr_map` columns. Use `namespace` to tell apart calls which differ otherwise, e.g. in their
+    `table_mapping` or `operator_override_fns`.
+
+    Overrides from `large_in_fn(strategy="temp_table")` are refused, as their tables are only
+    filled when the statement itself is executed.
+    """
+    if any(
+        getattr(fn, "uses_temp_tables", False)
+        for fn in (operator_override_fns or {}).values()
+    ):
+        raise ValueError(
+            "the 'temp_table' large 'in' strategy can't be used with compiled queries"
+        )
+    plan = parse_plan(query_plan)
+    key = None
+    if cache is not None:
+        key = _cache_key(plan_hash(plan), table, attr_map, dialect, namespace)
+        payload = cache.get(key)
+        if payload is not None:
+            entry = json.loads(payload)
+            params = entry["params"]
+            return CompiledQuery(
+                entry["sql"], tuple(params) if isinstance(params, list) else params
+            )
+
+    query = get_query(plan, table, attr_map, table_mapping, operator_override_fns)
+    compiled = query.compile(
+        dialect=dialect, compile_kwargs={"render_postcompile": True}
+    )
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[k] for k in compiled.positiontup)
+    result = CompiledQuery(str(compiled), params)
+
+    if key is not None:
+        try:
+            payload = json.dumps({"sql": result.sql, "params": result.params}).encode()
+        except TypeError:
+            # bind values JSON can't represent aren't shared
+            return result
+        cache.put(key, payload)
+    return result
@@ -0,0 +1,66 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Tuple, Union
+
+from cerbos_query_core import ALWAYS_ALLOWED, QueryPlan, parse_plan
+
+from cerbos_sqlalchemy.query import (
+    GenericColumn,
+    GenericExpression,
+    GenericTable,
+    OperatorFnMap,
+    get_query,
+)
+from sqlalchemy import union_all
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.expression import ColumnElement, CompoundSelect
+
+
+class KindQuery(NamedTuple):
+    """A resource kind's part of a union: its plan, table and attribute map, and the columns it
+    selects, which must line up with (and are best labelled like) every other kind's."""
+
+    query_plan: QueryPlan
+    table: GenericTable
+    attr_map: Dict[str, GenericColumn]
+    columns: Sequence[ColumnElement]
+    table_mapping: Union[List[Tuple[GenericTable, GenericExpression]], None] = None
+    operator_override_fns: Union[OperatorFnMap, None] = None
+
+
+def get_union_query(
+    kinds: Iterable[KindQuery],
+    order_by: Sequence[Any] = (),
+    limit: Union[int, None] = None,
+) -> Union[CompoundSelect, Select]:
+    """Combine the authorized queries of several resource kinds into a single `UNION ALL`.
+
+    Each kind selects its `columns` from its table, filtered by its plan. `order_by` and `limit`
+    apply to the whole union, so refer to its columns by label, e.g. `desc("created_at")`. Kinds
+    whose plans are always denied are left out.
+    """
+    selects: List[Select] = []
+    denied = None
+    for kind in kinds:
+        plan = parse_plan(kind.query_plan)
+        query = get_query(
+            plan,
+            kind.table,
+            kind.attr_map,
+            kind.table_mapping,
+            kind.operator_override_fns,
+        ).with_only_columns(*kind.columns)
+        if plan.kind != ALWAYS_ALLOWED and plan.condition is None:
+            denied = query
+        else:
+            selects.append(query)
+
+    if not selects:
+        if denied is None:
+            raise ValueError("get_union_query() requires at least one resource kind")
+        # still has the columns of the union, and returns no rows
+        selects.append(denied)
+    query = selects[0] if len(selects) == 1 else union_all(*selects)
+    if order_by:
+        query = query.order_by(*order_by)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
@@ -0,0 +1,76 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from cerbos_query_core import PlanRequest, QueryPlan, fetch_plans
+
+from cerbos_sqlalchemy.query import (
+    GenericColumn,
+    GenericExpression,
+    GenericTable,
+    OperatorFnMap,
+)
+from cerbos_sqlalchemy.shared_cache import (
+    CompiledQuery,
+    SharedQueryCache,
+    get_compiled_query,
+)
+from sqlalchemy.engine import Dialect
+
+
+@dataclass
+class WarmupReport:
+    # wall clock time of the whole warm-up, in seconds
+    duration: float
+    # seconds spent waiting for Cerbos to plan `PlanRequest`s
+    planning_time: float
+    # per plan translation + compilation times in seconds, in input order
+    timings: List[float] = field(default_factory=list)
+    queries: List[CompiledQuery] = field(default_factory=list)
+    # plans another process had already compiled into the shared cache
+    cached: int = 0
+
+    @property
+    def plans(self) -> int:
+        return len(self.timings)
+
+
+def warm_up(
+    items: Iterable[Union[PlanRequest, QueryPlan]],
+    table: GenericTable,
+    attr_map: Dict[str, GenericColumn],
+    dialect: Dialect,
+    table_mapping: Union[List[Tuple[GenericTable, GenericExpression]], None] = None,
+    operator_override_fns: Union[OperatorFnMap, None] = None,
+    client: Any = None,
+    cache: Union[SharedQueryCache, None] = None,
+    namespace: str = "",
+) -> WarmupReport:
+    """Translate and compile filters for `dialect` ahead of the first requests, e.g. at startup.
+
+    `items` are recorded plans (see `replay.load_plans`) or `PlanRequest`s, which are planned
+    with `client`. Compiled queries are stored in `cache`, if given, for every process sharing it.
+    """
+    start = time.perf_counter()
+    hits = cache.hits if cache is not None else 0
+    report = WarmupReport(duration=0.0, planning_time=0.0)
+    for query_plan, planning_time in fetch_plans(items, client):
+        report.planning_time += planning_time
+        t0 = time.perf_counter()
+        report.queries.append(
+            get_compiled_query(
+                query_plan,
+                table,
+                attr_map,
+                dialect,
+                table_mapping,
+                operator_override_fns,
+                cache=cache,
+                namespace=namespace,
+            )
+        )
+        report.timings.append(time.perf_counter() - t0)
+    if cache is not None:
+        report.cached = cache.hits - hits
+    report.duration = time.perf_counter() - start
+    return report
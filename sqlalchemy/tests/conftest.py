@@ -17,6 +17,7 @@ from sqlalchemy import (
     Integer,
     String,
     create_engine,
+    delete,
     insert,
 )
 from sqlalchemy.orm import declarative_base, relationship
@@ -59,11 +60,7 @@ class Resource(Base):
     creator = relationship("User", foreign_keys=[createdBy])
 
 
-@pytest.fixture(scope="module")
-def engine():
-    # in-memory database
-    engine = create_engine("sqlite://")
-
+def seed(engine):
     # generate tables from sqla metadata
     Base.metadata.create_all(engine)
 
@@ -109,8 +106,43 @@ def engine():
         if not _is_sqla_14():
             conn.commit()
 
+
+@pytest.fixture(scope="module")
+def engine():
+    # in-memory database
+    engine = create_engine("sqlite://")
+    seed(engine)
+
+    yield engine
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    # file backed database, for tests which need more than one connection
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    seed(engine)
+
     yield engine
 
+    engine.dispose()
+
+
+@pytest.fixture
+def shard_engines(tmp_path):
+    # the resources partitioned by owner into file backed databases, one per owner
+    engines = {}
+    for owner in ("1", "2"):
+        engine = create_engine(f"sqlite:///{tmp_path / f'shard{owner}.db'}")
+        seed(engine)
+        with engine.begin() as conn:
+            conn.execute(delete(Resource.__table__).where(Resource.ownedBy != owner))
+        engines[owner] = engine
+
+    yield engines
+
+    for engine in engines.values():
+        engine.dispose()
+
 
 @pytest.fixture
 def conn(engine):
@@ -0,0 +1,69 @@
+from cerbos.sdk.model import PlanResourcesFilterKind
+from helpers import expr, leaf, sdk_plan
+
+from cerbos_sqlalchemy import advise_indexes
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table
+
+_PLANS = [
+    sdk_plan(expr("and", leaf("gt", "aNumber", 1), leaf("eq", "aString", "s"))),
+    sdk_plan(
+        expr(
+            "or",
+            expr("and", leaf("eq", "aString", "s"), leaf("lt", "aNumber", 5)),
+            leaf("eq", "name", "resource1"),
+        )
+    ),
+    sdk_plan(None, kind=PlanResourcesFilterKind.ALWAYS_ALLOWED),
+]
+
+
+class TestAdviseIndexes:
+    def test_unindexed(self, resource_table, user_table):
+        attr = {
+            "request.resource.attr.aNumber": resource_table.aNumber,
+            "request.resource.attr.aString": resource_table.aString,
+            "request.resource.attr.name": resource_table.name,
+        }
+        table_mapping = [(user_table, resource_table.ownedBy == user_table.id)]
+        report = advise_indexes(_PLANS, attr, table_mapping)
+
+        usages = {(u.table, u.column): u for u in report.columns}
+        assert usages[("resource", "aNumber")].operators == {"gt", "lt"}
+        assert usages[("resource", "aNumber")].occurrences == 2
+        assert usages[("user", "id")].indexed
+        assert not usages[("resource", "ownedBy")].indexed
+
+        assert [(c.columns, c.occurrences) for c in report.combinations] == [
+            (("aNumber", "aString"), 2)
+        ]
+        assert [(s.table, s.columns) for s in report.suggestions] == [
+            ("resource", ("aString", "aNumber")),
+            ("resource", ("name",)),
+            ("resource", ("ownedBy",)),
+        ]
+
+    def test_covered_by_existing_index(self):
+        t = Table(
+            "indexed",
+            MetaData(),
+            Column("id", Integer, primary_key=True),
+            Column("tenant", String),
+            Column("score", Integer),
+            Column("code", String, unique=True),
+            Index("ix_tenant_score", "tenant", "score"),
+        )
+        attr = {
+            "request.resource.attr.tenant": t.c.tenant,
+            "request.resource.attr.score": t.c.score,
+            "request.resource.attr.code": t.c.code,
+        }
+        plans = [
+            sdk_plan(expr("and", leaf("ge", "score", 1), leaf("eq", "tenant", "a"))),
+            sdk_plan(leaf("eq", "code", "x")),
+            sdk_plan(leaf("eq", "score", 1)),
+        ]
+        report = advise_indexes(plans, attr)
+        usages = {u.column: u.indexed for u in report.columns}
+        assert usages == {"tenant": True, "score": False, "code": True}
+        assert report.combinations[0].indexed
+        assert [s.columns for s in report.suggestions] == [("score",)]
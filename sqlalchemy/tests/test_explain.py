@@ -0,0 +1,63 @@
+from helpers import leaf, sdk_plan
+
+from cerbos_sqlalchemy.explain import explain_query
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine
+
+
+class TestExplainQuery:
+    def test_full_scan(self, resource_table, user_table, conn):
+        attr = {"request.resource.attr.aBool": resource_table.aBool}
+        table_mapping = [(user_table, resource_table.ownedBy == user_table.id)]
+        report = explain_query(
+            sdk_plan(leaf("eq", "aBool", True)),
+            conn,
+            resource_table,
+            attr,
+            table_mapping,
+        )
+
+        assert report.dialect == "sqlite"
+        assert report.sql.startswith("SELECT")
+        assert report.full_scans == ["resource"]
+        # `user` is joined on its primary key
+        assert report.nested_loops == []
+        assert report.unindexed_columns == ["resource.aBool"]
+        assert not report.ok
+
+    def test_indexed(self, resource_table, conn):
+        attr = {"request.resource.attr.id": resource_table.id}
+        report = explain_query(
+            sdk_plan(leaf("eq", "id", 1)), conn, resource_table, attr
+        )
+        assert report.ok
+        assert report.plan[0][-1].startswith("SEARCH resource")
+
+    def test_unindexed_join(self):
+        metadata = MetaData()
+        doc = Table(
+            "doc",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("team_code", String),
+        )
+        team = Table(
+            "team",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("code", String),
+            Column("name", String),
+        )
+        engine = create_engine("sqlite://")
+        metadata.create_all(engine)
+        attr = {"request.resource.attr.team": team.c.name}
+        with engine.connect() as conn:
+            report = explain_query(
+                sdk_plan(leaf("eq", "team", "a")),
+                conn,
+                doc,
+                attr,
+                [(team, doc.c.team_code == team.c.code)],
+            )
+        # whichever side SQLite drives the join from, the other side has no usable index
+        assert len(report.nested_loops) == 1
+        assert report.unindexed_columns == ["team.name"]
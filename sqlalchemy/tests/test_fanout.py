@@ -0,0 +1,68 @@
+import pytest
+from helpers import leaf_plan, response
+
+from cerbos_sqlalchemy.fanout import fan_out
+
+
+@pytest.fixture
+def attr(resource_table):
+    return {
+        "request.resource.attr.aBool": resource_table.aBool,
+        "request.resource.attr.ownedBy": resource_table.ownedBy,
+    }
+
+
+class TestFanOut:
+    def test_merged(self, resource_table, attr, shard_engines):
+        engines = list(shard_engines.values())
+        result = fan_out(leaf_plan("eq", "aBool", True), resource_table, attr, engines)
+        assert sorted(r.name for r in result.rows) == ["resource1", "resource3"]
+        assert [s.shard for s in result.shards] == engines
+        assert [len(s.rows) for s in result.shards] == [1, 1]
+        assert all(s.duration > 0 for s in result.shards)
+
+    def test_order_and_limit(self, resource_table, attr, shard_engines):
+        plan = response({"kind": "KIND_ALWAYS_ALLOWED"})
+        engines = shard_engines.values()
+        result = fan_out(
+            plan,
+            resource_table,
+            attr,
+            engines,
+            order_by=[resource_table.aNumber.desc()],
+            limit=2,
+        )
+        assert [r.name for r in result.rows] == ["resource3", "resource2"]
+        # pushed down to each engine
+        assert [len(s.rows) for s in result.shards] == [2, 1]
+
+        result = fan_out(
+            plan, resource_table, attr, engines, order_by=[resource_table.name]
+        )
+        assert [r.name for r in result.rows] == ["resource1", "resource2", "resource3"]
+
+    def test_shard_routing(self, resource_table, attr, shard_engines):
+        plan = leaf_plan("in", "ownedBy", ["2"])
+        result = fan_out(
+            plan,
+            resource_table,
+            attr,
+            shard_engines.values(),
+            shard_key="request.resource.attr.ownedBy",
+            shard_for=shard_engines.__getitem__,
+        )
+        assert [s.shard for s in result.shards] == [shard_engines["2"]]
+        assert [r.name for r in result.rows] == ["resource3"]
+
+        denied = response({"kind": "KIND_ALWAYS_DENIED"})
+        result = fan_out(denied, resource_table, attr, shard_engines.values())
+        assert result == ([], [])
+
+        with pytest.raises(TypeError):
+            fan_out(
+                plan,
+                resource_table,
+                attr,
+                [],
+                shard_key="request.resource.attr.ownedBy",
+            )
@@ -0,0 +1,23 @@
+from cerbos_query_core.importtime import import_times
+
+# Modules which only plans built with the HTTP or gRPC clients (or other features) need
+_LAZY_MODULES = (
+    "google.protobuf",
+    "cerbos.engine.v1.engine_pb2",
+    "cerbos.response.v1.response_pb2",
+    "cerbos.sdk.model",
+    "dataclasses_json",
+    "multiprocessing",
+    "sqlalchemy.orm",
+)
+
+
+class TestImports:
+    def test_lazy_modules_not_imported(self):
+        times = import_times("import cerbos_sqlalchemy")
+        assert "cerbos_sqlalchemy" in times
+        imported = [m for m in _LAZY_MODULES if m in times]
+        assert imported == [], (
+            f"cerbos_sqlalchemy ({times['cerbos_sqlalchemy']}us, of which sqlalchemy "
+            f"{times['sqlalchemy']}us) imports {imported}"
+        )
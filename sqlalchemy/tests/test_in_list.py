@@ -0,0 +1,107 @@
+import pytest
+from helpers import leaf_plan
+
+from cerbos_sqlalchemy import get_query
+from cerbos_sqlalchemy.in_list import large_in_fn
+from cerbos_sqlalchemy.shared_cache import get_compiled_query
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import mysql, postgresql
+from sqlalchemy.engine import default
+from sqlalchemy.exc import CompileError
+
+# long enough to pass a threshold of 2, with values matching no rows
+_NUMBERS = [1, 3, *range(100, 150)]
+_STRINGS = ["string", "anotherString", *(f"s{n}" for n in range(50))]
+
+
+@pytest.fixture
+def attr(resource_table):
+    return {
+        "request.resource.attr.aNumber": resource_table.aNumber,
+        "request.resource.attr.aString": resource_table.aString,
+    }
+
+
+def _query(resource_table, attr, plan, fn):
+    return get_query(plan, resource_table, attr, operator_override_fns={"in": fn})
+
+
+class TestLargeInFn:
+    @pytest.mark.parametrize("strategy", ["array", "values", "temp_table"])
+    def test_strategies(self, strategy, resource_table, attr, conn):
+        fn = large_in_fn(2, strategy, engine=conn)
+        for plan in (
+            leaf_plan("in", "aNumber", _NUMBERS),
+            leaf_plan("in", "aString", _STRINGS),
+        ):
+            query = _query(resource_table, attr, plan, fn)
+            assert "IN (__[POSTCOMPILE" not in str(query)
+            names = {r.name for r in conn.execute(query).fetchall()}
+            assert names == {"resource1", "resource3"}
+
+    def test_below_threshold(self, resource_table, attr):
+        query = _query(
+            resource_table, attr, leaf_plan("in", "aNumber", _NUMBERS), large_in_fn()
+        )
+        assert "IN (__[POSTCOMPILE" in str(query)
+
+    def test_array_postgresql(self, resource_table, attr):
+        query = _query(
+            resource_table, attr, leaf_plan("in", "aNumber", _NUMBERS), large_in_fn(2)
+        )
+        compiled = query.compile(dialect=postgresql.dialect())
+        assert 'resource."aNumber" = ANY (' in str(compiled)
+        assert list(compiled.params.values()) == [_NUMBERS]
+
+        with pytest.raises(CompileError):
+            query.compile(dialect=mysql.dialect())
+
+    def test_array_statement_cache(self, engine, resource_table, attr, conn):
+        hits = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            hits.append(context.cache_hit == default.CACHE_HIT)
+
+        event.listen(engine, "before_cursor_execute", record)
+        fn = large_in_fn(2)
+        # lists of any length share a compiled statement
+        for values in (_NUMBERS, _NUMBERS[:10], [2, *_NUMBERS]):
+            query = _query(resource_table, attr, leaf_plan("in", "aNumber", values), fn)
+            conn.execute(query).fetchall()
+        event.remove(engine, "before_cursor_execute", record)
+        assert hits[1:] == [True, True]
+
+    def test_temp_table_lifetime(self, engine, resource_table, attr):
+        def temp_tables(conn):
+            return inspect(conn).get_temp_table_names()
+
+        fn = large_in_fn(2, "temp_table", engine=engine)
+        with engine.connect() as conn:
+            query = _query(
+                resource_table, attr, leaf_plan("in", "aNumber", _NUMBERS), fn
+            )
+            # created when the statement runs, not when it's built
+            assert temp_tables(conn) == []
+            for _ in range(2):
+                names = {r.name for r in conn.execute(query).fetchall()}
+                assert names == {"resource1", "resource3"}
+            assert len(temp_tables(conn)) == 2
+        with engine.connect() as conn:
+            assert temp_tables(conn) == []
+
+    def test_temp_table_compiled(self, engine, resource_table, attr):
+        fn = large_in_fn(2, "temp_table", engine=engine)
+        with pytest.raises(ValueError):
+            get_compiled_query(
+                leaf_plan("in", "aNumber", _NUMBERS),
+                resource_table,
+                attr,
+                engine.dialect,
+                operator_override_fns={"in": fn},
+            )
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            large_in_fn(strategy="unnest")
+        with pytest.raises(TypeError):
+            large_in_fn(strategy="temp_table")
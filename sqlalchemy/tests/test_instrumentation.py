@@ -0,0 +1,47 @@
+from cerbos.response.v1 import response_pb2
+from cerbos.sdk.model import PlanResourcesResponse
+from google.protobuf.json_format import ParseDict
+from helpers import conditional, expr, leaf, response
+
+from cerbos_sqlalchemy import get_query
+
+_CONDITIONAL = conditional(
+    expr("or", leaf("eq", "aBool", True), expr("not", leaf("eq", "ownedBy", "1")))
+)
+
+
+class TestInstrumentation:
+    def test_conditional_metrics(self, resource_table, user_table):
+        attr = {
+            "request.resource.attr.aBool": resource_table.aBool,
+            "request.resource.attr.ownedBy": user_table.id,
+        }
+        table_mapping = [(user_table, resource_table.ownedBy == user_table.id)]
+        for plan in (
+            PlanResourcesResponse.from_dict(_CONDITIONAL),
+            ParseDict(_CONDITIONAL, response_pb2.PlanResourcesResponse()),
+        ):
+            collected = []
+            get_query(
+                plan, resource_table, attr, table_mapping, on_metrics=collected.append
+            )
+
+            (m,) = collected
+            assert m.filter_kind == "KIND_CONDITIONAL"
+            assert m.conversion_time > 0
+            assert m.traversal_time > 0
+            assert (m.node_count, m.max_depth) == (8, 4)
+            assert m.joins == 1
+            assert m.subqueries == 0
+
+    def test_constant_filter_metrics(self, resource_table):
+        for kind in ("KIND_ALWAYS_ALLOWED", "KIND_ALWAYS_DENIED"):
+            collected = []
+            plan = ParseDict(
+                response({"kind": kind}), response_pb2.PlanResourcesResponse()
+            )
+            get_query(plan, resource_table, {}, on_metrics=collected.append)
+            assert [m.filter_kind for m in collected] == [kind]
+            assert collected[0].node_count == 0
+            # the plan is still parsed
+            assert collected[0].conversion_time > 0
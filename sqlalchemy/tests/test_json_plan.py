@@ -0,0 +1,136 @@
+import json
+
+import pytest
+from cerbos.sdk.model import PlanResourcesResponse
+from helpers import response
+
+from cerbos_sqlalchemy import get_query, parse_plan_json, plan_hash, select_shards
+from cerbos_sqlalchemy.advisor import advise_indexes
+from sqlalchemy import create_engine
+
+
+def _response(filter: dict) -> dict:
+    return {
+        **response(filter),
+        "meta": {"filterDebug": "(request.resource.attr.aBool == true)"},
+    }
+
+
+_CONDITIONAL = _response(
+    {
+        "kind": "KIND_CONDITIONAL",
+        "condition": {
+            "expression": {
+                "operator": "and",
+                "operands": [
+                    {
+                        "expression": {
+                            "operator": "eq",
+                            "operands": [
+                                {"variable": "request.resource.attr.aBool"},
+                                {"value": True},
+                            ],
+                        }
+                    },
+                    {
+                        "expression": {
+                            "operator": "in",
+                            "operands": [
+                                {"variable": "request.resource.attr.aString"},
+                                {"value": ["string", "anotherString"]},
+                            ],
+                        }
+                    },
+                ],
+            }
+        },
+    }
+)
+
+
+class TestJsonPlan:
+    @pytest.mark.parametrize("encode", [json.dumps, lambda d: json.dumps(d).encode()])
+    def test_raw_json(self, resource_table, conn, encode):
+        attr = {
+            "request.resource.attr.aBool": resource_table.aBool,
+            "request.resource.attr.aString": resource_table.aString,
+        }
+        query = get_query(encode(_CONDITIONAL), resource_table, attr)
+        sdk_query = get_query(
+            PlanResourcesResponse.from_dict(_CONDITIONAL), resource_table, attr
+        )
+        assert str(query) == str(sdk_query)
+
+        res = conn.execute(query).fetchall()
+        assert {r.name for r in res} == {"resource1", "resource3"}
+
+    def test_constant_filters(self, resource_table, conn):
+        allowed = json.dumps(_response({"kind": "KIND_ALWAYS_ALLOWED"}))
+        denied = json.dumps(_response({"kind": "KIND_ALWAYS_DENIED"}))
+        assert len(conn.execute(get_query(allowed, resource_table, {})).fetchall()) == 3
+        assert conn.execute(get_query(denied, resource_table, {})).fetchall() == []
+
+    def test_metrics(self, resource_table):
+        attr = {
+            "request.resource.attr.aBool": resource_table.aBool,
+            "request.resource.attr.aString": resource_table.aString,
+        }
+        collected = []
+        get_query(
+            json.dumps(_CONDITIONAL), resource_table, attr, on_metrics=collected.append
+        )
+        (m,) = collected
+        assert m.filter_kind == "KIND_CONDITIONAL"
+        assert m.conversion_time > 0
+        assert m.node_count == 7
+
+    def test_parsed_plan_reuse(self, resource_table):
+        plan = parse_plan_json(json.dumps(_CONDITIONAL))
+        attr = {
+            "request.resource.attr.aBool": resource_table.aBool,
+            "request.resource.attr.aString": resource_table.aString,
+        }
+        report = advise_indexes([plan], attr)
+        assert {u.column for u in report.columns} == {"aBool", "aString"}
+        assert str(get_query(plan, resource_table, attr)) == str(
+            get_query(plan, resource_table, attr)
+        )
+
+    def test_plan_hash(self, resource_table):
+        attr = {
+            "request.resource.attr.aBool": resource_table.aBool,
+            "request.resource.attr.aString": resource_table.aString,
+        }
+        # another principal, whose plan lists the operands the other way round
+        reordered = json.loads(json.dumps(_CONDITIONAL))
+        reordered["requestId"] = "2"
+        reordered["filter"]["condition"]["expression"]["operands"].reverse()
+
+        # a dict stands in for an external cache shared by processes
+        cache = {}
+        for plan in (
+            PlanResourcesResponse.from_dict(_CONDITIONAL),
+            json.dumps(reordered),
+        ):
+            key = plan_hash(plan)
+            if key not in cache:
+                cache[key] = str(get_query(plan, resource_table, attr))
+        assert len(cache) == 1
+
+    def test_select_shards(self):
+        # resources partitioned across engines by the first letter of `aString`
+        engines = {letter: create_engine("sqlite://") for letter in "asx"}
+        shards = list(engines.values())
+
+        def shard_for(value):
+            return engines[value[0]]
+
+        selected = select_shards(
+            json.dumps(_CONDITIONAL), "request.resource.attr.aString", shard_for, shards
+        )
+        assert selected == [engines["a"], engines["s"]]
+        # not limited by the plan
+        assert (
+            select_shards(_CONDITIONAL, "request.resource.attr.name", shard_for, shards)
+            == shards
+        )
@@ -0,0 +1,30 @@
+import pytest
+from helpers import leaf_plan, response
+
+from cerbos_sqlalchemy.membership import authorized_ids
+
+
+@pytest.fixture
+def attr(resource_table):
+    return {"request.resource.attr.aBool": resource_table.aBool}
+
+
+class TestAuthorizedIds:
+    def test_primary_keys(self, conn, resource_table, attr):
+        ids = authorized_ids(leaf_plan("eq", "aBool", True), conn, resource_table, attr)
+        assert sorted(ids) == [1, 3]
+        assert 1 in ids and 2 not in ids
+
+    def test_id_column(self, conn, resource_table, attr):
+        ids = authorized_ids(
+            leaf_plan("eq", "aBool", True),
+            conn,
+            resource_table,
+            attr,
+            id_column=resource_table.name,
+        )
+        assert ids == frozenset({"resource1", "resource3"})
+
+    def test_denied(self, conn, resource_table, attr):
+        denied = response({"kind": "KIND_ALWAYS_DENIED"})
+        assert len(authorized_ids(denied, conn, resource_table, attr)) == 0
@@ -4,8 +4,9 @@ from cerbos.sdk.model import (
     PlanResourcesFilterKind,
     PlanResourcesResponse,
 )
+from cerbos_query_core import CONDITIONAL, And, Compare, Or, Plan
 
-from cerbos_sqlalchemy import get_query
+from cerbos_sqlalchemy import get_criteria, get_query
 from sqlalchemy import any_
 
 
@@ -370,3 +371,172 @@ class TestGetQueryOverrides:
         )
         query = query.with_only_columns(resource_table.id)
         assert "= ANY (" in str(query)
+
+
+class TestGetQueryShared:
+    def test_exists(self, resource_table, conn):
+        # request.resource.attr.owners.exists(x, x in ["2"])
+        plan_resources_filter = PlanResourcesFilter.from_dict(
+            {
+                "kind": PlanResourcesFilterKind.CONDITIONAL,
+                "condition": {
+                    "expression": {
+                        "operator": "exists",
+                        "operands": [
+                            {"variable": "request.resource.attr.owners"},
+                            {
+                                "expression": {
+                                    "operator": "lambda",
+                                    "operands": [
+                                        {
+                                            "expression": {
+                                                "operator": "in",
+                                                "operands": [
+                                                    {"variable": "x"},
+                                                    {"value": ["2"]},
+                                                ],
+                                            }
+                                        },
+                                        {"variable": "x"},
+                                    ],
+                                }
+                            },
+                        ],
+                    },
+                },
+            }
+        )
+        plan_resource_resp = PlanResourcesResponse(
+            filter=plan_resources_filter,
+            **_default_resp_params(),
+        )
+        attr = {"request.resource.attr.owners": resource_table.ownedBy}
+        res = conn.execute(
+            get_query(plan_resource_resp, resource_table, attr)
+        ).fetchall()
+        assert [r.name for r in res] == ["resource3"]
+
+    def test_all_unsupported(self, resource_table):
+        # request.resource.attr.owners.all(x, x == "2")
+        plan_resources_filter = PlanResourcesFilter.from_dict(
+            {
+                "kind": PlanResourcesFilterKind.CONDITIONAL,
+                "condition": {
+                    "expression": {
+                        "operator": "all",
+                        "operands": [
+                            {"variable": "request.resource.attr.owners"},
+                            {
+                                "expression": {
+                                    "operator": "lambda",
+                                    "operands": [
+                                        {
+                                            "expression": {
+                                                "operator": "eq",
+                                                "operands": [
+                                                    {"variable": "x"},
+                                                    {"value": "2"},
+                                                ],
+                                            }
+                                        },
+                                        {"variable": "x"},
+                                    ],
+                                }
+                            },
+                        ],
+                    },
+                },
+            }
+        )
+        plan_resource_resp = PlanResourcesResponse(
+            filter=plan_resources_filter,
+            **_default_resp_params(),
+        )
+        attr = {"request.resource.attr.owners": resource_table.ownedBy}
+        with pytest.raises(ValueError, match="'all' .* requires exists_subqueries"):
+            get_query(plan_resource_resp, resource_table, attr)
+
+    def test_not_several_operands(self, resource_table, conn):
+        # `not` negates the conjunction of its operands, as in the Django adapter
+        plan_resources_filter = PlanResourcesFilter.from_dict(
+            {
+                "kind": PlanResourcesFilterKind.CONDITIONAL,
+                "condition": {
+                    "expression": {
+                        "operator": "not",
+                        "operands": [
+                            {
+                                "expression": {
+                                    "operator": "eq",
+                                    "operands": [
+                                        {"variable": "request.resource.attr.aBool"},
+                                        {"value": True},
+                                    ],
+                                }
+                            },
+                            {
+                                "expression": {
+                                    "operator": "eq",
+                                    "operands": [
+                                        {"variable": "request.resource.attr.ownedBy"},
+                                        {"value": "1"},
+                                    ],
+                                }
+                            },
+                        ],
+                    },
+                },
+            }
+        )
+        plan_resource_resp = PlanResourcesResponse(
+            filter=plan_resources_filter,
+            **_default_resp_params(),
+        )
+        attr = {
+            "request.resource.attr.aBool": resource_table.aBool,
+            "request.resource.attr.ownedBy": resource_table.ownedBy,
+        }
+        res = conn.execute(
+            get_query(plan_resource_resp, resource_table, attr)
+        ).fetchall()
+        assert {r.name for r in res} == {"resource2", "resource3"}
+
+
+class TestKnownAttributes:
+    def test_folded(self, resource_table, conn):
+        # request.resource.attr.ownedBy == "1" && (aNumber > 1 || aBool == true)
+        plan = Plan(
+            CONDITIONAL,
+            And(
+                [
+                    Compare("eq", "request.resource.attr.ownedBy", "1"),
+                    Or(
+                        [
+                            Compare("gt", "request.resource.attr.aNumber", 1),
+                            Compare("eq", "request.resource.attr.aBool", True),
+                        ]
+                    ),
+                ]
+            ),
+        )
+        attr = {
+            "request.resource.attr.ownedBy": resource_table.ownedBy,
+            "request.resource.attr.aNumber": resource_table.aNumber,
+            "request.resource.attr.aBool": resource_table.aBool,
+        }
+        # listing one owner's resources
+        query = get_query(
+            plan,
+            resource_table,
+            attr,
+            known_attributes={"request.resource.attr.ownedBy": "1"},
+        )
+        assert '"ownedBy"' not in str(query.whereclause)
+        query = query.where(resource_table.ownedBy == "1")
+        assert {r.name for r in conn.execute(query)} == {"resource1", "resource2"}
+
+        # another owner's, with no query needed
+        known = {"request.resource.attr.ownedBy": "2"}
+        query = get_query(plan, resource_table, attr, known_attributes=known)
+        assert str(query.whereclause) == "false"
+        assert str(get_criteria(plan, attr, known_attributes=known)) == "false"
@@ -0,0 +1,59 @@
+from cerbos.response.v1 import response_pb2
+from cerbos.sdk.model import PlanResourcesResponse
+from google.protobuf.json_format import ParseDict
+
+from cerbos_sqlalchemy.replay import replay
+
+_RESPONSE = {
+    "requestId": "1",
+    "action": "action",
+    "resourceKind": "resource",
+    "policyVersion": "default",
+    "filter": {
+        "kind": "KIND_CONDITIONAL",
+        "condition": {
+            "expression": {
+                "operator": "eq",
+                "operands": [
+                    {"variable": "request.resource.attr.aBool"},
+                    {"value": True},
+                ],
+            }
+        },
+    },
+}
+
+
+def _http_plan() -> PlanResourcesResponse:
+    return PlanResourcesResponse.from_dict(_RESPONSE)
+
+
+def _grpc_plan() -> response_pb2.PlanResourcesResponse:
+    return ParseDict(_RESPONSE, response_pb2.PlanResourcesResponse())
+
+
+class TestReplay:
+    def test_replay(self, file_engine, resource_table):
+        attr = {"request.resource.attr.aBool": resource_table.aBool}
+        report = replay(
+            [_http_plan(), _grpc_plan()],
+            file_engine,
+            resource_table,
+            attr,
+            concurrency=4,
+            iterations=5,
+        )
+        assert report.requests == 10
+        # two matching rows per request
+        assert report.rows == 20
+        assert report.throughput > 0
+        assert report.latencies == sorted(report.latencies)
+        assert report.percentile(50) <= report.percentile(99) == report.latencies[-1]
+        assert set(report.summary()) == {
+            "requests",
+            "throughput",
+            "p50",
+            "p90",
+            "p99",
+            "max",
+        }
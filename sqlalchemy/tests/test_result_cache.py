@@ -0,0 +1,143 @@
+import pytest
+from helpers import leaf_plan
+
+from cerbos_sqlalchemy import get_query
+from cerbos_sqlalchemy.result_cache import AuthorizedResultCache
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def attr(resource_table):
+    return {"request.resource.attr.aBool": resource_table.aBool}
+
+
+@pytest.fixture
+def query(resource_table, attr):
+    return lambda value: get_query(
+        leaf_plan("eq", "aBool", value), resource_table, attr
+    )
+
+
+@pytest.fixture
+def cache():
+    cache = AuthorizedResultCache()
+    cache.install(Session)
+    yield cache
+    cache.uninstall(Session)
+
+
+@pytest.fixture
+def statements(file_engine):
+    statements = []
+
+    @event.listens_for(file_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    return statements
+
+
+class TestAuthorizedResultCache:
+    def test_hit(self, cache, file_engine, statements, query):
+        with file_engine.connect() as conn:
+            first = cache.execute(conn, query(True))
+            second = cache.execute(conn, query(True))
+            other = cache.execute(conn, query(False))
+
+        assert [r.name for r in first] == ["resource1", "resource3"]
+        assert second == first
+        assert [r.name for r in other] == ["resource2"]
+        assert len(statements) == 2
+        assert (cache.cache.hits, cache.cache.misses) == (1, 2)
+
+    def test_final_statement(
+        self, cache, file_engine, statements, query, resource_table
+    ):
+        # ordering and pagination are part of the key
+        with file_engine.connect() as conn:
+            for _ in range(2):
+                first = cache.execute(
+                    conn, query(True).order_by(resource_table.name.desc()).limit(1)
+                )
+                second = cache.execute(
+                    conn, query(True).order_by(resource_table.name).limit(1)
+                )
+
+        assert [r.name for r in first] == ["resource3"]
+        assert [r.name for r in second] == ["resource1"]
+        assert len(statements) == 2
+
+    def test_invalidated_by_flush(self, cache, file_engine, query, resource_table):
+        with file_engine.connect() as conn:
+            cache.execute(conn, query(True))
+        with Session(file_engine) as session:
+            session.get(resource_table, 2).aBool = True
+            session.commit()
+        with file_engine.connect() as conn:
+            rows = cache.execute(conn, query(True))
+
+        assert [r.name for r in rows] == ["resource1", "resource2", "resource3"]
+
+    def test_rolled_back_writes(self, cache, file_engine, query, resource_table):
+        with Session(file_engine) as session:
+            session.get(resource_table, 2).aBool = True
+            session.flush()
+            # read by the transaction which wrote, so not cached
+            rows = cache.execute(session.connection(), query(True))
+            assert len(rows) == 3
+            session.rollback()
+        with file_engine.connect() as conn:
+            rows = cache.execute(conn, query(True))
+
+        assert [r.name for r in rows] == ["resource1", "resource3"]
+        assert cache.cache.misses == 1
+
+    def test_invalidated_by_orm_statements(
+        self, cache, file_engine, query, resource_table
+    ):
+        with file_engine.connect() as conn:
+            cache.execute(conn, query(True))
+        with Session(file_engine) as session:
+            session.execute(update(resource_table).values(aBool=False))
+            session.commit()
+        with file_engine.connect() as conn:
+            assert cache.execute(conn, query(True)) == []
+
+    def test_unrelated_writes(self, cache, file_engine, statements, query, user_table):
+        with file_engine.connect() as conn:
+            cache.execute(conn, query(True))
+        with Session(file_engine) as session:
+            session.execute(insert(user_table).values(id=3))
+            session.commit()
+        statements.clear()
+        with file_engine.connect() as conn:
+            cache.execute(conn, query(True))
+
+        assert statements == []
+
+    def test_mapped_tables(self, cache, file_engine, resource_table, user_table):
+        # a filter on the owner's table is invalidated by writes to it
+        attr = {"request.resource.attr.aBool": user_table.id}
+        mapping = [(user_table, resource_table.ownedBy == user_table.id)]
+        with file_engine.begin() as conn:
+            # not through a session, so nothing is invalidated
+            conn.execute(update(resource_table).values(ownedBy="3"))
+        query = get_query(leaf_plan("eq", "aBool", 3), resource_table, attr, mapping)
+        with file_engine.connect() as conn:
+            assert cache.execute(conn, query) == []
+        with Session(file_engine) as session:
+            session.add(user_table(id=3))
+            session.commit()
+        with file_engine.connect() as conn:
+            rows = cache.execute(conn, query)
+
+        assert len(rows) == 3
+
+    def test_invalidate(self, cache, file_engine, statements, query):
+        with file_engine.connect() as conn:
+            cache.execute(conn, query(True))
+            cache.invalidate("resource")
+            cache.execute(conn, query(True))
+
+        assert len(statements) == 2
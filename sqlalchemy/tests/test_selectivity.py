@@ -0,0 +1,73 @@
+import pytest
+from helpers import leaf, sdk_plan
+
+from cerbos_sqlalchemy import get_query, selectivity_from_db
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    insert,
+    text,
+)
+
+_COND = {
+    "expression": {
+        "operator": "and",
+        "operands": [
+            leaf("eq", "aBool", True),
+            leaf("eq", "name", "resource1"),
+            leaf("gt", "aNumber", 0),
+        ],
+    }
+}
+_HINTS = {
+    "request.resource.attr.aBool": 0.5,
+    "request.resource.attr.name": 0.01,
+}
+
+
+class TestGetQuerySelectivity:
+    def test_emitted_order(self, resource_table, conn):
+        attr = {
+            "request.resource.attr.aBool": resource_table.aBool,
+            "request.resource.attr.name": resource_table.name,
+            "request.resource.attr.aNumber": resource_table.aNumber,
+        }
+        query = get_query(sdk_plan(_COND), resource_table, attr, selectivity=_HINTS)
+        where = str(query).split("WHERE", 1)[1]
+        assert where.index("name") < where.index('"aNumber"') < where.index('"aBool"')
+
+        res = conn.execute(query).fetchall()
+        assert len(res) == 1
+        assert res[0].name == "resource1"
+
+    def test_selectivity_from_db_exact(self, resource_table, conn):
+        attr = {
+            "request.resource.attr.aBool": resource_table.aBool,
+            "request.resource.attr.name": resource_table.__table__.c.name,
+        }
+        assert selectivity_from_db(conn, attr) == {}
+        hints = selectivity_from_db(conn, attr, exact=True)
+        assert hints == {
+            "request.resource.attr.aBool": pytest.approx(1 / 2),
+            "request.resource.attr.name": pytest.approx(1 / 3),
+        }
+
+    def test_selectivity_from_db_sqlite_stat1(self):
+        metadata = MetaData()
+        t = Table(
+            "indexed",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("tenant", String, index=True),
+        )
+        engine = create_engine("sqlite://")
+        metadata.create_all(engine)
+        with engine.begin() as c:
+            c.execute(insert(t), [{"tenant": f"tenant{i % 4}"} for i in range(100)])
+            c.execute(text("ANALYZE"))
+            hints = selectivity_from_db(c, {"request.resource.attr.tenant": t.c.tenant})
+        assert hints == {"request.resource.attr.tenant": pytest.approx(1 / 4)}
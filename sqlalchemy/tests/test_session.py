@@ -0,0 +1,93 @@
+import pytest
+from helpers import conditional, leaf, response
+
+from cerbos_sqlalchemy.session import SKIP_AUTHORIZATION, SessionAuthorization
+from sqlalchemy import event, select
+from sqlalchemy.engine import default
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def authorization(resource_table):
+    authorization = SessionAuthorization(
+        {
+            resource_table: {
+                "request.resource.attr.aNumber": resource_table.aNumber,
+                "request.resource.attr.aBool": resource_table.aBool,
+            }
+        }
+    )
+    authorization.install(Session)
+    yield authorization
+    authorization.uninstall(Session)
+
+
+@pytest.fixture
+def cache_hits(engine):
+    hits = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        hits.append(context.cache_hit == default.CACHE_HIT)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield hits
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _names(session: Session, resource_table, **execution_options):
+    statement = select(resource_table).execution_options(**execution_options)
+    return sorted(r.name for r in session.scalars(statement))
+
+
+class TestSessionAuthorization:
+    def test_filters_selects(self, authorization, engine, resource_table):
+        with Session(engine) as session:
+            authorization.set_plan(
+                session, resource_table, conditional(leaf("in", "aNumber", [1, 2]))
+            )
+            assert _names(session, resource_table) == ["resource1", "resource2"]
+            assert session.get(resource_table, 3) is None
+
+            authorization.set_plan(
+                session, resource_table, response({"kind": "KIND_ALWAYS_ALLOWED"})
+            )
+            assert len(_names(session, resource_table)) == 3
+
+    def test_fail_closed(self, authorization, engine, resource_table):
+        with Session(engine) as session:
+            assert _names(session, resource_table) == []
+            # opted out per statement
+            assert (
+                len(_names(session, resource_table, **{SKIP_AUTHORIZATION: True})) == 3
+            )
+
+            authorization.set_plan(
+                session, resource_table, conditional(leaf("eq", "aBool", True))
+            )
+            authorization.clear(session)
+            assert _names(session, resource_table) == []
+
+    def test_unconfigured_entity(self, authorization, user_table):
+        allowed = response({"kind": "KIND_ALWAYS_ALLOWED"})
+        with pytest.raises(KeyError):
+            authorization.set_plan(Session(), user_table, allowed)
+
+    def test_statement_cache(self, authorization, engine, resource_table, cache_hits):
+        # principals whose plans only differ in their values share compiled statements
+        for number in (1, 2, 3, 1):
+            with Session(engine) as session:
+                authorization.set_plan(
+                    session,
+                    resource_table,
+                    conditional(leaf("eq", "aNumber", number)),
+                )
+                assert _names(session, resource_table) == [f"resource{number}"]
+        assert cache_hits[1:] == [True, True, True]
+
+        # a plan of another shape compiles a new statement
+        with Session(engine) as session:
+            authorization.set_plan(
+                session, resource_table, conditional(leaf("eq", "aBool", False))
+            )
+            assert _names(session, resource_table) == ["resource2"]
+        assert cache_hits[-1] is False
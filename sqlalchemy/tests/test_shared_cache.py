@@ -0,0 +1,147 @@
+import importlib.metadata
+import json
+import multiprocessing
+import os
+
+import pytest
+from helpers import leaf_plan
+
+from cerbos_sqlalchemy import shared_cache
+from cerbos_sqlalchemy.shared_cache import SharedQueryCache, get_compiled_query
+from sqlalchemy.dialects import postgresql
+
+_IN = leaf_plan("in", "aString", ["string", "anotherString"])
+
+
+def _key(n: int) -> bytes:
+    return n.to_bytes(16, "little")
+
+
+def _compile_in_child(cache, table, attr):
+    get_compiled_query(_IN, table, attr, postgresql.dialect(), cache=cache)
+    os._exit(0)
+
+
+@pytest.fixture
+def attr(resource_table):
+    return {
+        "request.resource.attr.aString": resource_table.aString,
+        "request.resource.attr.aBool": resource_table.aBool,
+    }
+
+
+class TestSharedQueryCache:
+    def test_get_put(self):
+        cache = SharedQueryCache(size=64 * 1024, slot_size=256)
+        assert cache.get(_key(1)) is None
+        assert cache.put(_key(1), b"one")
+        assert cache.put(_key(1), b"uno")
+        assert cache.get(_key(1)) == b"uno"
+        assert (cache.hits, cache.misses) == (1, 1)
+        # larger than a slot
+        assert not cache.put(_key(2), bytes(256))
+        cache.clear()
+        assert cache.get(_key(1)) is None
+
+    def test_eviction(self):
+        # a single set of two slots
+        cache = SharedQueryCache(size=32 + 2 * 128, slot_size=128, ways=2)
+        for n in range(3):
+            cache.put(_key(n), str(n).encode())
+        assert cache.get(_key(0)) is None
+        assert [cache.get(_key(n)) for n in (1, 2)] == [b"1", b"2"]
+
+    def test_torn_read(self):
+        cache = SharedQueryCache(size=32 + 128, slot_size=128, ways=1)
+        cache.put(_key(1), b"one")
+        # a writer is part way through the slot
+        cache._mm[32:40] = (3).to_bytes(8, "little")
+        assert cache.get(_key(1)) is None
+
+    def test_file_shared(self, tmp_path):
+        path = str(tmp_path / "cache")
+        writer = SharedQueryCache(path, size=64 * 1024, slot_size=256)
+        reader = SharedQueryCache(path, size=64 * 1024, slot_size=256)
+        writer.put(_key(1), b"one")
+        assert reader.get(_key(1)) == b"one"
+
+        # another layout would move the slots under the processes using the file
+        with pytest.raises(ValueError):
+            SharedQueryCache(path, size=64 * 1024, slot_size=512)
+        assert reader.get(_key(1)) == b"one"
+        for c in (writer, reader):
+            c.close()
+
+    def test_foreign_file(self, tmp_path):
+        path = tmp_path / "cache"
+        path.write_bytes(b"not a cache")
+        with pytest.raises(ValueError):
+            SharedQueryCache(str(path), size=64 * 1024, slot_size=256)
+        assert path.read_bytes() == b"not a cache"
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            SharedQueryCache(size=1024, slot_size=4096)
+
+
+class TestGetCompiledQuery:
+    def test_cached(self, resource_table, attr, conn):
+        cache = SharedQueryCache(size=64 * 1024, slot_size=1024)
+        dialect = conn.dialect
+        first = get_compiled_query(_IN, resource_table, attr, dialect, cache=cache)
+        # the same plan, as another principal's HTTP response would have it
+        reordered = json.loads(json.dumps(_IN))
+        reordered["filter"]["condition"]["expression"]["operands"][1]["value"].reverse()
+        second = get_compiled_query(
+            json.dumps(reordered), resource_table, attr, dialect, cache=cache
+        )
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert second == first
+        assert second.params == ("string", "anotherString")
+
+        res = conn.exec_driver_sql(first.sql, first.params).fetchall()
+        assert {r.name for r in res} == {"resource1", "resource3"}
+
+    def test_versioned_by_dialect_and_namespace(self, resource_table, attr, conn):
+        cache = SharedQueryCache(size=64 * 1024, slot_size=1024)
+        get_compiled_query(_IN, resource_table, attr, conn.dialect, cache=cache)
+        pg = get_compiled_query(
+            _IN, resource_table, attr, postgresql.dialect(), cache=cache
+        )
+        get_compiled_query(
+            _IN, resource_table, attr, conn.dialect, cache=cache, namespace="x"
+        )
+        assert (cache.hits, cache.misses) == (0, 3)
+        assert "%(" in pg.sql and isinstance(pg.params, dict)
+
+    def test_uninstalled_package(self, resource_table, attr, conn, monkeypatch):
+        def version(name):
+            raise importlib.metadata.PackageNotFoundError(name)
+
+        shared_cache._adapter_version.cache_clear()
+        monkeypatch.setattr(importlib.metadata, "version", version)
+        try:
+            cache = SharedQueryCache(size=64 * 1024, slot_size=1024)
+            get_compiled_query(_IN, resource_table, attr, conn.dialect, cache=cache)
+            assert shared_cache._adapter_version() == "unknown"
+        finally:
+            shared_cache._adapter_version.cache_clear()
+
+    def test_without_cache(self, resource_table, attr, conn):
+        plan = leaf_plan("eq", "aString", "string")
+        compiled = get_compiled_query(plan, resource_table, attr, conn.dialect)
+        assert compiled.params == ("string",)
+        assert compiled.sql.endswith('WHERE resource."aString" = ?')
+
+    def test_across_processes(self, resource_table, attr):
+        cache = SharedQueryCache(size=64 * 1024, slot_size=1024)
+        ctx = multiprocessing.get_context("fork")
+        child = ctx.Process(
+            target=_compile_in_child, args=(cache, resource_table, attr)
+        )
+        child.start()
+        child.join()
+        assert child.exitcode == 0
+
+        get_compiled_query(_IN, resource_table, attr, postgresql.dialect(), cache=cache)
+        assert (cache.hits, cache.misses) == (1, 0)
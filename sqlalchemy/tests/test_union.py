@@ -0,0 +1,73 @@
+import pytest
+from helpers import leaf_plan, response
+
+from cerbos_sqlalchemy.union import KindQuery, get_union_query
+from sqlalchemy import String, cast, desc, literal
+
+_DENIED = response({"kind": "KIND_ALWAYS_DENIED"})
+
+
+@pytest.fixture
+def resource_kind(resource_table):
+    def kind(plan) -> KindQuery:
+        return KindQuery(
+            plan,
+            resource_table,
+            {"request.resource.attr.aBool": resource_table.aBool},
+            [
+                literal("resource").label("kind"),
+                resource_table.id.label("id"),
+                resource_table.name.label("title"),
+            ],
+        )
+
+    return kind
+
+
+@pytest.fixture
+def user_kind(user_table):
+    def kind(plan) -> KindQuery:
+        return KindQuery(
+            plan,
+            user_table,
+            {"request.resource.attr.id": user_table.id},
+            [
+                literal("user").label("kind"),
+                user_table.id.label("id"),
+                cast(user_table.id, String).label("title"),
+            ],
+        )
+
+    return kind
+
+
+class TestGetUnionQuery:
+    def test_union_all(self, resource_kind, user_kind, conn):
+        query = get_union_query(
+            [
+                resource_kind(leaf_plan("eq", "aBool", True)),
+                user_kind(leaf_plan("eq", "id", 2)),
+            ],
+            order_by=[desc("id")],
+            limit=3,
+        )
+        assert "UNION ALL" in str(query)
+        rows = conn.execute(query).fetchall()
+        assert [tuple(r) for r in rows] == [
+            ("resource", 3, "resource3"),
+            ("user", 2, "2"),
+            ("resource", 1, "resource1"),
+        ]
+
+    def test_denied_kinds(self, resource_kind, user_kind, conn):
+        query = get_union_query(
+            [resource_kind(_DENIED), user_kind(leaf_plan("eq", "id", 1))]
+        )
+        assert "UNION" not in str(query)
+        assert [tuple(r) for r in conn.execute(query)] == [("user", 1, "1")]
+
+        query = get_union_query([resource_kind(_DENIED), user_kind(_DENIED)])
+        assert conn.execute(query).fetchall() == []
+
+        with pytest.raises(ValueError):
+            get_union_query([])
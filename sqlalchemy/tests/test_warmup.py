@@ -0,0 +1,50 @@
+from cerbos.sdk.model import PlanResourcesResponse, Principal
+from cerbos_query_core import PlanRequest
+
+from cerbos_sqlalchemy.shared_cache import SharedQueryCache, get_compiled_query
+from cerbos_sqlalchemy.warmup import warm_up
+
+_RESPONSE = {
+    "requestId": "1",
+    "action": "action",
+    "resourceKind": "resource",
+    "policyVersion": "default",
+    "filter": {
+        "kind": "KIND_CONDITIONAL",
+        "condition": {
+            "expression": {
+                "operator": "eq",
+                "operands": [
+                    {"variable": "request.resource.attr.aBool"},
+                    {"value": True},
+                ],
+            }
+        },
+    },
+}
+
+
+class _StubClient:
+    def plan_resources(self, action, principal, resource):
+        return PlanResourcesResponse.from_dict(_RESPONSE)
+
+
+class TestWarmUp:
+    def test_warm_up(self, resource_table, conn):
+        attr = {"request.resource.attr.aBool": resource_table.aBool}
+        cache = SharedQueryCache(size=64 * 1024, slot_size=1024)
+        items = [
+            PlanRequest("resource", "view", Principal("1", roles={"user"})),
+            _RESPONSE,
+        ]
+        report = warm_up(
+            items, resource_table, attr, conn.dialect, client=_StubClient(), cache=cache
+        )
+        assert report.plans == 2
+        # the second plan is the same as the first
+        assert report.cached == 1
+        assert report.duration >= sum(report.timings) + report.planning_time
+        assert report.queries[0] == report.queries[1]
+
+        get_compiled_query(_RESPONSE, resource_table, attr, conn.dialect, cache=cache)
+        assert cache.hits == 2